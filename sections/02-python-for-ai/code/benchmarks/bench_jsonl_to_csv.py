@@ -0,0 +1,129 @@
+"""
+Benchmark: jsonl_to_csv.py scaling from 1 to N worker processes
+
+Generates a JSONL event log of --size-gb (nested `meta`, lists, and keys that
+only appear every few thousand lines, i.e. schema drift), then converts it:
+
+  sequential  `convert` (two streaming passes, one process)
+  workers=k   `convert_parallel` with k processes, for each k in --workers
+
+and prints wall time, input MB/s and speed-up over sequential. Every
+parallel output is compared byte for byte with the sequential CSV.
+
+With --mmap every run reads through the memory-mapped byte path instead
+(orjson when installed), plus one sequential text-mode run for comparison.
+
+Speed-up is bounded by the CPUs actually available (cgroup limits included)
+and by disk throughput once parsing is no longer the bottleneck.
+
+Run (from sections/02-python-for-ai/code):
+  python benchmarks/bench_jsonl_to_csv.py
+  python benchmarks/bench_jsonl_to_csv.py --size-gb 4 --workers 1 2 4 8 --dir /data/tmp
+  python benchmarks/bench_jsonl_to_csv.py --input events.jsonl   # existing log
+  python benchmarks/bench_jsonl_to_csv.py --mmap
+"""
+
+from __future__ import annotations
+
+import argparse
+import filecmp
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jsonl_to_csv import convert, convert_parallel, json_decoder_name  # noqa: E402
+
+EVENTS = ["login", "logout", "view_page", "add_to_cart", "purchase", "search"]
+PAGES = ["/", "/pricing", "/docs", "/blog", "/signup", "/account"]
+
+
+def _event(i: int, rng: random.Random) -> dict:
+    meta: dict = {"page": rng.choice(PAGES), "session": {"id": f"s_{i // 20}", "depth": i % 20}}
+    if i % 3 == 0:
+        meta["device"] = rng.choice(["mobile", "desktop", "tablet"])
+    if i % 7 == 0:
+        meta["amount"] = round(rng.uniform(1, 500), 2)
+        meta["items"] = [rng.randrange(1000) for _ in range(rng.randrange(1, 4))]
+    if i % 5000 == 0:
+        # Rare keys: columns the header must still include
+        meta[f"experiment_{i // 5000 % 25}"] = rng.choice(["a", "b"])
+    return {"ts": f"2025-12-20T10:{i // 60 % 60:02d}:{i % 60:02d}Z", "user_id": f"u_{i % 100_000:06d}", "event": rng.choice(EVENTS), "meta": meta}
+
+
+def generate_log(path: Path, size_bytes: int, seed: int = 0) -> int:
+    """Write JSONL events until the file reaches `size_bytes`; returns the line count."""
+
+    rng = random.Random(seed)
+    written = 0
+    lines = 0
+    with path.open("w", encoding="utf-8") as f:
+        while written < size_bytes:
+            block = "".join(json.dumps(_event(lines + j, rng), separators=(",", ":")) + "\n" for j in range(10_000))
+            f.write(block)
+            written += len(block)
+            lines += 10_000
+    return lines
+
+
+def _timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    default_workers = [w for w in (1, 2, 4, 8, 16, 32, 64) if w < cpus] + [cpus]
+
+    parser = argparse.ArgumentParser(description="Benchmark parallel JSONL -> CSV conversion.")
+    parser.add_argument("--size-gb", type=float, default=2.0, help="Size of the generated log")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers, help="Worker counts to time")
+    parser.add_argument("--input", default=None, help="Existing JSONL log (skips generation)")
+    parser.add_argument("--dir", default=None, help="Directory for the generated log and outputs")
+    parser.add_argument("--mmap", action="store_true", help="Read through the memory-mapped byte path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        tmp_path = Path(tmp)
+        if args.input:
+            input_path = Path(args.input)
+        else:
+            input_path = tmp_path / "events.jsonl"
+            started = time.perf_counter()
+            lines = generate_log(input_path, int(args.size_gb * 1e9))
+            print(f"Generated {lines:,} events in {time.perf_counter() - started:.1f}s")
+        size_mb = input_path.stat().st_size / 1e6
+
+        baseline = tmp_path / "sequential.csv"
+        seq = _timed(convert, input_path, baseline, use_mmap=args.mmap)
+        results = []
+        if args.mmap:
+            out = tmp_path / "text.csv"
+            elapsed = _timed(convert, input_path, out)
+            results.append(("sequential text", elapsed, filecmp.cmp(baseline, out, shallow=False)))
+            out.unlink()
+        for workers in args.workers:
+            out = tmp_path / f"workers-{workers}.csv"
+            elapsed = _timed(convert_parallel, input_path, out, workers, use_mmap=args.mmap)
+            results.append((f"workers={workers}", elapsed, filecmp.cmp(baseline, out, shallow=False)))
+            out.unlink()
+
+    print("=" * 72)
+    reader = f"mmap + {json_decoder_name()}" if args.mmap else "text + json"
+    print(f"JSONL -> CSV, {size_mb:,.0f} MB input, {cpus} CPUs available, {reader}")
+    print("=" * 72)
+    print(f"  {'':<16}{'seconds':>10}{'MB/s':>10}{'speed-up':>11}{'same CSV':>11}")
+    print(f"  {'sequential':<16}{seq:>10.1f}{size_mb / seq:>10.1f}{1.0:>10.2f}x{'-':>11}")
+    for name, elapsed, same in results:
+        print(f"  {name:<16}{elapsed:>10.1f}{size_mb / elapsed:>10.1f}{seq / elapsed:>10.2f}x{str(same):>11}")
+    return 0 if all(same for _, _, same in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
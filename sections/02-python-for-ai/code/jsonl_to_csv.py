@@ -4,6 +4,7 @@ from __future__ import annotations
 
 Run:
   python sections/02-python-for-ai/code/jsonl_to_csv.py --in sections/02-python-for-ai/code/sample_logs.jsonl --out /tmp/logs.csv
+  zcat events.jsonl.gz | python sections/02-python-for-ai/code/jsonl_to_csv.py --in - --out /tmp/logs.csv
 
 Why JSONL?
 - Many systems emit one JSON object per line.
@@ -13,18 +14,63 @@ This script demonstrates:
 - robust line-by-line parsing
 - best-effort flattening of nested `meta` keys
 - schema drift handling (missing/extra fields)
+
+Memory stays constant however large the log is: rows are generated one at a
+time and written as they are flattened. A CSV header must list every column
+before the first row, so the file is read twice:
+1. schema pass: parse + flatten every line, keep only the set of keys
+2. write pass: parse + flatten again, write each row under that header
+Stdin cannot be re-read, so its lines are spilled to a temporary file during
+the schema pass and the write pass reads the spill file.
+
+With --workers N both passes run in a process pool: the file is cut into
+chunks at newline-aligned byte offsets, each worker parses its chunks and
+returns their key sets (merged into one header), then writes each chunk to
+a part file under that header. The parts are concatenated in input order,
+or kept as sharded CSVs (--shards), each with its own header.
+  python sections/02-python-for-ai/code/jsonl_to_csv.py --in events.jsonl --out /tmp/logs.csv --workers 8
+
+With --mmap the file is memory-mapped instead of read as text: line
+boundaries are found on the raw bytes and each line goes to the JSON decoder
+as a byte slice, without decoding it to a str and stripping it first. With
+orjson installed the slice is a zero-copy memoryview; the stdlib fallback
+(json.loads takes bytes, not memoryviews) copies it once and decodes it
+internally, so without orjson --mmap is no faster than the text path. orjson
+also rejects a few inputs json accepts (integers beyond 64 bits, lone
+surrogate escapes). Works with --workers: every worker maps the file and
+scans only its byte range.
+  python sections/02-python-for-ai/code/jsonl_to_csv.py --in events.jsonl --out /tmp/logs.csv --mmap --workers 8
 """
 
 import argparse
 import csv
 import json
 import logging
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
+
+try:  # Optional accelerator for the --mmap path; json.loads is used without it
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+REQUIRED_COLUMNS = ["ts", "user_id", "event"]
+
+# Chunks per worker (so a slow chunk does not leave the other workers idle),
+# and the smallest chunk worth a task
+CHUNKS_PER_WORKER = 4
+MIN_CHUNK_BYTES = 1 << 20
+
 
 @dataclass(frozen=True)
 class LogRow:
@@ -51,89 +97,392 @@ def _flatten(prefix: str, obj: Any, out: dict[str, object]) -> None:
     out[prefix] = obj
 
 
-def read_jsonl(path: Path) -> list[LogRow]:
+def parse_line(line: str, line_no: int) -> LogRow | None:
+    """Parse one JSONL line; None for blank lines."""
+
+    line = line.strip()
+    if not line:
+        return None
+
+    try:
+        obj = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON on line {line_no}: {e}") from e
+
+    return parse_record(obj, line_no)
+
+
+def parse_record(obj: Any, line_no: int) -> LogRow:
+    """Validate one decoded JSONL value into a LogRow."""
+
+    if not isinstance(obj, dict):
+        raise ValueError(f"Expected JSON object per line; got {type(obj).__name__} on line {line_no}")
+
+    ts = str(obj.get("ts", ""))
+    user_id = str(obj.get("user_id", ""))
+    event = str(obj.get("event", ""))
+    meta_raw = obj.get("meta", {})
+    meta = meta_raw if isinstance(meta_raw, dict) else {"meta": meta_raw}
+
+    if not ts or not user_id or not event:
+        raise ValueError(f"Missing required fields on line {line_no}: {obj}")
+
+    return LogRow(ts=ts, user_id=user_id, event=event, meta=meta)
+
+
+def parse_lines(lines: Iterable[str], start: int = 1) -> Iterator[LogRow]:
+    """Yield one LogRow per non-blank line; holds only the current line."""
+
+    for line_no, line in enumerate(lines, start=start):
+        row = parse_line(line, line_no)
+        if row is not None:
+            yield row
+
+
+def iter_jsonl(path: Path) -> Iterator[LogRow]:
+    """Stream LogRows from a JSONL file."""
+
     if not path.exists():
         raise FileNotFoundError(f"Input file not found: {path}")
 
-    rows: list[LogRow] = []
     with path.open("r", encoding="utf-8") as f:
-        for line_no, line in enumerate(f, start=1):
-            line = line.strip()
-            if not line:
-                continue
+        yield from parse_lines(f)
+
 
-            try:
-                obj = json.loads(line)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON on line {line_no}: {e}") from e
+def json_decoder_name() -> str:
+    return "orjson" if orjson is not None else "json"
 
-            if not isinstance(obj, dict):
-                raise ValueError(f"Expected JSON object per line; got {type(obj).__name__} on line {line_no}")
 
-            ts = str(obj.get("ts", ""))
-            user_id = str(obj.get("user_id", ""))
-            event = str(obj.get("event", ""))
-            meta_raw = obj.get("meta", {})
-            meta = meta_raw if isinstance(meta_raw, dict) else {"meta": meta_raw}
+def iter_jsonl_mmap(path: Path, start: int = 0, end: int | None = None, first_line: int = 1) -> Iterator[LogRow]:
+    """Stream LogRows from the byte range [start, end) of a memory-mapped JSONL file.
 
-            if not ts or not user_id or not event:
-                raise ValueError(f"Missing required fields on line {line_no}: {obj}")
+    `start` must be at a line boundary; `first_line` is its line number.
+    """
+
+    if not path.exists():
+        raise FileNotFoundError(f"Input file not found: {path}")
+    if path.stat().st_size == 0:
+        return  # an empty file cannot be mapped
+
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        end = len(mm) if end is None else end
+        if hasattr(mmap, "MADV_SEQUENTIAL"):  # read-ahead hint (Linux/macOS)
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        if orjson is not None:
+            view = memoryview(mm)
+            loads = orjson.loads
+        else:
+            view = mm
+            loads = json.loads
+        try:
+            line_no = first_line
+            pos = start
+            while pos < end:
+                nl = mm.find(b"\n", pos, end)
+                stop = end if nl < 0 else nl
+                if stop > pos:
+                    # Surrounding whitespace (\r, indentation) is legal JSON,
+                    # so the slice goes to the decoder unstripped
+                    try:
+                        obj = loads(view[pos:stop])
+                    except ValueError as e:
+                        # Whitespace-only lines are skipped like blank ones
+                        if mm[pos:stop].strip():
+                            raise ValueError(f"Invalid JSON on line {line_no}: {e}") from e
+                    else:
+                        yield parse_record(obj, line_no)
+                pos = stop + 1
+                line_no += 1
+        finally:
+            if view is not mm:
+                view.release()
+
+
+def read_jsonl(path: Path) -> list[LogRow]:
+    """All rows in memory (small files, notebooks); prefer `iter_jsonl` for logs."""
 
-            rows.append(LogRow(ts=ts, user_id=user_id, event=event, meta=meta))
+    return list(iter_jsonl(path))
 
-    return rows
 
+def flatten_row(row: LogRow) -> dict[str, object]:
+    out: dict[str, object] = {"ts": row.ts, "user_id": row.user_id, "event": row.event}
+    _flatten("meta", row.meta, out)
+    return out
 
-def to_flat_dicts(rows: list[LogRow]) -> list[dict[str, object]]:
-    flat_rows: list[dict[str, object]] = []
 
+def iter_flat_dicts(rows: Iterable[LogRow]) -> Iterator[dict[str, object]]:
     for r in rows:
-        out: dict[str, object] = {"ts": r.ts, "user_id": r.user_id, "event": r.event}
-        _flatten("meta", r.meta, out)
-        flat_rows.append(out)
+        yield flatten_row(r)
 
-    return flat_rows
 
+def to_flat_dicts(rows: Iterable[LogRow]) -> list[dict[str, object]]:
+    return list(iter_flat_dicts(rows))
 
-def write_csv(path: Path, rows: list[dict[str, object]]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
+
+def collect_keys(rows: Iterable[dict[str, object]]) -> tuple[set[str], int]:
+    """Union of keys over a stream of flat rows, and the number of rows seen."""
 
     # Union of keys = handles schema drift by expanding columns.
     all_keys: set[str] = set()
+    count = 0
     for r in rows:
         all_keys.update(r.keys())
+        count += 1
+    return all_keys, count
+
+
+def csv_fieldnames(keys: Iterable[str]) -> list[str]:
+    """Required columns first, then every other key sorted."""
+
+    return REQUIRED_COLUMNS + sorted(k for k in set(keys) if k not in REQUIRED_COLUMNS)
+
+
+def write_csv(path: Path, rows: Iterable[dict[str, object]], fieldnames: list[str] | None = None) -> int:
+    """Write rows under `fieldnames` as they arrive; returns the row count.
 
-    fieldnames = ["ts", "user_id", "event"] + sorted(k for k in all_keys if k not in {"ts", "user_id", "event"})
+    Without `fieldnames` the header is the union of the rows' keys, which
+    means holding all rows in memory first.
+    """
 
+    if fieldnames is None:
+        rows = list(rows)
+        fieldnames = csv_fieldnames(collect_keys(rows)[0])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    count = 0
     with path.open("w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
-        writer.writerows(rows)
+        for r in rows:
+            writer.writerow(r)
+            count += 1
+    return count
+
+
+def _tee(lines: Iterable[str], spill: TextIO) -> Iterator[str]:
+    for line in lines:
+        spill.write(line)
+        yield line
+
+
+def convert(input_path: Path, output_path: Path, use_mmap: bool = False) -> int:
+    """Stream a JSONL file into a CSV in two passes; returns the event count."""
+
+    read = iter_jsonl_mmap if use_mmap else iter_jsonl
+    keys, count = collect_keys(iter_flat_dicts(read(input_path)))
+    logger.info("Schema pass: %d events, %d columns", count, len(keys))
+    return write_csv(output_path, iter_flat_dicts(read(input_path)), csv_fieldnames(keys))
+
+
+def convert_stream(lines: Iterable[str], output_path: Path) -> int:
+    """Like `convert` for input that can only be read once (e.g. stdin).
+
+    The schema pass copies each line to a temporary file (next to the output)
+    and the write pass re-reads that copy, so memory still stays constant.
+    """
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryFile("w+", encoding="utf-8", dir=output_path.parent) as spill:
+        keys, count = collect_keys(iter_flat_dicts(parse_lines(_tee(lines, spill))))
+        logger.info("Schema pass: %d events, %d columns (spilled to disk)", count, len(keys))
+        spill.seek(0)
+        return write_csv(output_path, iter_flat_dicts(parse_lines(spill)), csv_fieldnames(keys))
+
+
+@dataclass(frozen=True)
+class ChunkSchema:
+    keys: set[str]
+    events: int
+    failed: bool = False
+
+
+def chunk_offsets(path: Path, chunks: int) -> list[tuple[int, int]]:
+    """Split a file into up to `chunks` [start, end) byte ranges ending on a newline."""
+
+    size = path.stat().st_size
+    chunks = max(1, min(chunks, size // MIN_CHUNK_BYTES))
+    bounds = [0]
+    with path.open("rb") as f:
+        for i in range(1, chunks):
+            f.seek(max(size * i // chunks, bounds[-1]))
+            f.readline()  # finish the line the cut landed in
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _read_chunk(path: Path, start: int, end: int) -> Iterator[str]:
+    """Lines of the byte range [start, end); `start` is at a line boundary."""
+
+    with path.open("rb") as f:
+        f.seek(start)
+        pos = start
+        for raw in f:
+            yield raw.decode("utf-8")
+            pos += len(raw)
+            if pos >= end:
+                return
+
+
+def _count_lines(path: Path, end: int) -> int:
+    """Newlines in the first `end` bytes of a file."""
+
+    lines = 0
+    with path.open("rb") as f:
+        while f.tell() < end:
+            lines += f.read(min(1 << 20, end - f.tell())).count(b"\n")
+    return lines
+
+
+def _chunk_rows(path: Path, start: int, end: int, use_mmap: bool, first_line: int = 1) -> Iterator[LogRow]:
+    if use_mmap:
+        return iter_jsonl_mmap(path, start, end, first_line)
+    return parse_lines(_read_chunk(path, start, end), start=first_line)
+
+
+def _chunk_schema(path: Path, start: int, end: int, use_mmap: bool) -> ChunkSchema:
+    """Schema pass over one chunk (runs in a worker process)."""
+
+    try:
+        keys, events = collect_keys(iter_flat_dicts(_chunk_rows(path, start, end, use_mmap)))
+    except ValueError:
+        # Line numbers are only known relative to the chunk here; the parent
+        # re-parses it with the right starting line to report the error
+        return ChunkSchema(keys=set(), events=0, failed=True)
+    return ChunkSchema(keys=keys, events=events)
+
+
+def _write_chunk(
+    path: Path, start: int, end: int, use_mmap: bool, fieldnames: list[str], out_path: Path, header: bool
+) -> int:
+    """Write pass over one chunk to its own part file (runs in a worker process)."""
+
+    count = 0
+    with out_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        if header:
+            writer.writeheader()
+        for r in iter_flat_dicts(_chunk_rows(path, start, end, use_mmap)):
+            writer.writerow(r)
+            count += 1
+    return count
+
+
+def shard_path(output_path: Path, index: int) -> Path:
+    return output_path.with_name(f"{output_path.stem}-{index:05d}{output_path.suffix}")
+
+
+def convert_parallel(
+    input_path: Path, output_path: Path, workers: int, shards: bool = False, use_mmap: bool = False
+) -> int:
+    """`convert` with both passes spread over `workers` processes.
+
+    Without `shards` the output is byte-identical to `convert`'s. With
+    `shards`, chunk i goes to `<out stem>-<i>.csv` (see `shard_path`), each
+    with the full header, and nothing is written to `output_path` itself.
+    """
+
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+
+    ranges = chunk_offsets(input_path, workers * CHUNKS_PER_WORKER)
+    paths = [input_path] * len(ranges)
+    starts = [start for start, _ in ranges]
+    ends = [end for _, end in ranges]
+    mmaps = [use_mmap] * len(ranges)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        schemas = list(pool.map(_chunk_schema, paths, starts, ends, mmaps))
+
+        for i, schema in enumerate(schemas):
+            if schema.failed:
+                first_line = 1 + _count_lines(input_path, starts[i])
+                for _ in _chunk_rows(input_path, starts[i], ends[i], use_mmap, first_line):
+                    pass
+                raise ValueError(f"Chunk {i} failed to parse on a worker but not on re-read")
+
+        keys: set[str] = set().union(*(s.keys for s in schemas))
+        fieldnames = csv_fieldnames(keys)
+        logger.info(
+            "Schema pass: %d events, %d columns (%d chunks, %d workers)",
+            sum(s.events for s in schemas), len(keys), len(ranges), workers,
+        )
+
+        if shards:
+            parts = [shard_path(output_path, i) for i in range(len(ranges))]
+            logger.info("Writing %d shards: %s ... %s", len(parts), parts[0], parts[-1])
+            return sum(pool.map(_write_chunk, paths, starts, ends, mmaps, [fieldnames] * len(parts), parts, [True] * len(parts)))
+
+        with tempfile.TemporaryDirectory(dir=output_path.parent) as tmp:
+            parts = [Path(tmp) / f"part-{i:05d}.csv" for i in range(len(ranges))]
+            count = sum(pool.map(_write_chunk, paths, starts, ends, mmaps, [fieldnames] * len(parts), parts, [False] * len(parts)))
+            with output_path.open("w", newline="", encoding="utf-8") as out:
+                csv.DictWriter(out, fieldnames=fieldnames).writeheader()
+                for part in parts:
+                    with part.open("r", newline="", encoding="utf-8") as f:
+                        shutil.copyfileobj(f, out, 1 << 20)
+    return count
 
 
 def _build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="Convert JSONL logs to a flattened CSV.")
-    p.add_argument("--in", dest="input_path", required=True, help="Path to input JSONL")
+    p.add_argument("--in", dest="input_path", required=True, help="Path to input JSONL ('-' for stdin)")
     p.add_argument("--out", dest="output_path", required=True, help="Path to output CSV")
+    p.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        default=1,
+        help="Parser processes (0 = one per CPU). Default: 1 (no pool)",
+    )
+    p.add_argument(
+        "--shards",
+        dest="shards",
+        action="store_true",
+        help="With --workers: write one CSV per chunk (<out>-00000.csv, ...) instead of one file",
+    )
+    p.add_argument(
+        "--mmap",
+        dest="use_mmap",
+        action="store_true",
+        help="Memory-map the input and parse raw byte lines (orjson when installed)",
+    )
     p.add_argument("--log-level", dest="log_level", default="INFO")
     return p
 
 
 def main() -> int:
-    args = _build_parser().parse_args()
+    parser = _build_parser()
+    args = parser.parse_args()
     logging.basicConfig(level=getattr(logging, str(args.log_level).upper(), logging.INFO))
 
-    input_path = Path(args.input_path)
     output_path = Path(args.output_path)
-
-    logger.info("Reading JSONL: %s", input_path)
-    rows = read_jsonl(input_path)
-    logger.info("Loaded %d events", len(rows))
-
-    flat = to_flat_dicts(rows)
-    write_csv(output_path, flat)
-
-    logger.info("Wrote CSV: %s", output_path)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    if args.input_path == "-" and (workers > 1 or args.shards or args.use_mmap):
+        parser.error("--workers/--shards/--mmap need a file input (stdin cannot be split or mapped)")
+
+    if args.input_path == "-":
+        logger.info("Reading JSONL from stdin")
+        count = convert_stream(sys.stdin, output_path)
+    else:
+        input_path = Path(args.input_path)
+        if args.use_mmap:
+            logger.info("Reading JSONL (mmap, %s decoder): %s", json_decoder_name(), input_path)
+        else:
+            logger.info("Reading JSONL: %s", input_path)
+        if workers > 1 or args.shards:
+            count = convert_parallel(input_path, output_path, workers, shards=args.shards, use_mmap=args.use_mmap)
+        else:
+            count = convert(input_path, output_path, use_mmap=args.use_mmap)
+
+    logger.info("Wrote %d events to CSV: %s", count, output_path)
     return 0
 
 
@@ -0,0 +1,188 @@
+"""
+Model Adapters: One Forward Pass per Request
+
+Every served model is wrapped in an adapter exposing `predict_with_scores`,
+which returns prediction, class and confidence from a single model call:
+
+- NativeAdapter:      models that already implement `predict_with_scores`
+                      (e.g. MockModel).
+- ClassifierAdapter:  sklearn classifiers and Pipelines ending in one
+                      (calls `predict_proba` once; labels come from argmax).
+- RegressorAdapter:   everything else (calls `predict` once; class is the
+                      score thresholded, confidence is unavailable).
+
+Pipelines fitted on DataFrames (like the churn baseline in
+sections/03-data-science-fundamentals/labs/baseline_model/solution.py)
+receive a DataFrame with the column names they were fitted on.
+
+With `dtype="float32"` inputs are scored in float32 end to end: the fitted
+parameters of linear models and scalers are cast once at load time
+(`cast_float_params`), because sklearn upcasts float32 inputs to float64
+whenever they meet a float64 `coef_`/`mean_`. Tree ensembles need no cast:
+they already split on float32 internally.
+
+Memory-mapped parameters (MODEL_MMAP) are left as they are: casting would
+replace the shared read-only pages with a private heap copy in every
+process. To serve such a model in float32, cast it before saving it.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fitted float arrays of sklearn linear models and scalers (StandardScaler,
+# MinMaxScaler, RobustScaler, LogisticRegression, Ridge, ...)
+FLOAT_PARAMS = (
+    "coef_", "intercept_", "mean_", "scale_", "var_", "center_",
+    "min_", "data_min_", "data_max_", "data_range_",
+)
+
+
+@dataclass
+class ScoredBatch:
+    """Per-row outputs of one model call."""
+
+    predictions: np.ndarray  # positive-class probability or regression value
+    classes: np.ndarray      # predicted class label (int)
+    confidences: np.ndarray  # probability of the predicted class (NaN if unknown)
+
+    def __len__(self) -> int:
+        return len(self.predictions)
+
+    def rows(self) -> List[Tuple[float, int, float]]:
+        """(prediction, class, confidence) tuples, one per input row."""
+        return list(zip(self.predictions.tolist(), self.classes.tolist(), self.confidences.tolist()))
+
+
+def _estimators(model: Any) -> Iterator[Any]:
+    """The model and every estimator nested in Pipelines / ColumnTransformers."""
+    yield model
+    for _, step in getattr(model, "steps", None) or []:
+        yield from _estimators(step)
+    for _, transformer, _ in getattr(model, "transformers_", None) or []:
+        yield from _estimators(transformer)
+
+
+def cast_float_params(model: Any, dtype) -> Any:
+    """
+    Cast the fitted float parameters of `model` (in place) to `dtype`.
+
+    Also switches encoders that emit floats (OneHotEncoder) to `dtype`, so
+    a ColumnTransformer does not stack float32 and float64 blocks into float64.
+    Memory-mapped arrays are skipped (and logged) to keep them shared.
+    """
+    dtype = np.dtype(dtype)
+    mapped = []
+    for estimator in _estimators(model):
+        for name in FLOAT_PARAMS:
+            value = getattr(estimator, name, None)
+            if not (isinstance(value, np.ndarray) and value.dtype.kind == "f") or value.dtype == dtype:
+                continue
+            if isinstance(value, np.memmap):
+                mapped.append(f"{type(estimator).__name__}.{name}")
+            else:
+                setattr(estimator, name, value.astype(dtype))
+        # `dtype` constructor parameter = output dtype of the transform
+        if hasattr(estimator, "get_params") and "dtype" in estimator.get_params(deep=False):
+            if np.dtype(estimator.dtype).kind == "f":
+                estimator.dtype = dtype
+    if mapped:
+        logger.warning(
+            f"Not casting memory-mapped parameters to {dtype} (would unshare them): "
+            f"{', '.join(mapped)}; save a {dtype} artifact instead"
+        )
+    return model
+
+
+class ModelAdapter:
+    """Base adapter; subclasses implement `predict_with_scores`."""
+
+    def __init__(self, model: Any, threshold: float = 0.5, dtype="float64"):
+        self.model = model
+        self.threshold = threshold
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(getattr(self.model, "is_loaded", True))
+
+    @property
+    def model_type(self) -> str:
+        return type(self.model).__name__
+
+    def _prepare(self, X):
+        """Cast to the inference dtype; give estimators fitted on named columns a DataFrame."""
+        if isinstance(X, np.ndarray) and X.dtype != self.dtype:
+            X = X.astype(self.dtype)
+        columns = getattr(self.model, "feature_names_in_", None)
+        if columns is not None and isinstance(X, np.ndarray):
+            import pandas as pd  # only needed for DataFrame-fitted pipelines
+
+            return pd.DataFrame(X, columns=columns)
+        return X
+
+    def predict_with_scores(self, X) -> ScoredBatch:
+        raise NotImplementedError
+
+    def predict(self, X) -> np.ndarray:
+        return self.predict_with_scores(X).predictions
+
+
+class NativeAdapter(ModelAdapter):
+    """Delegates to a model that already scores in one pass."""
+
+    def predict_with_scores(self, X) -> ScoredBatch:
+        return self.model.predict_with_scores(self._prepare(X))
+
+
+class ClassifierAdapter(ModelAdapter):
+    """sklearn classifier or Pipeline: a single `predict_proba` call."""
+
+    def predict_with_scores(self, X) -> ScoredBatch:
+        proba = np.asarray(self.model.predict_proba(self._prepare(X)))
+        best = proba.argmax(axis=1)
+        labels = np.asarray(self.model.classes_)[best]
+
+        # Binary: report P(positive class); multiclass: the winning probability
+        if proba.shape[1] == 2:
+            predictions = proba[:, 1]
+        else:
+            predictions = proba[np.arange(len(best)), best]
+
+        return ScoredBatch(
+            predictions=predictions,
+            classes=labels.astype(int, copy=False),
+            confidences=proba[np.arange(len(best)), best],
+        )
+
+
+class RegressorAdapter(ModelAdapter):
+    """Any model with `predict`: one call, class by threshold."""
+
+    def predict_with_scores(self, X) -> ScoredBatch:
+        predictions = np.asarray(self.model.predict(self._prepare(X)), dtype=float)
+        return ScoredBatch(
+            predictions=predictions,
+            classes=(predictions > self.threshold).astype(int),
+            confidences=np.full(len(predictions), np.nan),
+        )
+
+
+def make_adapter(model: Any, threshold: float = 0.5, dtype="float64") -> ModelAdapter:
+    """Pick the adapter matching the model's capabilities (scoring in `dtype`)."""
+    if isinstance(model, ModelAdapter):
+        return model
+    if np.dtype(dtype) not in (np.float64, np.float32):
+        raise ValueError(f"Unsupported inference dtype '{dtype}', expected float64 or float32")
+    if np.dtype(dtype) != np.float64:
+        cast_float_params(model, dtype)
+    if hasattr(model, "predict_with_scores"):
+        return NativeAdapter(model, threshold, dtype)
+    # Pipelines only expose predict_proba when their last step has it
+    if hasattr(model, "predict_proba") and hasattr(model, "classes_"):
+        return ClassifierAdapter(model, threshold, dtype)
+    return RegressorAdapter(model, threshold, dtype)
@@ -0,0 +1,192 @@
+"""
+Asynchronous, Sampled Structured Logging
+
+Request handlers only build a LogRecord and push it onto a bounded queue;
+a background thread formats it as JSON and writes it to stderr. Nothing on
+the request path touches I/O, and a full queue drops the record (counted)
+instead of blocking the event loop.
+
+Sampling happens before a record is queued, per route and level:
+
+    LOG_SAMPLE_RATES="/predict:INFO=0.01,/predict/batch=0.1,*:DEBUG=0"
+
+Records carry their route via `extra={"route": ...}`; records without one
+match the `*` entries. Anything not configured is kept (rate 1.0).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from metrics import REGISTRY, Counter
+
+LOG_FORMATS = ("json", "text")
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+LOG_RECORDS_DROPPED = REGISTRY.register(Counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full",
+))
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+SampleRates = Dict[Tuple[str, Optional[int]], float]
+
+
+def parse_sample_rates(spec: str) -> SampleRates:
+    """
+    Parse "route[:LEVEL]=rate,..." into {(route, levelno or None): rate}.
+
+    `route` is a route template or `*`; omitting the level applies the rate
+    to every level of that route.
+    """
+    rates: SampleRates = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        target, sep, raw_rate = entry.rpartition("=")
+        if not sep or not target:
+            raise ValueError(f"Invalid log sample rate '{entry}', expected route[:LEVEL]=rate")
+        route, _, level_name = target.partition(":")
+        level = None
+        if level_name:
+            level = logging.getLevelName(level_name.strip().upper())
+            if not isinstance(level, int):
+                raise ValueError(f"Unknown log level '{level_name}' in '{entry}'")
+        rate = float(raw_rate)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"Sample rate must be between 0 and 1 in '{entry}'")
+        rates[(route.strip(), level)] = rate
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a configured fraction of records per (route, level)."""
+
+    def __init__(self, rates: SampleRates):
+        super().__init__()
+        self.rates = rates
+
+    def rate_for(self, route: str, levelno: int) -> float:
+        rates = self.rates
+        for key in ((route, levelno), (route, None), ("*", levelno), ("*", None)):
+            rate = rates.get(key)
+            if rate is not None:
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.rates:
+            return True
+        rate = self.rate_for(getattr(record, "route", "*"), record.levelno)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Rendered by DroppingQueueHandler before the record was queued
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: a full queue drops the record."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may be mutated later) but leave formatting to
+        # the writer thread; the stdlib version formats on the caller's thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks cannot cross threads safely once the frame is gone
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    sample_rates: str = "",
+    queue_size: int = 10_000,
+) -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a bounded queue to a background writer.
+
+    Replaces any handlers already on the root logger. Safe to call again
+    (e.g. after settings change): the previous writer is flushed and stopped.
+    """
+    global _listener
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{fmt}', expected one of {LOG_FORMATS}")
+    if _listener is not None:
+        _listener.stop()
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(sample_rates)))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _pause_for_fork() -> None:
+    # No writer thread may hold the queue's lock at fork(): the child would deadlock
+    if _listener is not None:
+        _listener.stop()
+
+
+def _resume_after_fork() -> None:
+    # Parent and child each get a writer thread (threads do not survive fork)
+    if _listener is not None:
+        _listener.start()
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_pause_for_fork, after_in_parent=_resume_after_fork, after_in_child=_resume_after_fork)
@@ -0,0 +1,242 @@
+"""
+Adaptive Micro-Batching for Single Predictions
+
+Concurrent /predict calls are queued and scored together with one vectorized
+model call instead of one model call per request.
+
+How the batch window adapts:
+- Whatever queued up while the previous batch was running is taken at once,
+  so batches grow naturally with load.
+- If the batch is not full yet, wait at most `max_wait_ms` for more rows.
+- A batch never exceeds `max_batch_size` rows.
+- At most `max_concurrency` batches are scored at once; while they run, new
+  requests keep queueing for the next batch.
+
+Batches are scored by the batcher's own tasks, outside any request context,
+so each item carries its request's model-time slot (REQUEST_MODEL_TIME) and
+the batch's model time is added to every request it served.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import BATCH_SIZE_BUCKETS, LATENCY_BUCKETS_SECONDS, REQUEST_MODEL_TIME, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Scores a 2-D feature matrix and returns one result per row
+InferFn = Callable[[np.ndarray], Awaitable[Sequence[Any]]]
+
+# features, result future, enqueue time, the request's model-time slot
+_PendingItem = Tuple[np.ndarray, "asyncio.Future[Any]", float, Optional[List[float]]]
+
+
+class MicroBatcher:
+    """
+    Collects single-row requests and runs them as one stacked matrix.
+
+    Usage:
+        batcher = MicroBatcher(async_score_rows, max_batch_size=32, max_wait_ms=2)
+        await batcher.start()
+        result = await batcher.submit(np.array([1.0, 2.0, 3.0]))
+        await batcher.stop()
+    """
+
+    def __init__(
+        self,
+        infer_fn: InferFn,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        max_concurrency: int = 1,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+
+        self.infer_fn = infer_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrency = max_concurrency
+
+        self.batch_size_histogram = Histogram(
+            "microbatch_batch_size", "Rows per model call", BATCH_SIZE_BUCKETS
+        )
+        self.queue_wait_histogram = Histogram(
+            "microbatch_queue_wait_seconds",
+            "Time a request waited in the queue before its batch ran",
+            LATENCY_BUCKETS_SECONDS,
+        )
+
+        self._queue: Optional["asyncio.Queue[_PendingItem]"] = None
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: "set[asyncio.Task[None]]" = set()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Start the background batching loop (call from the running loop)."""
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._worker = asyncio.create_task(self._run(), name="micro-batcher")
+        logger.info(
+            f"Micro-batcher started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:g}, "
+            f"max_concurrency={self.max_concurrency})"
+        )
+
+    async def stop(self) -> None:
+        """Stop the loop and fail any requests still waiting."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        while self._queue is not None and not self._queue.empty():
+            _, future, _, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+        logger.info("Micro-batcher stopped")
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    @property
+    def queued(self) -> int:
+        """Requests waiting to be picked up by a batch."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # ------------------------------------------------------------------
+    # Request side
+    # ------------------------------------------------------------------
+
+    async def submit(self, features: np.ndarray) -> Any:
+        """Queue one feature vector and wait for its result."""
+        if self._queue is None:
+            raise RuntimeError("Micro-batcher is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((features, future, time.perf_counter(), REQUEST_MODEL_TIME.get()))
+        return await future
+
+    # ------------------------------------------------------------------
+    # Batching loop
+    # ------------------------------------------------------------------
+
+    async def _collect(self) -> List[_PendingItem]:
+        """Block for the first item, then gather more until full or timed out."""
+        assert self._queue is not None
+        batch = [await self._queue.get()]
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take everything that is already queued without yielding
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        assert self._slots is not None
+        while True:
+            # Wait for a free slot first so rows keep accumulating meanwhile
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._score(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, batch: List[_PendingItem]) -> None:
+        assert self._slots is not None
+        try:
+            await self._dispatch(batch)
+        except Exception as e:  # never let one bad batch kill the loop
+            logger.error(f"Micro-batch failed: {e}")
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    async def _dispatch(self, batch: List[_PendingItem]) -> None:
+        """Run one model call per feature width and fan results back out."""
+        now = time.perf_counter()
+        for _, _, enqueued_at, _ in batch:
+            self.queue_wait_histogram.observe(now - enqueued_at)
+        # This task's own slot collects the model time of the calls below
+        batch_model_time = [0.0]
+        REQUEST_MODEL_TIME.set(batch_model_time)
+
+        # Rows of different widths cannot share a matrix
+        groups: Dict[int, List[_PendingItem]] = {}
+        for item in batch:
+            groups.setdefault(item[0].shape[-1], []).append(item)
+
+        for items in groups.values():
+            # Skip requests whose client already went away
+            live = [item for item in items if not item[1].done()]
+            if not live:
+                continue
+
+            matrix = np.stack([features for features, _, _, _ in live])
+            self.batch_size_histogram.observe(len(live))
+            before = batch_model_time[0]
+            try:
+                results = await self.infer_fn(matrix)
+            except Exception as e:
+                for _, future, _, _ in live:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                # Every request in the batch waited for the whole model call
+                model_time = batch_model_time[0] - before
+                for _, _, _, slot in live:
+                    if slot is not None:
+                        slot[0] += model_time
+
+            for (_, future, _, _), result in zip(live, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        """Histogram snapshots for tuning latency vs. throughput."""
+        return {
+            "enabled": self.running,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_concurrency": self.max_concurrency,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "queue_wait_seconds": self.queue_wait_histogram.snapshot(),
+        }
@@ -0,0 +1,278 @@
+"""
+Benchmark: in-process ASGI request cost, broken down by stage
+
+Drives the FastAPI `app` through its ASGI interface (no sockets, no HTTP
+client), so the numbers are framework + application cost only. For each
+payload the end-to-end request is timed, plus each stage in isolation:
+
+  parse      json.loads of the request body
+  validate   Pydantic model_validate, including the NumPy conversion it
+             performs in vectorized mode
+  convert    that conversion on its own (to_feature_array: one NumPy
+             conversion + finiteness check)
+  model      the scoring function the handler sends to the executor
+  serialize  response model construction, response_model validation and
+             JSON rendering (what FastAPI does after the handler returns)
+  framework  end-to-end minus the stages above (routing, middleware,
+             executor hop, dependency resolution)
+
+Lower-quartile timings are compared against a stored baseline; any measured stage (or the
+total) slower than the baseline by more than --tolerance and --min-delta-us
+fails the run. `framework` is a difference of two noisy numbers, so it is
+reported but not gated. The whole benchmark runs --runs times and each stage
+is the median across runs, for the baseline and for the check alike, so one
+unlucky run neither fails the gate nor becomes the baseline.
+Baselines are machine-specific: regenerate with --update-baseline after
+changing hardware, and commit the file together with intended slowdowns.
+
+Run (from sections/05-model-serving/code):
+  python benchmarks/bench_asgi.py
+  python benchmarks/bench_asgi.py --repeat 200 --tolerance 0.25
+  python benchmarks/bench_asgi.py --update-baseline --runs 7
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import simple_ml_api  # noqa: E402
+from config import settings  # noqa: E402
+from startup import asgi_post  # noqa: E402
+from validation import to_feature_array  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "bench_asgi.json"
+STAGES = ("parse", "validate", "convert", "model", "serialize", "framework", "total")
+GATED_STAGES = ("parse", "validate", "convert", "model", "serialize", "total")
+
+# (name, path, rows, features); rows=None means a single /predict payload
+CASES: List[Tuple[str, str, object, int]] = [
+    ("single_4", "/predict", None, 4),
+    ("single_32", "/predict", None, 32),
+    ("single_100", "/predict", None, 100),
+    ("batch_10x4", "/predict/batch", 10, 4),
+    ("batch_100x20", "/predict/batch", 100, 20),
+    ("batch_1000x4", "/predict/batch", 1000, 4),
+    ("batch_1000x100", "/predict/batch", 1000, 100),
+]
+
+
+# ============================================================================
+# Timing
+# ============================================================================
+
+# Lower quartile rather than median: on a shared machine the upper half of
+# the samples is mostly scheduler and frequency noise, not code cost
+QUANTILE = 0.25
+
+
+def _quantile_us(samples: List[float]) -> float:
+    return statistics.quantiles(samples, n=100)[int(QUANTILE * 100) - 1] * 1e6
+
+
+def _time_us(fn: Callable[[], object], repeat: int, min_time_s: float = 0.2) -> float:
+    fn()  # warm-up
+    samples = []
+    deadline = time.perf_counter() + min_time_s
+    while len(samples) < repeat or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _quantile_us(samples)
+
+
+async def _time_us_async(fn, repeat: int, min_time_s: float = 0.2) -> float:
+    await fn()
+    samples = []
+    deadline = time.perf_counter() + min_time_s
+    while len(samples) < repeat or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return _quantile_us(samples)
+
+
+def _payload(rows, features: int, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    if rows is None:
+        return json.dumps({"features": rng.normal(size=features).tolist()}).encode()
+    return json.dumps({"instances": rng.normal(size=(rows, features)).tolist()}).encode()
+
+
+def _response_field(path: str):
+    for route in simple_ml_api.app.routes:
+        if getattr(route, "path", None) == path and "POST" in route.methods:
+            return route.response_field
+    raise LookupError(path)
+
+
+async def _render(field, output) -> bytes:
+    content = await serialize_response(field=field, response_content=output, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+def _single_output(result):
+    prediction, prediction_class, confidence = result
+    return simple_ml_api.PredictionOutput(
+        prediction=float(prediction),
+        prediction_class=prediction_class,
+        confidence=None if np.isnan(confidence) else confidence,
+        model_version=simple_ml_api.MODEL_VERSION,
+        timestamp="2024-01-01T00:00:00",
+    )
+
+
+def _batch_output(predictions):
+    return simple_ml_api.BatchPredictionOutput(
+        predictions=[float(p) for p in predictions],
+        count=len(predictions),
+        model_version=simple_ml_api.MODEL_VERSION,
+        timestamp="2024-01-01T00:00:00",
+    )
+
+
+async def bench_case(path: str, rows, features: int, repeat: int) -> Dict[str, float]:
+    app, api = simple_ml_api.app, simple_ml_api
+    body = _payload(rows, features)
+    single = rows is None
+    schema = api.PredictionInput if single else api.BatchPredictionInput
+    parsed = json.loads(body)
+    values = parsed["features"] if single else parsed["instances"]
+    X = to_feature_array(values).reshape(1, -1) if single else to_feature_array(values)
+    model = api.model
+    field = _response_field(path)
+
+    status, response = await asgi_post(app, path, body)
+    if status != 200:
+        raise RuntimeError(f"{path} returned {status}: {response[:200]!r}")
+
+    # Large batches are slow: fewer iterations, still at least min_time_s each
+    n = max(5, repeat // (10 if rows and rows * features >= 10_000 else 1))
+    stages = {
+        "parse": _time_us(lambda: json.loads(body), n),
+        "validate": _time_us(lambda: schema.model_validate(parsed).as_array(), n),
+    }
+    if single:
+        result = api.score_rows(model, X)[0]
+        stages["model"] = _time_us(lambda: api.score_rows(model, X), n)
+        stages["serialize"] = await _time_us_async(lambda: _render(field, _single_output(result)), n)
+    else:
+        predictions = api.predict_values(model, X)
+        stages["model"] = _time_us(lambda: api.predict_values(model, X), n)
+        stages["serialize"] = await _time_us_async(lambda: _render(field, _batch_output(predictions)), n)
+
+    accounted = sum(stages.values())
+    # Part of validate, so not counted twice
+    stages["convert"] = _time_us(lambda: to_feature_array(values), n)
+    stages["total"] = await _time_us_async(lambda: asgi_post(app, path, body), n)
+    stages["framework"] = max(stages["total"] - accounted, 0.0)
+    return stages
+
+
+async def run(repeat: int, microbatch: bool) -> Dict[str, Dict[str, float]]:
+    # Same settings swap as bench_validation: handlers read settings at call time
+    simple_ml_api.settings = dataclasses.replace(settings, microbatch_enabled=microbatch)
+    # Keep request logging out of the measurement
+    logging.getLogger().setLevel(logging.WARNING)
+    results = {}
+    # As timeit does: collector pauses land on random samples otherwise
+    gc.collect()
+    gc.disable()
+    try:
+        async with simple_ml_api.app.router.lifespan_context(simple_ml_api.app):
+            for name, path, rows, features in CASES:
+                results[name] = await bench_case(path, rows, features, repeat)
+    finally:
+        gc.enable()
+        simple_ml_api.settings = settings
+    return results
+
+
+# ============================================================================
+# Baselines
+# ============================================================================
+
+def median_of_runs(runs: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    """Per case and stage, the median over repeated benchmark runs."""
+    return {
+        case: {stage: statistics.median(run[case][stage] for run in runs) for stage in stages}
+        for case, stages in runs[0].items()
+    }
+
+
+def compare(results, baseline, tolerance: float, min_delta_us: float) -> List[str]:
+    """Stages slower than baseline * (1 + tolerance) by at least min_delta_us."""
+    regressions = []
+    for case, stages in results.items():
+        for stage in GATED_STAGES:
+            value = stages[stage]
+            old = baseline.get("cases", {}).get(case, {}).get(stage)
+            if old is None:
+                continue
+            if value > old * (1 + tolerance) and value - old >= min_delta_us:
+                regressions.append(
+                    f"{case}.{stage}: {old:.1f} us -> {value:.1f} us ({(value - old) / old:+.0%})"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="In-process ASGI benchmark with per-stage timing.")
+    parser.add_argument("--repeat", type=int, default=100, help="Timed iterations per stage")
+    parser.add_argument("--microbatch", action="store_true",
+                        help="Keep micro-batching on (adds up to MICROBATCH_MAX_WAIT_MS to /predict)")
+    parser.add_argument("--runs", type=int, default=3, help="Benchmark runs; each stage is the median across them")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown per stage")
+    parser.add_argument("--min-delta-us", type=float, default=50.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    results = median_of_runs([asyncio.run(run(args.repeat, args.microbatch)) for _ in range(max(1, args.runs))])
+
+    print("=" * 92)
+    print(f"In-process ASGI request cost, microseconds per stage (lower quartile, median of {max(1, args.runs)} runs)")
+    print("=" * 92)
+    print(f"{'case':<16}" + "".join(f"{stage:>11}" for stage in STAGES))
+    for case, stages in results.items():
+        print(f"{case:<16}" + "".join(f"{stages[stage]:>11.1f}" for stage in STAGES))
+
+    if args.update_baseline or not args.baseline.exists():
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            "machine": f"{platform.machine()} / {platform.processor() or 'unknown'} / Python {platform.python_version()}",
+            "repeat": args.repeat,
+            "runs": max(1, args.runs),
+            "cases": {case: {k: round(v, 1) for k, v in stages.items()} for case, stages in results.items()},
+        }, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance, args.min_delta_us)
+    if regressions:
+        print("\n" + "!" * 92)
+        print(f"PERFORMANCE REGRESSION vs {args.baseline.name} (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        print("!" * 92)
+        return 1
+    print(f"\nNo regressions vs {args.baseline.name} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,209 @@
+"""
+Benchmark: float32 vs float64 inference (INFERENCE_DTYPE)
+
+For two models:
+
+  linear  StandardScaler + LogisticRegression on --features numeric columns
+          (the shape the API serves: plain feature vectors)
+  churn   the churn baseline Pipeline (OneHotEncoder + StandardScaler +
+          LogisticRegression) from
+          sections/03-data-science-fundamentals/labs/baseline_model/solution.py
+
+reports scoring throughput per batch size, peak memory while scoring the
+largest batch (tracemalloc; NumPy reports its buffers to it), and the
+numerical drift of float32 against float64: max / mean absolute difference
+in the predicted probability and the number of rows whose class flips.
+
+Then times /predict/batch end to end through the ASGI app with the linear
+model saved to a temporary MODEL_PATH, once per INFERENCE_DTYPE.
+
+Run (from sections/05-model-serving/code):
+  python benchmarks/bench_dtype.py
+  python benchmarks/bench_dtype.py --features 100 --drift-rows 1000000
+"""
+
+import argparse
+import asyncio
+import copy
+import dataclasses
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+BASELINE_DIR = CODE_DIR.parent.parent / "03-data-science-fundamentals" / "labs" / "baseline_model"
+sys.path.insert(0, str(CODE_DIR))
+sys.path.insert(0, str(BASELINE_DIR))
+sys.path.insert(0, str(BASELINE_DIR / "data"))
+
+import simple_ml_api  # noqa: E402
+import solution  # noqa: E402
+from adapters import make_adapter  # noqa: E402
+from config import settings  # noqa: E402
+from generate_churn_synth import GeneratorConfig, generate_dataframe  # noqa: E402
+from startup import asgi_post  # noqa: E402
+
+DTYPES = ("float64", "float32")
+
+
+# ============================================================================
+# Models and inputs
+# ============================================================================
+
+def linear_model(features: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(loc=50, scale=20, size=(20_000, features))
+    logit = ((X - 50) / 20) @ rng.normal(size=features) / np.sqrt(features)
+    y = (logit + rng.normal(size=len(X)) > 0).astype(int)
+    model = Pipeline([("scale", StandardScaler()), ("model", LogisticRegression(max_iter=1000))]).fit(X, y)
+
+    def inputs(rows: int, dtype: str, seed: int = 1):
+        return np.random.default_rng(seed).normal(loc=50, scale=20, size=(rows, features)).astype(dtype)
+
+    return model, inputs
+
+
+def churn_model(seed: int = 0):
+    def frame(rows: int, frame_seed: int) -> pd.DataFrame:
+        df = generate_dataframe(GeneratorConfig(rows=rows, seed=frame_seed)).drop(columns=["churn"])
+        # solution.py finds categoricals by object dtype
+        for column in df.columns:
+            if not pd.api.types.is_numeric_dtype(df[column]):
+                df[column] = df[column].astype(object)
+        return df
+
+    train = generate_dataframe(GeneratorConfig(rows=20_000, seed=seed))
+    X, y = frame(20_000, seed), train["churn"]
+    preprocessor, _, numeric_cols = solution.build_preprocessor(X)
+    model = solution.build_model(preprocessor).fit(X, y)
+
+    def inputs(rows: int, dtype: str, seed: int = 1):
+        df = frame(rows, seed)
+        df[numeric_cols] = df[numeric_cols].astype(dtype)
+        return df
+
+    return model, inputs
+
+
+# ============================================================================
+# Measurements
+# ============================================================================
+
+def _rows_per_s(adapter, X, min_time_s: float = 0.3) -> float:
+    adapter.predict_with_scores(X)  # warm-up
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time_s:
+        adapter.predict_with_scores(X)
+        calls += 1
+    return calls * len(X) / (time.perf_counter() - start)
+
+
+def _peak_mb(adapter, X) -> float:
+    tracemalloc.start()
+    adapter.predict_with_scores(X)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def bench_model(model, inputs, batch_sizes, drift_rows: int) -> dict:
+    adapters = {dtype: make_adapter(copy.deepcopy(model), dtype=dtype) for dtype in DTYPES}
+    result = {"throughput": {}, "peak_mb": {}, "input_mb": {}}
+    for dtype, adapter in adapters.items():
+        result["throughput"][dtype] = {rows: _rows_per_s(adapter, inputs(rows, dtype)) for rows in batch_sizes}
+        X = inputs(max(batch_sizes), dtype)
+        result["peak_mb"][dtype] = _peak_mb(adapter, X)
+        result["input_mb"][dtype] = (X.nbytes if isinstance(X, np.ndarray) else X.memory_usage(deep=True).sum()) / 1e6
+
+    reference = adapters["float64"].predict_with_scores(inputs(drift_rows, "float64"))
+    reduced = adapters["float32"].predict_with_scores(inputs(drift_rows, "float32"))
+    delta = np.abs(reference.predictions - reduced.predictions.astype(np.float64))
+    result["drift"] = {
+        "rows": drift_rows,
+        "max_abs": float(delta.max()),
+        "mean_abs": float(delta.mean()),
+        "class_flips": int((reference.classes != reduced.classes).sum()),
+    }
+    return result
+
+
+async def bench_api(model, inputs, rows: int, repeat: int) -> dict:
+    logging.getLogger().setLevel(logging.WARNING)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "linear.pkl")
+        joblib.dump(model, path)
+        for dtype in DTYPES:
+            body = json.dumps({"instances": inputs(rows, "float64").tolist()}).encode()
+            simple_ml_api.settings = dataclasses.replace(
+                settings, model_path=path, inference_dtype=dtype, microbatch_enabled=False,
+            )
+            try:
+                async with simple_ml_api.app.router.lifespan_context(simple_ml_api.app):
+                    status, response = await asgi_post(simple_ml_api.app, "/predict/batch", body)
+                    if status != 200:
+                        raise RuntimeError(f"/predict/batch returned {status}: {response[:200]!r}")
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        await asgi_post(simple_ml_api.app, "/predict/batch", body)
+                    results[dtype] = (time.perf_counter() - start) / repeat * 1e3
+            finally:
+                simple_ml_api.settings = settings
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark float32 vs float64 inference.")
+    parser.add_argument("--features", type=int, default=32, help="Width of the linear model")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10_000], help="Batch sizes")
+    parser.add_argument("--drift-rows", type=int, default=100_000, help="Rows compared for drift")
+    parser.add_argument("--api-rows", type=int, default=1000, help="Rows per /predict/batch request")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed /predict/batch requests")
+    args = parser.parse_args()
+
+    linear, linear_inputs = linear_model(args.features)
+    churn, churn_inputs = churn_model()
+    models = {
+        f"linear ({args.features} features)": bench_model(linear, linear_inputs, args.rows, args.drift_rows),
+        "churn pipeline": bench_model(churn, churn_inputs, args.rows, args.drift_rows),
+    }
+    api = asyncio.run(bench_api(linear, linear_inputs, args.api_rows, args.repeat))
+
+    print("=" * 78)
+    print("float32 vs float64 inference")
+    print("=" * 78)
+    for name, r in models.items():
+        print(f"\n{name}")
+        print(f"  {'rows/s':<16}" + "".join(f"{f'batch {rows}':>14}" for rows in args.rows))
+        for dtype in DTYPES:
+            print(f"  {dtype:<16}" + "".join(f"{r['throughput'][dtype][rows]:>14,.0f}" for rows in args.rows))
+        print(f"  {'float32 speed-up':<16}" + "".join(
+            f"{r['throughput']['float32'][rows] / r['throughput']['float64'][rows]:>13.2f}x" for rows in args.rows
+        ))
+        largest = max(args.rows)
+        print(f"  memory at batch {largest}: input {r['input_mb']['float64']:.1f} -> {r['input_mb']['float32']:.1f} MB, "
+              f"peak while scoring {r['peak_mb']['float64']:.1f} -> {r['peak_mb']['float32']:.1f} MB")
+        d = r["drift"]
+        print(f"  drift over {d['rows']:,} rows: max |dp| {d['max_abs']:.2e}, mean |dp| {d['mean_abs']:.2e}, "
+              f"class flips {d['class_flips']}")
+
+    print(f"\n/predict/batch end to end, {args.api_rows} x {args.features}: "
+          + ", ".join(f"{dtype} {ms:.2f} ms" for dtype, ms in api.items())
+          + f" ({api['float64'] / api['float32']:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark: exported LinearScorer vs the sklearn Pipeline it was folded from
+
+Uses the two models of bench_dtype.py (a --features wide StandardScaler +
+LogisticRegression, and the churn baseline Pipeline) and times
+`predict_with_scores` through `make_adapter`, i.e. the call the API makes,
+per batch size:
+
+  pipeline  the fitted sklearn Pipeline (churn: DataFrame input, as the
+            Pipeline needs its string categories)
+  exported  `linear_export.export_linear_pipeline(pipeline)` on encoded
+            feature vectors (category codes), as the API receives them
+
+and the max |dp| between the two over --check-rows random rows.
+
+Run (from sections/05-model-serving/code):
+  python benchmarks/bench_linear_export.py
+  python benchmarks/bench_linear_export.py --rows 1 10 100 --features 100
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_dtype import churn_model, linear_model  # noqa: E402
+from adapters import make_adapter  # noqa: E402
+from linear_export import export_linear_pipeline, verify  # noqa: E402
+
+
+def _us_per_call(adapter, X, min_time_s: float = 0.3) -> float:
+    adapter.predict_with_scores(X)  # warm-up
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time_s:
+        adapter.predict_with_scores(X)
+        calls += 1
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def bench_model(model, inputs, batch_sizes, check_rows: int) -> dict:
+    scorer = export_linear_pipeline(model)
+    pipeline, exported = make_adapter(model), make_adapter(scorer)
+    result = {"pipeline": {}, "exported": {}, "max_abs": verify(model, scorer, check_rows)}
+    for rows in batch_sizes:
+        X = inputs(rows, "float64")
+        result["pipeline"][rows] = _us_per_call(pipeline, X)
+        result["exported"][rows] = _us_per_call(exported, scorer.encode(X) if hasattr(X, "iloc") else X)
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark exported linear scorers against their pipelines.")
+    parser.add_argument("--features", type=int, default=32, help="Width of the linear model")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10_000], help="Batch sizes")
+    parser.add_argument("--check-rows", type=int, default=10_000, help="Random rows compared for equality")
+    args = parser.parse_args()
+
+    models = {
+        f"linear ({args.features} features)": bench_model(*linear_model(args.features), args.rows, args.check_rows),
+        "churn pipeline": bench_model(*churn_model(), args.rows, args.check_rows),
+    }
+
+    print("=" * 78)
+    print("Exported linear scorer vs sklearn Pipeline (us per predict_with_scores call)")
+    print("=" * 78)
+    for name, r in models.items():
+        print(f"\n{name}")
+        print(f"  {'':<12}" + "".join(f"{f'batch {rows}':>14}" for rows in args.rows))
+        for kind in ("pipeline", "exported"):
+            print(f"  {kind:<12}" + "".join(f"{r[kind][rows]:>14,.1f}" for rows in args.rows))
+        print(f"  {'speed-up':<12}" + "".join(
+            f"{r['pipeline'][rows] / r['exported'][rows]:>13.1f}x" for rows in args.rows
+        ))
+        print(f"  max |dp| over {args.check_rows:,} random rows: {r['max_abs']:.2e}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
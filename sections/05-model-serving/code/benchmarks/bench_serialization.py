@@ -0,0 +1,137 @@
+"""
+Benchmark: batch response serialization
+
+Compares the default /predict/batch response path (float boxing +
+BatchPredictionOutput + response_model validation + json.dumps) against
+FAST_JSON_RESPONSES=true (fast_json.encode_batch_output with orjson, and
+with its stdlib fallback), both for serialization alone and end-to-end
+through the ASGI app. Also checks that all paths emit identical JSON.
+
+Run (from sections/05-model-serving/code):
+  python benchmarks/bench_serialization.py
+  python benchmarks/bench_serialization.py --rows 10 100 1000 --repeat 200
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fast_json  # noqa: E402
+import simple_ml_api  # noqa: E402
+from config import settings  # noqa: E402
+from startup import asgi_post  # noqa: E402
+
+TIMESTAMP = "2024-01-01T00:00:00"
+
+
+async def _default_path(field, predictions) -> bytes:
+    output = simple_ml_api.BatchPredictionOutput(
+        predictions=[float(p) for p in predictions],
+        count=len(predictions),
+        model_version="1.0.0",
+        timestamp=TIMESTAMP,
+    )
+    content = await serialize_response(field=field, response_content=output, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def _time_us(fn, repeat: int) -> float:
+    await fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+async def _serialization(rows: int, repeat: int) -> dict:
+    field = next(
+        route.response_field for route in simple_ml_api.app.routes
+        if getattr(route, "path", None) == "/predict/batch"
+    )
+    predictions = np.random.default_rng(0).normal(size=rows)
+    orjson_module = fast_json.orjson
+
+    async def default():
+        return await _default_path(field, predictions)
+
+    async def fast():
+        return fast_json.encode_batch_output(predictions, "1.0.0", TIMESTAMP)
+
+    results = {"default": await _time_us(default, repeat)}
+    reference = await default()
+    encoders = [("orjson", orjson_module)] if orjson_module is not None else []
+    encoders.append(("json", None))
+    for name, module in encoders:
+        fast_json.orjson = module
+        if await fast() != reference:
+            raise AssertionError(f"{name} output differs from the default response")
+        results[name] = await _time_us(fast, repeat)
+    fast_json.orjson = orjson_module
+    return results
+
+
+async def _end_to_end(rows: int, repeat: int) -> dict:
+    body = json.dumps({"instances": np.random.default_rng(0).normal(size=(rows, 4)).tolist()}).encode()
+    results = {}
+    for name, fast in (("default", False), ("fast", True)):
+        simple_ml_api.settings = dataclasses.replace(settings, fast_json_responses=fast)
+        status, _ = await asgi_post(simple_ml_api.app, "/predict/batch", body)
+        assert status == 200, status
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await asgi_post(simple_ml_api.app, "/predict/batch", body)
+        results[name] = (time.perf_counter() - start) / repeat * 1e6
+    simple_ml_api.settings = settings
+    return results
+
+
+async def run(rows_list, repeat: int) -> dict:
+    logging.getLogger().setLevel(logging.WARNING)
+    results = {}
+    async with simple_ml_api.app.router.lifespan_context(simple_ml_api.app):
+        for rows in rows_list:
+            results[rows] = {
+                "serialize": await _serialization(rows, repeat),
+                "end_to_end": await _end_to_end(rows, max(20, repeat // 2)),
+            }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark batch response serialization paths.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000], help="Batch sizes")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed iterations")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.rows, args.repeat))
+
+    encoders = [name for name in results[args.rows[0]]["serialize"] if name != "default"]
+    print("=" * 72)
+    print("Batch response serialization, us per response (outputs verified identical)")
+    print("=" * 72)
+    print(f"{'rows':>6}{'default':>10}" + "".join(f"{name:>10}" for name in encoders)
+          + f"{'speed-up':>10}{'e2e default':>13}{'e2e fast':>10}")
+    for rows, r in results.items():
+        serialize, e2e = r["serialize"], r["end_to_end"]
+        print(
+            f"{rows:>6}{serialize['default']:>10.1f}"
+            + "".join(f"{serialize[name]:>10.1f}" for name in encoders)
+            + f"{serialize['default'] / serialize[encoders[0]]:>9.1f}x"
+            + f"{e2e['default']:>13.1f}{e2e['fast']:>10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
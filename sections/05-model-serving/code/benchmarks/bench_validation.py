@@ -0,0 +1,91 @@
+"""
+Benchmark: request validation cost per payload
+
+Compares VALIDATION_MODE=python (per-element loop + a second np.array
+conversion in the handler) against VALIDATION_MODE=vectorized (one NumPy
+conversion and one finiteness check, array reused by the handler).
+
+Run (from sections/05-model-serving/code):
+  python benchmarks/bench_validation.py
+  python benchmarks/bench_validation.py --rows 1000 --features 100 --repeat 20
+"""
+
+import argparse
+import dataclasses
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import simple_ml_api  # noqa: E402
+from config import settings  # noqa: E402
+
+
+def _payloads(rows: int, features: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    batch = {"instances": rng.normal(size=(rows, features)).tolist()}
+    single = {"features": rng.normal(size=features).tolist()}
+    # Round-trip through JSON text so we measure what the endpoint sees
+    return json.dumps(single), json.dumps(batch)
+
+
+def _time_per_call(fn, repeat: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(rows: int, features: int, repeat: int) -> dict:
+    single_json, batch_json = _payloads(rows, features)
+    results = {}
+
+    for mode in ("python", "vectorized"):
+        # Validators read the module-level settings at call time
+        simple_ml_api.settings = dataclasses.replace(settings, validation_mode=mode)
+
+        def single():
+            simple_ml_api.PredictionInput.model_validate_json(single_json).as_array()
+
+        def batch():
+            simple_ml_api.BatchPredictionInput.model_validate_json(batch_json).as_array()
+
+        results[mode] = {
+            "single_us": _time_per_call(single, repeat * 10) * 1e6,
+            "batch_ms": _time_per_call(batch, repeat) * 1e3,
+        }
+
+    simple_ml_api.settings = settings
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark request validation modes.")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per batch payload")
+    parser.add_argument("--features", type=int, default=100, help="Features per row")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed iterations")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.features, args.repeat)
+
+    print("=" * 60)
+    print(f"Validation + array conversion ({args.rows}x{args.features} batch, "
+          f"{args.features}-feature single)")
+    print("=" * 60)
+    print(f"{'mode':<12}{'single (us)':>16}{'batch (ms)':>16}")
+    for mode, r in results.items():
+        print(f"{mode:<12}{r['single_us']:>16.1f}{r['batch_ms']:>16.2f}")
+
+    before, after = results["python"], results["vectorized"]
+    print(f"\nSpeed-up: single {before['single_us'] / after['single_us']:.1f}x, "
+          f"batch {before['batch_ms'] / after['batch_ms']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
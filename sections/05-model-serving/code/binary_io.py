@@ -0,0 +1,131 @@
+"""
+Binary Batch Payloads (NumPy .npy and Arrow IPC)
+
+JSON encoding of large float matrices costs far more than scoring them.
+These helpers let batch scorers send raw arrays instead:
+
+- application/x-npy:                    NumPy .npy file bytes (2-D numeric).
+                                        Parsed zero-copy: the returned array
+                                        is a view over the request body.
+- application/vnd.apache.arrow.stream:  Arrow IPC stream, one column per
+                                        feature. Needs `pyarrow` (optional).
+
+Responses use the same format: a 1-D float64 .npy array, or an Arrow stream
+with a single `prediction` column.
+"""
+
+import io
+from typing import Optional
+
+import numpy as np
+
+try:  # Optional dependency: only needed for Arrow payloads
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = None
+
+NPY_MEDIA_TYPE = "application/x-npy"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+BINARY_MEDIA_TYPES = (NPY_MEDIA_TYPE, ARROW_MEDIA_TYPE)
+
+
+class UnsupportedMediaType(Exception):
+    """Content type is not a supported binary format (or its library is missing)."""
+
+
+def media_type_of(header_value: Optional[str]) -> str:
+    """Strip parameters from a Content-Type/Accept value: 'a/b; x=y' -> 'a/b'."""
+    return (header_value or "").split(";", 1)[0].strip().lower()
+
+
+def _require_arrow() -> None:
+    if pa is None:
+        raise UnsupportedMediaType(
+            f"{ARROW_MEDIA_TYPE} requires pyarrow (pip install pyarrow)"
+        )
+
+
+# ----------------------------------------------------------------------------
+# Parsing
+# ----------------------------------------------------------------------------
+
+def parse_npy(body: bytes) -> np.ndarray:
+    """Parse .npy bytes into an array that shares memory with `body`."""
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    except ValueError as e:
+        raise ValueError(f"Invalid .npy payload: {e}") from e
+
+    if dtype.hasobject:
+        raise ValueError("Object arrays are not accepted")
+    if dtype.kind not in "fiub":
+        raise ValueError(f"Expected a numeric array, got dtype {dtype}")
+
+    count = int(np.prod(shape))
+    offset = stream.tell()
+    if len(body) - offset < count * dtype.itemsize:
+        raise ValueError("Truncated .npy payload")
+
+    array = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+    return array.reshape(shape, order="F" if fortran_order else "C")
+
+
+def parse_arrow(body: bytes) -> np.ndarray:
+    """Parse an Arrow IPC stream (one numeric column per feature) into a 2-D array."""
+    _require_arrow()
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Invalid Arrow payload: {e}") from e
+
+    if table.num_columns == 0:
+        raise ValueError("Arrow payload has no columns")
+    if any(column.null_count for column in table.columns):
+        raise ValueError("Features cannot contain null values")
+
+    # Arrow is columnar; the model wants rows, so this is the one copy we make
+    columns = [column.to_numpy() for column in table.columns]
+    return np.column_stack(columns)
+
+
+def parse_binary(body: bytes, media_type: str) -> np.ndarray:
+    """Dispatch on media type; raises UnsupportedMediaType or ValueError."""
+    if media_type == NPY_MEDIA_TYPE:
+        return parse_npy(body)
+    if media_type == ARROW_MEDIA_TYPE:
+        return parse_arrow(body)
+    raise UnsupportedMediaType(
+        f"Unsupported content type '{media_type}', expected one of {BINARY_MEDIA_TYPES}"
+    )
+
+
+# ----------------------------------------------------------------------------
+# Serialization
+# ----------------------------------------------------------------------------
+
+def to_npy(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def to_arrow(predictions: np.ndarray) -> bytes:
+    _require_arrow()
+    table = pa.table({"prediction": pa.array(predictions)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def serialize_binary(predictions: np.ndarray, media_type: str) -> bytes:
+    if media_type == ARROW_MEDIA_TYPE:
+        return to_arrow(predictions)
+    if media_type == NPY_MEDIA_TYPE:
+        return to_npy(predictions)
+    raise UnsupportedMediaType(f"Cannot produce '{media_type}'")
@@ -0,0 +1,97 @@
+"""
+Prediction Cache (LRU + TTL)
+
+In-process cache in front of the model for traffic that re-scores the same
+feature vectors within minutes.
+
+- Key: BLAKE2b hash of the raw feature bytes (plus dtype/width) and the
+  model version, so a new model never serves an old model's answers.
+- Eviction: least-recently-used once `max_entries` is reached; entries
+  older than `ttl_s` are treated as misses and dropped.
+- `invalidate()` clears everything (called when the model is reloaded).
+
+Only touched from the event loop thread, so no locking is needed.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class PredictionCache:
+    """LRU cache with per-entry time-to-live."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_s: float = 300.0):
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        if ttl_s <= 0:
+            raise ValueError("ttl_s must be > 0")
+
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(features: np.ndarray, model_version: str) -> bytes:
+        """Hash one feature vector together with the model version."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(model_version.encode())
+        h.update(features.dtype.str.encode())
+        h.update(features.shape[-1].to_bytes(4, "little"))
+        h.update(np.ascontiguousarray(features).tobytes())
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: bytes, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_s, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry (e.g. after a model reload)."""
+        self._entries.clear()
+        self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,185 @@
+"""
+Candidate Model Evaluation on Live Traffic (shadow scoring, canary routing)
+
+A new model version is compared against the served one before it takes over:
+
+- Shadow: a sampled fraction (`sample_rate`) of requests served by the
+  primary model are also scored by the candidate, on a dedicated thread
+  after the primary response is computed. The request never waits for it:
+  `offer` only draws a random number and, when sampled, hands the features
+  to that thread. Per row it records whether the predicted classes agree,
+  the score delta (candidate - primary) and the candidate's latency.
+  At most `max_pending` sampled requests are queued; beyond that samples
+  are dropped (and counted) rather than letting shadow work pile up.
+- Canary: a `canary_weight` fraction of requests is served by the
+  candidate instead. With a routing key (e.g. a customer id) the choice is
+  sticky: a key hashed below the weight stays on the candidate as the
+  weight is raised.
+
+Shadow scoring uses its own thread, never the inference executor, so it takes
+no worker slots or queue capacity from primary traffic (it still shares the
+CPU). Counters are written by one thread each: sampling/routing counts by the
+event loop, comparison results by the shadow thread.
+"""
+
+import logging
+import random
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from metrics import LATENCY_BUCKETS_SECONDS, Histogram
+
+logger = logging.getLogger(__name__)
+
+# |candidate - primary| per row
+SCORE_DELTA_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class CandidateModel:
+    """Second model scored in the shadow of, or instead of, the primary one."""
+
+    def __init__(
+        self,
+        model: Any,
+        version: str,
+        sample_rate: float = 0.0,
+        canary_weight: float = 0.0,
+        max_pending: int = 64,
+        threshold: float = 0.5,
+    ):
+        if max_pending < 1:
+            raise ValueError("max_pending must be >= 1")
+        self.model = model
+        self.version = version
+        self.sample_rate = 0.0
+        self.canary_weight = 0.0
+        self.configure(sample_rate=sample_rate, canary_weight=canary_weight)
+        self.max_pending = max_pending
+        # Class boundary when the primary response carries no classes (batch routes)
+        self.threshold = threshold
+
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self.latency_histogram = Histogram(
+            "shadow_inference_seconds", "Candidate model scoring time on shadow samples",
+            LATENCY_BUCKETS_SECONDS,
+        )
+        self.delta_histogram = Histogram(
+            "shadow_score_delta", "Absolute difference between candidate and primary score per row",
+            SCORE_DELTA_BUCKETS,
+        )
+
+        # Event loop thread
+        self.canary_requests = 0
+        self.primary_requests = 0
+        self.sampled = 0
+        self.dropped = 0
+        # Shadow thread
+        self.finished = 0
+        self.errors = 0
+        self.rows = 0
+        self.agreed_rows = 0
+        self._delta_sum = 0.0
+        self._abs_delta_sum = 0.0
+
+    def configure(self, sample_rate: Optional[float] = None, canary_weight: Optional[float] = None) -> None:
+        """Change the shadow sample rate and/or canary weight (both 0-1)."""
+        for name, value in (("sample_rate", sample_rate), ("canary_weight", canary_weight)):
+            if value is None:
+                continue
+            if not 0.0 <= value <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+            setattr(self, name, value)
+
+    @property
+    def pending(self) -> int:
+        return self.sampled - self.finished
+
+    # ------------------------------------------------------------------
+    # Request path (event loop)
+    # ------------------------------------------------------------------
+
+    def use_canary(self, key: Optional[str] = None) -> bool:
+        """Whether this request is served by the candidate."""
+        weight = self.canary_weight
+        if weight <= 0.0:
+            chosen = False
+        elif key:
+            chosen = zlib.crc32(key.encode()) / 2**32 < weight
+        else:
+            chosen = random.random() < weight
+        if chosen:
+            self.canary_requests += 1
+        else:
+            self.primary_requests += 1
+        return chosen
+
+    def offer(self, features: np.ndarray, predictions: Sequence[float], classes: Optional[Sequence[int]] = None) -> None:
+        """Maybe shadow-score a request the primary model served; never blocks."""
+        if self.sample_rate <= 0.0 or random.random() >= self.sample_rate:
+            return
+        if self.pending >= self.max_pending:
+            self.dropped += 1
+            return
+        self.sampled += 1
+        self._pool.submit(self._evaluate, features, predictions, classes)
+
+    # ------------------------------------------------------------------
+    # Shadow thread
+    # ------------------------------------------------------------------
+
+    def _evaluate(self, features: np.ndarray, predictions: Sequence[float], classes: Optional[Sequence[int]]) -> None:
+        try:
+            started = time.perf_counter()
+            shadow = self.model.predict_with_scores(features)
+            self.latency_histogram.observe(time.perf_counter() - started)
+
+            primary = np.asarray(predictions, dtype=np.float64)
+            delta = np.asarray(shadow.predictions, dtype=np.float64) - primary
+            if classes is not None:
+                agreed = np.asarray(shadow.classes) == np.asarray(classes)
+            else:
+                agreed = (shadow.predictions > self.threshold) == (primary > self.threshold)
+
+            abs_delta = np.abs(delta)
+            self.delta_histogram.observe_many(abs_delta.tolist())
+            self.rows += len(delta)
+            self.agreed_rows += int(agreed.sum())
+            self._delta_sum += float(delta.sum())
+            self._abs_delta_sum += float(abs_delta.sum())
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Shadow scoring failed: %s", e, extra={"route": "shadow"})
+        finally:
+            self.finished += 1
+
+    def stop(self) -> None:
+        """Drop queued shadow work; a running comparison finishes in the background."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self.rows
+        return {
+            "model_version": self.version,
+            "canary": {
+                "weight": self.canary_weight,
+                "canary_requests": self.canary_requests,
+                "primary_requests": self.primary_requests,
+            },
+            "shadow": {
+                "sample_rate": self.sample_rate,
+                "sampled": self.sampled,
+                "dropped": self.dropped,
+                "pending": self.pending,
+                "errors": self.errors,
+                "rows": rows,
+                "agreement_rate": self.agreed_rows / rows if rows else None,
+                "mean_delta": self._delta_sum / rows if rows else None,
+                "mean_abs_delta": self._abs_delta_sum / rows if rows else None,
+                "abs_delta": self.delta_histogram.snapshot(),
+                "latency_seconds": self.latency_histogram.snapshot(),
+            },
+        }
@@ -0,0 +1,215 @@
+"""
+Adaptive Concurrency Limiter with Priorities and Load Shedding
+
+Bounds how many prediction requests run at once, and adapts that bound to
+the latency the server actually delivers (AIMD):
+
+- every request that completes within the latency SLO while the limit was
+  the bottleneck raises the limit by 1/limit (about +1 per limit requests);
+- a request that exceeds the SLO cuts it by `backoff` (at most once per
+  observed service time, so one slow burst is one decrease, not dozens).
+
+Requests over the limit wait in one of two FIFO queues. High priority
+(single rows, small batches) is always served first, and low priority (large
+batches) may only use `low_priority_share` of the limit, so bulk traffic can
+never take the last slots from interactive traffic. /health and other
+endpoints are not limited at all.
+
+Requests are shed instead of queueing past the SLO:
+- 429 on arrival when the predicted queue wait (queue ahead x mean service
+  time / limit) plus the service time already exceeds the SLO, or the
+  queue is full;
+- 503 when a queued request runs out of its wait budget anyway.
+
+Everything runs on the event loop thread, so no locks are needed.
+"""
+
+import asyncio
+import collections
+import time
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+HIGH = "high"
+LOW = "low"
+PRIORITIES = (HIGH, LOW)
+
+
+class RequestShed(Exception):
+    """Request rejected by the limiter; `status_code` is 429 or 503."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit shared by all prediction endpoints."""
+
+    def __init__(
+        self,
+        initial_limit: int = 32,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        slo_s: float = 0.5,
+        backoff: float = 0.9,
+        low_priority_share: float = 0.75,
+        max_queue: int = 1024,
+        retry_after_s: float = 1.0,
+        ewma_alpha: float = 0.1,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0.0 < backoff < 1.0:
+            raise ValueError("backoff must be between 0 and 1")
+        if not 0.0 < low_priority_share <= 1.0:
+            raise ValueError("low_priority_share must be in (0, 1]")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.slo_s = slo_s
+        self.backoff = backoff
+        self.low_priority_share = low_priority_share
+        self.max_queue = max_queue
+        self.retry_after_s = retry_after_s
+        self.ewma_alpha = ewma_alpha
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._service_ewma = 0.0
+        self._last_decrease = 0.0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {p: collections.deque() for p in PRIORITIES}
+        self.admitted = {p: 0 for p in PRIORITIES}
+        self.shed: Dict[Tuple[str, int], int] = {(p, s): 0 for p in PRIORITIES for s in (429, 503)}
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def service_time_s(self) -> float:
+        """Exponentially weighted mean time a request holds its slot."""
+        return self._service_ewma
+
+    def queued(self, priority: Optional[str] = None) -> int:
+        if priority is not None:
+            return len(self._queues[priority])
+        return sum(len(q) for q in self._queues.values())
+
+    def _cap(self, priority: str) -> int:
+        if priority == HIGH:
+            return self.limit
+        return max(1, int(self._limit * self.low_priority_share))
+
+    def _can_admit(self, priority: str) -> bool:
+        return self._in_flight < self._cap(priority)
+
+    def _predicted_wait(self, priority: str) -> float:
+        ahead = len(self._queues[HIGH]) + (len(self._queues[LOW]) if priority == LOW else 0)
+        return (ahead + 1) * self._service_ewma / max(self._cap(priority), 1)
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def _reject(self, priority: str, status_code: int, reason: str) -> RequestShed:
+        self.shed[(priority, status_code)] += 1
+        return RequestShed(status_code, reason, self.retry_after_s)
+
+    async def _acquire(self, priority: str) -> None:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {PRIORITIES}")
+
+        # Fast path: a free slot and nobody of equal or higher priority waiting
+        waiting_ahead = self._queues[HIGH] or (priority == LOW and self._queues[LOW])
+        if self._can_admit(priority) and not waiting_ahead:
+            self._in_flight += 1
+            return
+
+        if self.queued() >= self.max_queue:
+            raise self._reject(priority, 429, "Too many queued requests")
+        budget = self.slo_s - self._service_ewma
+        if self._predicted_wait(priority) > budget:
+            raise self._reject(priority, 429, "Server overloaded: predicted latency exceeds SLO")
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues[priority]
+        queue.append(future)
+        try:
+            await asyncio.wait_for(future, timeout=max(budget, 0.0))
+        except BaseException as e:
+            # Timed out or cancelled just after being handed a slot: give it back
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject(priority, 503, "Server busy: queued past latency SLO") from None
+            raise
+        finally:
+            if future in queue:
+                queue.remove(future)
+
+    def _release_slot(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hand free slots to waiters, high priority first."""
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue and self._can_admit(priority):
+                future = queue.popleft()
+                if not future.done():
+                    self._in_flight += 1
+                    future.set_result(None)
+
+    def _record(self, started: float, admitted: float, saturated: bool) -> None:
+        now = time.perf_counter()
+        latency, service = now - started, now - admitted
+        alpha = self.ewma_alpha
+        self._service_ewma = service if self._service_ewma == 0.0 else (
+            (1 - alpha) * self._service_ewma + alpha * service
+        )
+        if latency > self.slo_s:
+            # One decrease per service time: a burst of late completions
+            # reflects a single overload event
+            if now - self._last_decrease >= self._service_ewma:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                self._last_decrease = now
+        elif saturated:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+    @asynccontextmanager
+    async def slot(self, priority: str = HIGH):
+        """Hold one concurrency slot for the duration of the block, or raise RequestShed."""
+        started = time.perf_counter()
+        await self._acquire(priority)
+        admitted = time.perf_counter()
+        self.admitted[priority] += 1
+        # Only grow the limit when it was actually what held requests back
+        saturated = self._in_flight >= self.limit
+        try:
+            yield
+        finally:
+            self._record(started, admitted, saturated)
+            self._release_slot()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queued": {p: len(q) for p, q in self._queues.items()},
+            "service_time_ms": self._service_ewma * 1e3,
+            "slo_ms": self.slo_s * 1e3,
+            "admitted": dict(self.admitted),
+            "shed": {f"{p}_{s}": n for (p, s), n in self.shed.items()},
+        }
@@ -0,0 +1,192 @@
+"""
+Serving Configuration
+
+Environment-driven settings for the ML prediction API.
+Every knob has a sane default so the demo runs with zero configuration;
+override any of them with environment variables (see README).
+"""
+
+import os
+from dataclasses import dataclass
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.getenv(name, default)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean flag ("1", "true", "yes", "on" are truthy)."""
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    return int(raw) if raw not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    return float(raw) if raw not in (None, "") else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """All tunables for the serving process."""
+
+    # Model artifact (empty = use the built-in MockModel) and its reported version
+    model_path: str = ""
+    model_version: str = "1.0.0"
+    # Memory-map model arrays (uncompressed joblib artifacts only)
+    model_mmap: bool = False
+
+    # Hot reload: poll MODEL_PATH for changes, warm-up batch shape, admin auth
+    # (admin endpoints are disabled without a token), directory admin reloads
+    # may load from (empty = the directory of MODEL_PATH)
+    model_watch: bool = False
+    model_watch_interval_s: float = 5.0
+    reload_warmup_rows: int = 8
+    reload_warmup_features: int = 4
+    admin_token: str = ""
+    model_dir: str = ""
+
+    # Request validation: "vectorized" (one NumPy pass) or "python" (per element)
+    validation_mode: str = "vectorized"
+
+    # Row cap for the binary (.npy / Arrow) batch endpoint
+    binary_batch_max_rows: int = 100_000
+
+    # Streaming NDJSON endpoint: rows scored per model call, longest accepted line
+    stream_chunk_size: int = 1000
+    stream_max_line_bytes: int = 1_048_576
+
+    # Prediction cache (LRU + TTL) for /predict and /predict/batch
+    cache_enabled: bool = False
+    cache_max_entries: int = 10_000
+    cache_ttl_s: float = 300.0
+
+    # Logging: level, "json" or "text" records, sampling rates, async queue bound
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_sample_rates: str = ""
+    log_queue_size: int = 10_000
+
+    # Serialize /predict/batch responses straight from NumPy (orjson when installed)
+    fast_json_responses: bool = False
+
+    # Adaptive concurrency limit (AIMD) and load shedding for prediction endpoints
+    limiter_enabled: bool = True
+    limiter_initial_limit: int = 32
+    limiter_min_limit: int = 1
+    limiter_max_limit: int = 256
+    limiter_slo_ms: float = 500.0
+    limiter_low_priority_share: float = 0.75
+    limiter_small_batch_rows: int = 8
+
+    # Multi-model registry: <dir>/<name>/<version>.pkl, lazily loaded, LRU by memory
+    model_registry_dir: str = ""
+    model_registry_max_mb: float = 1024.0
+
+    # Synthetic /predict + /predict/batch passes sent through the app before it is ready
+    startup_warmup_rounds: int = 3
+
+    # Readiness probe thresholds (0 disables a check); p99/utilization over a sliding window
+    readiness_window_s: float = 30.0
+    readiness_max_queue: int = 32
+    readiness_max_p99_ms: float = 1000.0
+    readiness_max_utilization: float = 0.95
+
+    # float64 or float32: dtype of feature arrays and of linear model parameters
+    inference_dtype: str = "float64"
+
+    # Candidate model compared on live traffic: shadow sampling and canary routing
+    candidate_model_path: str = ""
+    candidate_model_version: str = ""
+    shadow_sample_rate: float = 0.0
+    shadow_max_pending: int = 64
+    canary_weight: float = 0.0
+
+    # Server (python simple_ml_api.py): 1 worker = single uvicorn process, otherwise
+    # pre-fork with 0 workers = one per available CPU; 0 MB = no per-worker memory ceiling
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 1
+    worker_max_memory_mb: float = 0.0
+    worker_memory_check_s: float = 10.0
+    worker_graceful_timeout_s: float = 30.0
+
+    # Micro-batching of concurrent /predict calls
+    microbatch_enabled: bool = True
+    microbatch_max_size: int = 32
+    microbatch_max_wait_ms: float = 2.0
+
+    # Inference executor ("thread" or "process") and its backpressure limits
+    inference_executor: str = "thread"
+    inference_workers: int = min(4, os.cpu_count() or 1)
+    inference_queue_depth: int = 64
+    inference_retry_after_s: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Build settings from environment variables, falling back to defaults."""
+        return cls(
+            model_path=_env_str("MODEL_PATH", cls.model_path),
+            model_version=_env_str("MODEL_VERSION", cls.model_version),
+            model_mmap=_env_bool("MODEL_MMAP", cls.model_mmap),
+            model_watch=_env_bool("MODEL_WATCH", cls.model_watch),
+            model_watch_interval_s=_env_float("MODEL_WATCH_INTERVAL_S", cls.model_watch_interval_s),
+            reload_warmup_rows=_env_int("RELOAD_WARMUP_ROWS", cls.reload_warmup_rows),
+            reload_warmup_features=_env_int("RELOAD_WARMUP_FEATURES", cls.reload_warmup_features),
+            admin_token=_env_str("ADMIN_TOKEN", cls.admin_token),
+            model_dir=_env_str("MODEL_DIR", cls.model_dir),
+            validation_mode=_env_str("VALIDATION_MODE", cls.validation_mode),
+            binary_batch_max_rows=_env_int("BINARY_BATCH_MAX_ROWS", cls.binary_batch_max_rows),
+            stream_chunk_size=_env_int("STREAM_CHUNK_SIZE", cls.stream_chunk_size),
+            stream_max_line_bytes=_env_int("STREAM_MAX_LINE_BYTES", cls.stream_max_line_bytes),
+            cache_enabled=_env_bool("CACHE_ENABLED", cls.cache_enabled),
+            cache_max_entries=_env_int("CACHE_MAX_ENTRIES", cls.cache_max_entries),
+            cache_ttl_s=_env_float("CACHE_TTL_S", cls.cache_ttl_s),
+            log_level=_env_str("LOG_LEVEL", cls.log_level),
+            log_format=_env_str("LOG_FORMAT", cls.log_format),
+            log_sample_rates=_env_str("LOG_SAMPLE_RATES", cls.log_sample_rates),
+            log_queue_size=_env_int("LOG_QUEUE_SIZE", cls.log_queue_size),
+            fast_json_responses=_env_bool("FAST_JSON_RESPONSES", cls.fast_json_responses),
+            limiter_enabled=_env_bool("LIMITER_ENABLED", cls.limiter_enabled),
+            limiter_initial_limit=_env_int("LIMITER_INITIAL_LIMIT", cls.limiter_initial_limit),
+            limiter_min_limit=_env_int("LIMITER_MIN_LIMIT", cls.limiter_min_limit),
+            limiter_max_limit=_env_int("LIMITER_MAX_LIMIT", cls.limiter_max_limit),
+            limiter_slo_ms=_env_float("LIMITER_SLO_MS", cls.limiter_slo_ms),
+            limiter_low_priority_share=_env_float("LIMITER_LOW_PRIORITY_SHARE", cls.limiter_low_priority_share),
+            limiter_small_batch_rows=_env_int("LIMITER_SMALL_BATCH_ROWS", cls.limiter_small_batch_rows),
+            model_registry_dir=_env_str("MODEL_REGISTRY_DIR", cls.model_registry_dir),
+            model_registry_max_mb=_env_float("MODEL_REGISTRY_MAX_MB", cls.model_registry_max_mb),
+            startup_warmup_rounds=_env_int("STARTUP_WARMUP_ROUNDS", cls.startup_warmup_rounds),
+            readiness_window_s=_env_float("READINESS_WINDOW_S", cls.readiness_window_s),
+            readiness_max_queue=_env_int("READINESS_MAX_QUEUE", cls.readiness_max_queue),
+            readiness_max_p99_ms=_env_float("READINESS_MAX_P99_MS", cls.readiness_max_p99_ms),
+            readiness_max_utilization=_env_float("READINESS_MAX_UTILIZATION", cls.readiness_max_utilization),
+            inference_dtype=_env_str("INFERENCE_DTYPE", cls.inference_dtype),
+            candidate_model_path=_env_str("CANDIDATE_MODEL_PATH", cls.candidate_model_path),
+            candidate_model_version=_env_str("CANDIDATE_MODEL_VERSION", cls.candidate_model_version),
+            shadow_sample_rate=_env_float("SHADOW_SAMPLE_RATE", cls.shadow_sample_rate),
+            shadow_max_pending=_env_int("SHADOW_MAX_PENDING", cls.shadow_max_pending),
+            canary_weight=_env_float("CANARY_WEIGHT", cls.canary_weight),
+            server_host=_env_str("HOST", cls.server_host),
+            server_port=_env_int("PORT", cls.server_port),
+            server_workers=_env_int("WORKERS", cls.server_workers),
+            worker_max_memory_mb=_env_float("WORKER_MAX_MEMORY_MB", cls.worker_max_memory_mb),
+            worker_memory_check_s=_env_float("WORKER_MEMORY_CHECK_S", cls.worker_memory_check_s),
+            worker_graceful_timeout_s=_env_float("WORKER_GRACEFUL_TIMEOUT_S", cls.worker_graceful_timeout_s),
+            microbatch_enabled=_env_bool("MICROBATCH_ENABLED", cls.microbatch_enabled),
+            microbatch_max_size=_env_int("MICROBATCH_MAX_SIZE", cls.microbatch_max_size),
+            microbatch_max_wait_ms=_env_float("MICROBATCH_MAX_WAIT_MS", cls.microbatch_max_wait_ms),
+            inference_executor=_env_str("INFERENCE_EXECUTOR", cls.inference_executor),
+            inference_workers=_env_int("INFERENCE_WORKERS", cls.inference_workers),
+            inference_queue_depth=_env_int("INFERENCE_QUEUE_DEPTH", cls.inference_queue_depth),
+            inference_retry_after_s=_env_float("INFERENCE_RETRY_AFTER_S", cls.inference_retry_after_s),
+        )
+
+
+settings = Settings.from_env()
@@ -0,0 +1,305 @@
+"""
+Inference Executor with Backpressure
+
+Runs blocking model calls off the asyncio event loop so /health and other
+cheap endpoints stay responsive while the model is busy.
+
+Modes:
+- "thread":  ThreadPoolExecutor sharing the in-process model. Best for models
+             whose heavy lifting releases the GIL (NumPy/sklearn/XGBoost).
+- "process": ProcessPoolExecutor where every worker preloads its own model
+             copy at start-up. Best for pure-Python models that hold the GIL.
+
+Queue depth is bounded: once `max_workers + max_queue_depth` calls are in
+flight, new calls fail fast with `ExecutorSaturated` (mapped to 503 +
+Retry-After by the API) instead of piling up unbounded latency.
+
+Models are swapped atomically with `swap()`: every call is bound to the model
+generation that was current when it was submitted, so in-flight calls finish
+on the old model and each result is reported with the version that produced it.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from metrics import LATENCY_BUCKETS_SECONDS, Histogram, add_model_time
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the inference queue is full; callers should retry later."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+# ----------------------------------------------------------------------------
+# Process-pool worker side (module level so it can be pickled)
+# ----------------------------------------------------------------------------
+
+_worker_model = None
+
+
+def _init_worker(model_factory: Callable[[], Any]) -> None:
+    """Load the model once per worker process."""
+    global _worker_model
+    _worker_model = model_factory()
+
+
+def _timed(fn: Callable[..., Any], model: Any, *args: Any) -> Tuple[Any, float]:
+    """Run `fn(model, *args)` and measure it where it runs (excludes queueing)."""
+    started = time.perf_counter()
+    result = fn(model, *args)
+    return result, time.perf_counter() - started
+
+
+def _call_in_worker(fn: Callable[..., Any], args: tuple) -> Any:
+    return fn(_worker_model, *args)
+
+
+def _timed_in_worker(fn: Callable[..., Any], args: tuple) -> Tuple[Any, float]:
+    return _timed(fn, _worker_model, *args)
+
+
+# ----------------------------------------------------------------------------
+# Executor
+# ----------------------------------------------------------------------------
+
+class _Generation:
+    """One served model version and, in process mode, the pool preloaded with it."""
+
+    __slots__ = ("model", "version", "pool")
+
+    def __init__(self, model: Any, version: str, pool: Optional[Executor] = None):
+        self.model = model
+        self.version = version
+        self.pool = pool
+
+
+class InferenceExecutor:
+    """
+    Bounded pool for model calls.
+
+    Work functions take the model as their first argument, e.g.
+    `def score(model, X): return model.predict(X)`, so the same function runs
+    unchanged against the shared model (threads) or the worker-local one
+    (processes). For process mode both `fn` and `model_factory` must be
+    importable module-level callables.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_queue_depth: int = 64,
+        retry_after_s: float = 1.0,
+        model_factory: Optional[Callable[[], Any]] = None,
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind '{kind}', expected one of {EXECUTOR_KINDS}")
+        if kind == "process" and model_factory is None:
+            raise ValueError("Process executor needs a model_factory to preload workers")
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        if max_queue_depth < 0:
+            raise ValueError("max_queue_depth must be >= 0")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.retry_after_s = retry_after_s
+        self.model_factory = model_factory
+
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._current: Optional[_Generation] = None
+        # Only touched from the event loop thread, so no lock is needed
+        self._in_flight = 0
+        self._rejected = 0
+        self.inference_histogram = Histogram(
+            "model_inference_seconds",
+            "Time spent inside model calls (excluding executor queueing)",
+            LATENCY_BUCKETS_SECONDS,
+        )
+
+    @property
+    def rejected(self) -> int:
+        return self._rejected
+
+    @property
+    def capacity(self) -> int:
+        """Maximum calls running or queued before requests are rejected."""
+        return self.max_workers + self.max_queue_depth
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """Calls waiting for a free worker."""
+        return max(self._in_flight - self.max_workers, 0)
+
+    @property
+    def model(self) -> Any:
+        return self._current.model if self._current is not None else None
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._current.version if self._current is not None else None
+
+    def _new_process_pool(self, model_factory: Callable[[], Any]) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_factory,),
+        )
+
+    def start(self, model: Any = None, version: str = "") -> None:
+        """Create the pool. `model` is shared by thread workers."""
+        if self.kind == "process":
+            self._current = _Generation(model, version, self._new_process_pool(self.model_factory))
+        else:
+            self._threads = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference"
+            )
+            self._current = _Generation(model, version, self._threads)
+        logger.info(
+            f"Inference executor started ({self.kind}, workers={self.max_workers}, "
+            f"queue_depth={self.max_queue_depth})"
+        )
+
+    def shutdown(self) -> None:
+        if self._current is not None:
+            self._current.pool.shutdown(wait=True, cancel_futures=True)
+            if self._threads is not None and self._threads is not self._current.pool:
+                # Process mode: helper threads used by run_on()
+                self._threads.shutdown(wait=True, cancel_futures=True)
+            self._current = None
+            self._threads = None
+            logger.info("Inference executor stopped")
+
+    async def swap(
+        self,
+        model: Any,
+        version: str,
+        model_factory: Optional[Callable[[], Any]] = None,
+        warmup: Optional[Tuple[Callable[..., Any], tuple]] = None,
+    ) -> None:
+        """
+        Warm up a new model generation, then make it current atomically.
+
+        `warmup` is `(fn, args)` run against the new model before the swap;
+        in process mode it runs once per worker so every worker has loaded
+        the model. Calls already submitted keep running on the old generation.
+        """
+        if self._current is None:
+            raise RuntimeError("Inference executor is not running")
+
+        if self.kind == "process":
+            if model_factory is None:
+                raise ValueError("Process executor needs a model_factory to swap models")
+            generation = _Generation(model, version, self._new_process_pool(model_factory))
+        else:
+            generation = _Generation(model, version, self._threads)
+
+        if warmup is not None:
+            fn, args = warmup
+            try:
+                await self._warm(generation, fn, args)
+            except BaseException:
+                if self.kind == "process":
+                    generation.pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+        previous, self._current = self._current, generation
+        if self.kind == "process":
+            # Already-submitted calls still complete on the old workers
+            previous.pool.shutdown(wait=False)
+        if model_factory is not None:
+            self.model_factory = model_factory
+        logger.info(f"Inference executor swapped model {previous.version} -> {version}")
+
+    async def _warm(self, generation: _Generation, fn: Callable[..., Any], args: tuple) -> None:
+        loop = asyncio.get_running_loop()
+        if self.kind == "process":
+            # One call per worker: each process pays its own first-call costs
+            await asyncio.gather(*[
+                loop.run_in_executor(generation.pool, _call_in_worker, fn, args)
+                for _ in range(self.max_workers)
+            ])
+        else:
+            await loop.run_in_executor(generation.pool, fn, generation.model, *args)
+
+    async def warmup(self, fn: Callable[..., Any], *args: Any) -> None:
+        """Run `fn(model, *args)` against the current model, once per worker in process mode."""
+        if self._current is None:
+            raise RuntimeError("Inference executor is not running")
+        await self._warm(self._current, fn, args)
+
+    async def _submit(self, pool: Executor, call: Callable[..., Tuple[Any, float]], *args: Any) -> Any:
+        """Apply backpressure, run a timed call in `pool`, record model time."""
+        if self._in_flight >= self.capacity:
+            self._rejected += 1
+            raise ExecutorSaturated(self.retry_after_s)
+
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            result, elapsed = await loop.run_in_executor(pool, call, *args)
+            self.inference_histogram.observe(elapsed)
+            add_model_time(elapsed)
+            return result
+        finally:
+            self._in_flight -= 1
+
+    async def run_versioned(self, fn: Callable[..., Any], *args: Any) -> Tuple[Any, str]:
+        """Run `fn(model, *args)`; return (result, version of the model used)."""
+        generation = self._current
+        if generation is None:
+            raise RuntimeError("Inference executor is not running")
+        if self.kind == "process":
+            result = await self._submit(generation.pool, _timed_in_worker, fn, args)
+        else:
+            result = await self._submit(generation.pool, _timed, fn, generation.model, *args)
+        return result, generation.version
+
+    async def run_on(self, model: Any, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `fn(model, *args)` for a model other than the served generation
+        (e.g. one from the model registry), under the same backpressure.
+
+        Always runs on a thread in this process: in process mode the workers
+        only hold the primary model, so a helper thread pool is used.
+        """
+        if self._current is None:
+            raise RuntimeError("Inference executor is not running")
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference-local"
+            )
+        return await self._submit(self._threads, _timed, fn, model, *args)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(model, *args)` in the pool, or raise ExecutorSaturated."""
+        result, _ = await self.run_versioned(fn, *args)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "model_version": self.version,
+            "max_workers": self.max_workers,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self._in_flight,
+            "rejected": self._rejected,
+        }
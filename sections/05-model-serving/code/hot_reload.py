@@ -0,0 +1,120 @@
+"""
+Hot Model Reload Helpers
+
+A reload loads the new joblib artifact off the event loop, warms it up with
+a synthetic batch, then swaps it in atomically (see InferenceExecutor.swap).
+Requests already running finish on the old model; new requests use the new one.
+
+Triggers:
+- POST /admin/reload (explicit, optionally with a new path/version)
+- ModelFileWatcher: polls the artifact's mtime and reloads when it changes
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def derive_version(model, path: str) -> str:
+    """Model's own `version` attribute, else '<file stem>@<mtime>'."""
+    version = getattr(getattr(model, "model", model), "version", None)
+    if version:
+        return str(version)
+    mtime = datetime.fromtimestamp(os.stat(path).st_mtime)
+    return f"{Path(path).stem}@{mtime:%Y%m%d%H%M%S}"
+
+
+def resolve_model_path(path: str, root: str) -> str:
+    """
+    Absolute path of an artifact that must live under `root`.
+
+    Artifacts are unpickled, i.e. they can run code: a path from a request is
+    only accepted inside the models directory. '..' components are rejected
+    outright; anything else (absolute paths, symlinks) is checked after
+    resolving. Relative paths resolve against the working directory, as
+    joblib.load would.
+    """
+    if ".." in Path(path).parts:
+        raise ValueError("model_path must not contain '..'")
+    base = Path(root).resolve()
+    resolved = Path(path).resolve()
+    if not resolved.is_relative_to(base):
+        raise ValueError(f"model_path must be inside the models directory ({root})")
+    return str(resolved)
+
+
+def warmup_batch(model, rows: int, default_features: int) -> np.ndarray:
+    """Synthetic batch shaped like the model's expected input."""
+    n_features = getattr(getattr(model, "model", model), "n_features_in_", None) or default_features
+    return np.zeros((rows, int(n_features)))
+
+
+def skip_warmup(model, error: Exception) -> None:
+    """
+    Log and swallow a failed synthetic warm-up for models fitted on named
+    columns; re-raise it for any other model.
+
+    Such pipelines get a DataFrame (see ModelAdapter._prepare) whose columns
+    may be categorical, which an all-zeros batch cannot represent. The model
+    is served unwarmed rather than blocking the reload.
+    """
+    if getattr(getattr(model, "model", model), "feature_names_in_", None) is None:
+        raise error
+    logger.warning(f"Warm-up skipped: the synthetic batch does not fit the model's columns ({error})")
+
+
+class ModelFileWatcher:
+    """Poll a model artifact and call `on_change(path)` when its mtime changes."""
+
+    def __init__(
+        self,
+        path: str,
+        on_change: Callable[[str], Awaitable[object]],
+        interval_s: float = 5.0,
+    ):
+        self.path = path
+        self.on_change = on_change
+        self.interval_s = interval_s
+        self._last_mtime = self._mtime()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="model-file-watcher")
+            logger.info(f"Watching {self.path} for model changes (every {self.interval_s:g}s)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            mtime = self._mtime()
+            # Missing file (mid-copy) or unchanged: nothing to do
+            if mtime is None or mtime == self._last_mtime:
+                continue
+            try:
+                await self.on_change(self.path)
+            except Exception as e:  # keep serving the old model, retry next poll
+                logger.error(f"Model reload from {self.path} failed: {e}")
+                continue
+            self._last_mtime = mtime
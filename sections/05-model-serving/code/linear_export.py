@@ -0,0 +1,430 @@
+"""
+Linear Pipeline Export: sklearn Pipeline -> NumPy Scorer
+
+A fitted binary `LogisticRegression` behind `StandardScaler` and
+`OneHotEncoder` steps (e.g. the churn baseline in
+sections/03-data-science-fundamentals/labs/baseline_model/solution.py) is
+one affine function of its inputs:
+
+    logit = intercept + sum_i w_i * (x_i - mean_i) / scale_i   (numeric)
+                      + sum_j table_j[category of x_j]          (categorical)
+
+`export_linear_pipeline` folds the scaler statistics into one weight per
+numeric input column and the one-hot weights into a per-column lookup table,
+and returns a `LinearScorer`: a plain object holding a few NumPy arrays whose
+`predict_with_scores` is one matrix-vector product plus a table gather. It
+skips DataFrame construction, input validation and the per-step transforms,
+which dominate sklearn's cost for small inputs.
+
+Supported steps: Pipeline, ColumnTransformer (incl. "passthrough"/"drop"),
+StandardScaler, OneHotEncoder (any `drop`, `handle_unknown="ignore"`), ending
+in a binary LogisticRegression. Anything else raises ValueError.
+
+Inputs, one value per column the pipeline was fitted on (`feature_names`):
+- numeric columns: the raw value;
+- categorical columns with string categories: the category's index in
+  `categories[name]` (what a JSON feature vector can carry);
+- categorical columns with numeric categories: the raw value.
+Unknown categories contribute nothing, as with handle_unknown="ignore".
+A DataFrame with the original columns (strings included) is accepted too.
+
+Export (the scorer is verified against the pipeline before it is written):
+  python linear_export.py models/churn_pipeline.pkl models/churn_linear.pkl
+  MODEL_PATH=models/churn_linear.pkl uvicorn simple_ml_api:app
+"""
+
+import argparse
+import math
+import sys
+import warnings
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from adapters import ScoredBatch
+
+# Affine terms produced by preprocessing, one per feature seen by the next step:
+#   ("num", column, a, c)          -> a * x[column] + c
+#   ("cat", column, category, a, c) -> a * (x[column] == category) + c
+Term = Tuple
+
+
+class LinearScorer:
+    """Folded binary logistic regression over raw (numeric/categorical) columns."""
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        coef: np.ndarray,
+        intercept: float,
+        categories: Dict[int, np.ndarray],
+        tables: Dict[int, np.ndarray],
+        classes: np.ndarray,
+        version: Optional[str] = None,
+    ):
+        self.feature_names = list(feature_names)
+        self.n_features_in_ = len(self.feature_names)
+        # Zero for categorical columns: they are scored through `table_`
+        self.coef_ = np.asarray(coef, dtype=np.float64)
+        self.intercept_ = float(intercept)
+        self.classes_ = np.asarray(classes)
+        self.version = version
+
+        self.categorical_columns = np.array(sorted(categories), dtype=np.intp)
+        self.categories = {self.feature_names[c]: categories[c] for c in self.categorical_columns}
+        # All tables in one flat array, plus a trailing 0.0 for unknown categories
+        sizes = [len(tables[c]) for c in self.categorical_columns]
+        self.table_ = np.concatenate([tables[c] for c in self.categorical_columns] + [np.zeros(1)])
+        self._offsets = np.cumsum([0] + sizes[:-1]).astype(np.intp)
+        self._sizes = np.array(sizes, dtype=np.intp)
+        self._unknown = len(self.table_) - 1
+        # Columns whose categories are numbers are matched by value, the rest by code
+        self._by_value = np.array(
+            [categories[c].dtype.kind in "iuf" for c in self.categorical_columns], dtype=bool
+        )
+        # Single rows are scored with Python floats: a NumPy call costs more
+        # than the whole dot product at this size
+        self._row_weights = [(int(c), float(self.coef_[c])) for c in np.flatnonzero(self.coef_)]
+        self._row_tables = [
+            (int(c), {
+                (float(value) if by_value else float(k)): float(weight)
+                for k, (value, weight) in enumerate(zip(categories[c].tolist(), tables[c]))
+            })
+            for c, by_value in zip(self.categorical_columns, self._by_value)
+        ]
+
+    # ------------------------------------------------------------------
+    # Input encoding
+    # ------------------------------------------------------------------
+
+    def _codes_from_frame(self, X) -> np.ndarray:
+        codes = np.empty((len(X), len(self.categorical_columns)), dtype=np.intp)
+        for j, column in enumerate(self.categorical_columns):
+            lookup = {value: k for k, value in enumerate(self.categories[self.feature_names[column]].tolist())}
+            codes[:, j] = [lookup.get(value, -1) for value in X.iloc[:, column].tolist()]
+        return codes
+
+    def _codes_from_array(self, X: np.ndarray) -> np.ndarray:
+        raw = X[:, self.categorical_columns]
+        with np.errstate(invalid="ignore"):  # NaN / inf codes
+            codes = raw.astype(np.intp)
+        # Non-integral codes are unknown
+        codes[raw != codes] = -1
+        for j in np.flatnonzero(self._by_value):
+            values = self.categories[self.feature_names[self.categorical_columns[j]]].astype(np.float64)
+            position = np.searchsorted(values, raw[:, j]).clip(0, len(values) - 1)
+            codes[:, j] = np.where(values[position] == raw[:, j], position, -1)
+        return codes
+
+    def encode(self, X) -> np.ndarray:
+        """DataFrame with the original columns -> feature vectors the API accepts."""
+        numeric, codes = self._numeric(X)
+        if codes is not None:
+            for j, column in enumerate(self.categorical_columns):
+                if self._by_value[j]:
+                    values = self.categories[self.feature_names[column]].astype(np.float64)
+                    numeric[:, column] = np.where(codes[:, j] >= 0, values[codes[:, j]], np.nan)
+                else:
+                    numeric[:, column] = np.where(codes[:, j] >= 0, codes[:, j], np.nan)
+        return numeric
+
+    def _matrix(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features ({', '.join(self.feature_names)}), got {X.shape[1]}")
+        return X
+
+    def _numeric(self, X) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """(numeric matrix with categorical columns zeroed out, category codes)."""
+        if hasattr(X, "iloc"):
+            # Only columns with a weight are read: others may hold anything (ids, text)
+            numeric = np.zeros((len(X), self.n_features_in_))
+            for column in np.flatnonzero(self.coef_):
+                numeric[:, column] = X.iloc[:, column].to_numpy(dtype=np.float64)
+            codes = self._codes_from_frame(X) if len(self.categorical_columns) else None
+            return numeric, codes
+        X = self._matrix(X)
+        if not len(self.categorical_columns):
+            return X, None
+        return X, self._codes_from_array(X)
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def decision_function(self, X) -> np.ndarray:
+        numeric, codes = self._numeric(X)
+        # coef_ is zero on categorical columns, so codes in them add nothing here
+        logit = numeric @ self.coef_ + self.intercept_
+        if codes is not None:
+            known = (codes >= 0) & (codes < self._sizes)
+            logit += self.table_[np.where(known, codes + self._offsets, self._unknown)].sum(axis=1)
+        return logit
+
+    def _row_logit(self, row: List[float]) -> float:
+        logit = self.intercept_
+        for column, weight in self._row_weights:
+            logit += weight * row[column]
+        for column, table in self._row_tables:
+            # Unknown (or non-integral) codes contribute nothing
+            logit += table.get(row[column], 0.0)
+        return logit
+
+    def predict_proba(self, X) -> np.ndarray:
+        positive = self._sigmoid(self.decision_function(X))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[(self.decision_function(X) > 0).astype(np.intp)]
+
+    def predict_with_scores(self, X) -> ScoredBatch:
+        """Same outputs as ClassifierAdapter on the original pipeline."""
+        if not hasattr(X, "iloc"):
+            X = self._matrix(X)
+            if len(X) == 1:
+                return self._score_row(X[0].tolist())
+        logit = self.decision_function(X)
+        positive = self._sigmoid(logit)
+        best = (logit > 0).astype(np.intp)
+        return ScoredBatch(
+            predictions=positive,
+            classes=self.classes_[best].astype(int, copy=False),
+            confidences=np.where(best == 1, positive, 1.0 - positive),
+        )
+
+    def _score_row(self, row: List[float]) -> ScoredBatch:
+        logit = self._row_logit(row)
+        # exp overflows past ~709: the probability is 0.0 there anyway
+        positive = 1.0 / (1.0 + math.exp(-logit)) if logit > -700.0 else 0.0
+        best = int(logit > 0)
+        return ScoredBatch(
+            predictions=np.array([positive]),
+            classes=np.array([int(self.classes_[best])]),
+            confidences=np.array([positive if best else 1.0 - positive]),
+        )
+
+    @staticmethod
+    def _sigmoid(logit: np.ndarray) -> np.ndarray:
+        # Same formula as scipy.special.expit (used by sklearn); exp overflow -> 0.0
+        with np.errstate(over="ignore"):
+            return 1.0 / (1.0 + np.exp(-logit))
+
+
+# ============================================================================
+# Folding
+# ============================================================================
+
+def _column_indices(columns, input_names: Optional[List[str]], n_inputs: int) -> List[int]:
+    if isinstance(columns, slice):
+        return list(range(n_inputs))[columns]
+    columns = np.atleast_1d(columns)
+    if columns.dtype == bool:
+        return list(np.flatnonzero(columns))
+    if columns.dtype.kind in "iu":
+        return [int(c) for c in columns]
+    if input_names is None:
+        raise ValueError("Column names need a transformer fitted on a DataFrame")
+    return [input_names.index(name) for name in columns]
+
+
+def _standard_scaler(step, terms: List[Term]) -> List[Term]:
+    mean = step.mean_ if step.with_mean else np.zeros(len(terms))
+    scale = step.scale_ if step.with_std else np.ones(len(terms))
+    out = []
+    for term, m, s in zip(terms, mean, scale):
+        # a * (old) + c  with  old = a0 * x + c0
+        a, c = 1.0 / s, -m / s
+        out.append(term[:-2] + (term[-2] * a, term[-1] * a + c))
+    return out
+
+
+def _one_hot_encoder(step, terms: List[Term]) -> List[Term]:
+    if getattr(step, "_infrequent_enabled", False):
+        raise ValueError("OneHotEncoder with infrequent categories is not supported")
+    drop_idx = getattr(step, "drop_idx_", None)
+    out = []
+    for j, (term, categories) in enumerate(zip(terms, step.categories_)):
+        if term[0] != "num" or term[2:] != (1.0, 0.0):
+            raise ValueError("OneHotEncoder must be applied to raw input columns")
+        dropped = drop_idx[j] if drop_idx is not None else None
+        for k in range(len(categories)):
+            if dropped is None or k != dropped:
+                out.append(("cat", term[1], k, 1.0, 0.0))
+    return out
+
+
+def _transform_terms(step, terms: List[Term], input_names: Optional[List[str]]) -> List[Term]:
+    """Terms after `step`, given the terms of its input features."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    if step == "passthrough" or step is None:
+        return terms
+    if isinstance(step, Pipeline):
+        for _, inner in step.steps:
+            terms = _transform_terms(inner, terms, input_names)
+        return terms
+    if isinstance(step, StandardScaler):
+        return _standard_scaler(step, terms)
+    if isinstance(step, OneHotEncoder):
+        return _one_hot_encoder(step, terms)
+    if isinstance(step, ColumnTransformer):
+        names = list(getattr(step, "feature_names_in_", input_names or [])) or None
+        out = []
+        for _, transformer, columns in step.transformers_:
+            if transformer == "drop":
+                continue
+            indices = _column_indices(columns, names, len(terms))
+            if not indices:
+                continue
+            out.extend(_transform_terms(transformer, [terms[i] for i in indices], names))
+        return out
+    raise ValueError(f"Cannot fold {type(step).__name__} into a linear scorer")
+
+
+def export_linear_pipeline(pipeline: Any, version: Optional[str] = None) -> LinearScorer:
+    """Fold a fitted preprocessing + binary LogisticRegression pipeline into a LinearScorer."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    steps = pipeline.steps if isinstance(pipeline, Pipeline) else [("model", pipeline)]
+    classifier = steps[-1][1]
+    if not isinstance(classifier, LogisticRegression):
+        raise ValueError(f"Last step must be LogisticRegression, got {type(classifier).__name__}")
+    if len(classifier.classes_) != 2:
+        raise ValueError("Only binary LogisticRegression can be exported")
+
+    names = getattr(pipeline, "feature_names_in_", None)
+    input_names = [str(n) for n in names] if names is not None else None
+    n_inputs = int(pipeline.n_features_in_ if hasattr(pipeline, "n_features_in_") else classifier.n_features_in_)
+    terms: List[Term] = [("num", i, 1.0, 0.0) for i in range(n_inputs)]
+    for _, step in steps[:-1]:
+        terms = _transform_terms(step, terms, input_names)
+
+    weights = classifier.coef_[0]
+    if len(terms) != len(weights):
+        raise ValueError(f"Folded {len(terms)} features but the model has {len(weights)} coefficients")
+
+    coef = np.zeros(n_inputs)
+    intercept = float(classifier.intercept_[0])
+    tables: Dict[int, np.ndarray] = {}
+    categories: Dict[int, np.ndarray] = {}
+    encoders = _encoder_categories(pipeline)
+    for term, w in zip(terms, weights):
+        if term[0] == "num":
+            _, column, a, c = term
+            coef[column] += w * a
+        else:
+            _, column, k, a, c = term
+            if column not in tables:
+                categories[column] = encoders[column]
+                tables[column] = np.zeros(len(categories[column]))
+            tables[column][k] += w * a
+        intercept += w * c
+
+    if set(tables) & set(np.flatnonzero(coef)):
+        raise ValueError("A column is used both as numeric and categorical input")
+    feature_names = input_names or [f"x{i}" for i in range(n_inputs)]
+    return LinearScorer(feature_names, coef, intercept, categories, tables, classifier.classes_, version)
+
+
+def _encoder_categories(pipeline: Any) -> Dict[int, np.ndarray]:
+    """Input column index -> categories, for every OneHotEncoder in the pipeline."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+
+    found: Dict[int, np.ndarray] = {}
+    names = list(getattr(pipeline, "feature_names_in_", []))
+    for _, step in getattr(pipeline, "steps", []):
+        if isinstance(step, ColumnTransformer):
+            for _, transformer, columns in step.transformers_:
+                if isinstance(transformer, OneHotEncoder):
+                    indices = _column_indices(columns, names or None, step.n_features_in_)
+                    for index, cats in zip(indices, transformer.categories_):
+                        found[index] = np.asarray(cats)
+        elif isinstance(step, OneHotEncoder):
+            for index, cats in enumerate(step.categories_):
+                found[index] = np.asarray(cats)
+    return found
+
+
+# ============================================================================
+# Verification
+# ============================================================================
+
+def sample_frame(scorer: LinearScorer, rows: int = 1000, seed: int = 0):
+    """Random DataFrame in the pipeline's input format (known and unknown categories)."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i, name in enumerate(scorer.feature_names):
+        if name in scorer.categories:
+            cats = scorer.categories[name]
+            values = cats[rng.integers(0, len(cats), size=rows)].astype(object)
+            # A few unseen categories: scored as "ignore"
+            values[rng.random(rows) < 0.05] = "__unknown__" if cats.dtype.kind not in "iuf" else -12345
+            columns[name] = values
+        else:
+            columns[name] = rng.normal(scale=max(abs(scorer.coef_[i]), 1.0) * 10, size=rows)
+    return pd.DataFrame(columns)
+
+
+def verify(pipeline: Any, scorer: LinearScorer, rows: int = 1000, atol: float = 1e-9) -> float:
+    """
+    Max |p_pipeline - p_scorer| over random inputs; raises AssertionError above `atol`.
+
+    Covers every input path: DataFrame, encoded batch and single encoded rows.
+    """
+    frame = sample_frame(scorer, rows)
+    X = frame if hasattr(pipeline, "feature_names_in_") else frame.to_numpy(dtype=np.float64)
+    with warnings.catch_warnings():
+        # The sample includes unknown categories on purpose
+        warnings.simplefilter("ignore", UserWarning)
+        expected = pipeline.predict_proba(X)[:, 1]
+    encoded = scorer.encode(frame)
+    error = max(
+        float(np.abs(expected - scorer.predict_with_scores(frame).predictions).max()),
+        float(np.abs(expected - scorer.predict_with_scores(encoded).predictions).max()),
+        max(abs(p - scorer.predict_with_scores(row).predictions[0]) for p, row in zip(expected[:200], encoded)),
+    )
+    if error > atol:
+        raise AssertionError(f"Exported scorer differs from the pipeline by {error:.3g} (> {atol:g})")
+    return error
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export a linear sklearn pipeline as a NumPy scorer.")
+    parser.add_argument("pipeline", type=Path, help="joblib artifact of the fitted Pipeline")
+    parser.add_argument("output", type=Path, help="Where to save the LinearScorer (joblib)")
+    parser.add_argument("--version", default=None, help="Version reported by the API")
+    args = parser.parse_args()
+
+    import joblib
+
+    pipeline = joblib.load(args.pipeline)
+    scorer = export_linear_pipeline(pipeline, version=args.version)
+    error = verify(pipeline, scorer)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(scorer, args.output)
+
+    print(f"Exported {args.pipeline} -> {args.output}")
+    print(f"  inputs:  {', '.join(scorer.feature_names)}")
+    unused = [name for i, name in enumerate(scorer.feature_names)
+              if scorer.coef_[i] == 0 and name not in scorer.categories]
+    if unused:
+        print(f"  unused:  {', '.join(unused)} (any value)")
+    for name, cats in scorer.categories.items():
+        print(f"  {name}: {', '.join(f'{k}={v}' for k, v in enumerate(cats.tolist()))}")
+    print(f"  max |p - p_pipeline| on random inputs: {error:.2e}")
+    return 0
+
+
+if __name__ == "__main__":
+    # Pickle must reference linear_export.LinearScorer, not __main__.LinearScorer
+    import linear_export
+    sys.exit(linear_export.main())
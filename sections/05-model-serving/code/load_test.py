@@ -0,0 +1,426 @@
+"""
+Load Testing Harness for the ML Prediction API
+
+Concurrent load generator built on asyncio streams with a pool of keep-alive
+HTTP/1.1 connections (no client library, so the generator itself is cheap
+enough to saturate the server and not the other way around).
+
+Modes:
+- closed: `--concurrency` virtual users, each sends its next request as soon
+          as the previous one returns. Measures capacity.
+- open:   requests arrive at a fixed `--rate` regardless of how fast the
+          server answers. Latency is measured from the scheduled arrival
+          time, so queueing behind a slow server is counted
+          (no coordinated omission).
+
+Reports p50/p90/p99/p99.9 latency, throughput and error rate overall and per
+request kind, and can export them as JSON for regression comparison.
+
+Run (from sections/05-model-serving/code):
+  python load_test.py --launch --mode closed --concurrency 32 --duration 10
+  python load_test.py --mode open --rate 2000 --mix predict=0.9,batch=0.1 --output run.json
+  python load_test.py --mode closed --baseline run.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+# ============================================================================
+# Payloads
+# ============================================================================
+
+@dataclass(frozen=True)
+class RequestKind:
+    """One entry of the payload mix: a pre-encoded request and its weight."""
+    name: str
+    path: str
+    body: bytes
+    weight: float
+
+
+def build_mix(spec: str, features: int = 4, batch_size: int = 32, seed: int = 0) -> List[RequestKind]:
+    """
+    Parse "predict=0.9,batch=0.1" into request kinds with pre-encoded bodies.
+
+    Kinds: `predict` (one row to /predict) and `batch` (`batch_size` rows to
+    /predict/batch). Bodies are encoded once so the generator spends no time
+    on JSON during the run.
+    """
+    rng = np.random.default_rng(seed)
+    bodies = {
+        "predict": ("/predict", {"features": rng.normal(size=features).round(4).tolist()}),
+        "batch": ("/predict/batch", {"instances": rng.normal(size=(batch_size, features)).round(4).tolist()}),
+    }
+    mix = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = entry.partition("=")
+        if name not in bodies:
+            raise ValueError(f"Unknown request kind '{name}', expected one of {sorted(bodies)}")
+        path, payload = bodies[name]
+        mix.append(RequestKind(name, path, json.dumps(payload).encode(), float(weight or 1.0)))
+    if not mix:
+        raise ValueError("Payload mix is empty")
+    return mix
+
+
+# ============================================================================
+# Keep-alive HTTP/1.1 connection pool
+# ============================================================================
+
+class HttpConnection:
+    """Minimal HTTP/1.1 client connection (Content-Length and chunked responses)."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        sock = self.writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def post(self, path: str, body: bytes) -> Tuple[int, bytes]:
+        """POST a JSON body; returns (status, response body)."""
+        if self.writer is None:
+            await self.connect()
+        head = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode()
+        self.writer.write(head + body)
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split(b" ", 2)[1])
+
+        headers: Dict[bytes, bytes] = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get(b"transfer-encoding", b"").lower() == b"chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            payload = b"".join(chunks)
+        else:
+            payload = await self.reader.readexactly(int(headers.get(b"content-length", b"0")))
+
+        if headers.get(b"connection", b"").lower() == b"close":
+            self.close()
+        return status, payload
+
+
+class ConnectionPool:
+    """Bounded pool of keep-alive connections, reused LIFO."""
+
+    def __init__(self, url: str, size: int):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self._idle: asyncio.LifoQueue = asyncio.LifoQueue()
+        for _ in range(size):
+            self._idle.put_nowait(HttpConnection(self.host, self.port))
+
+    async def post(self, path: str, body: bytes, timeout_s: float) -> Tuple[int, bytes]:
+        conn = await self._idle.get()
+        try:
+            return await asyncio.wait_for(conn.post(path, body), timeout_s)
+        except BaseException:
+            # The response may be half-read: never reuse this socket
+            conn.close()
+            raise
+        finally:
+            self._idle.put_nowait(conn)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+# ============================================================================
+# Load generation
+# ============================================================================
+
+@dataclass
+class LoadTestConfig:
+    """Everything that defines a run (exported with the report)."""
+    url: str = "http://localhost:8000"
+    mode: str = "closed"            # "closed" or "open"
+    duration_s: float = 10.0
+    warmup_s: float = 1.0
+    concurrency: int = 16           # closed loop: virtual users
+    rate: float = 500.0             # open loop: arrivals per second
+    connections: int = 64           # keep-alive pool size (open loop)
+    mix: str = "predict=1"
+    features: int = 4
+    batch_size: int = 32
+    timeout_s: float = 10.0
+    seed: int = 0
+
+
+@dataclass
+class Sample:
+    kind: str
+    latency_s: float
+    status: int                     # 0 = connection error / timeout
+    error: str = ""
+
+
+@dataclass
+class _Run:
+    samples: List[Sample] = field(default_factory=list)
+    measuring: bool = False
+
+
+async def _issue(pool: ConnectionPool, kind: RequestKind, run: _Run, started: float, timeout_s: float) -> None:
+    try:
+        status, _ = await pool.post(kind.path, kind.body, timeout_s)
+        error = ""
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+        status, error = 0, type(e).__name__
+    if run.measuring:
+        run.samples.append(Sample(kind.name, time.perf_counter() - started, status, error))
+
+
+async def _closed_loop(config: LoadTestConfig, pool: ConnectionPool, mix: List[RequestKind], run: _Run, stop_at: float) -> None:
+    weights = [kind.weight for kind in mix]
+
+    async def user(seed: int) -> None:
+        rng = random.Random(seed)
+        while time.perf_counter() < stop_at:
+            kind = rng.choices(mix, weights)[0]
+            await _issue(pool, kind, run, time.perf_counter(), config.timeout_s)
+
+    await asyncio.gather(*[user(config.seed + i) for i in range(config.concurrency)])
+
+
+async def _open_loop(config: LoadTestConfig, pool: ConnectionPool, mix: List[RequestKind], run: _Run, stop_at: float) -> None:
+    rng = random.Random(config.seed)
+    weights = [kind.weight for kind in mix]
+    interval = 1.0 / config.rate
+    pending = set()
+    next_arrival = time.perf_counter()
+
+    while next_arrival < stop_at:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind = rng.choices(mix, weights)[0]
+        # Latency counts from the scheduled arrival, including time spent
+        # waiting for a free connection when the server falls behind
+        task = asyncio.create_task(_issue(pool, kind, run, next_arrival, config.timeout_s))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        next_arrival += interval
+
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def run_load_test(config: LoadTestConfig) -> Dict[str, object]:
+    """Run one load test and return its report (see `summarize`)."""
+    if config.mode not in ("closed", "open"):
+        raise ValueError(f"Unknown mode '{config.mode}', expected 'closed' or 'open'")
+    mix = build_mix(config.mix, config.features, config.batch_size, config.seed)
+    pool_size = config.concurrency if config.mode == "closed" else config.connections
+    pool = ConnectionPool(config.url, pool_size)
+    loop_fn = _closed_loop if config.mode == "closed" else _open_loop
+    run = _Run()
+
+    try:
+        if config.warmup_s > 0:
+            await loop_fn(config, pool, mix, run, time.perf_counter() + config.warmup_s)
+        run.measuring = True
+        started = time.perf_counter()
+        await loop_fn(config, pool, mix, run, started + config.duration_s)
+        elapsed = time.perf_counter() - started
+    finally:
+        pool.close()
+
+    return summarize(run.samples, elapsed, config)
+
+
+# ============================================================================
+# Reporting
+# ============================================================================
+
+def _stats(samples: List[Sample], elapsed_s: float) -> Dict[str, object]:
+    latencies = np.array([s.latency_s for s in samples if s.status == 200]) * 1e3
+    errors = sum(1 for s in samples if s.status != 200)
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        key = str(s.status) if s.status else (s.error or "connection_error")
+        statuses[key] = statuses.get(key, 0) + 1
+
+    stats: Dict[str, object] = {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "throughput_rps": (len(samples) - errors) / elapsed_s if elapsed_s > 0 else 0.0,
+        "statuses": statuses,
+    }
+    if latencies.size:
+        stats["latency_ms"] = {
+            "mean": float(latencies.mean()),
+            "max": float(latencies.max()),
+            **{f"p{p:g}": float(v) for p, v in zip(PERCENTILES, np.percentile(latencies, PERCENTILES))},
+        }
+    return stats
+
+
+def summarize(samples: List[Sample], elapsed_s: float, config: LoadTestConfig) -> Dict[str, object]:
+    """Overall and per-kind statistics (latencies of successful requests only)."""
+    kinds = sorted({s.kind for s in samples})
+    return {
+        "config": asdict(config),
+        "elapsed_s": elapsed_s,
+        "overall": _stats(samples, elapsed_s),
+        "by_kind": {kind: _stats([s for s in samples if s.kind == kind], elapsed_s) for kind in kinds},
+    }
+
+
+def print_report(report: Dict[str, object], baseline: Optional[Dict[str, object]] = None) -> None:
+    config = report["config"]
+    load = f"concurrency={config['concurrency']}" if config["mode"] == "closed" else f"rate={config['rate']:g}/s"
+    print(f"\n{config['mode']}-loop, {load}, mix={config['mix']}, {report['elapsed_s']:.1f}s")
+    header = f"{'kind':<10} {'requests':>9} {'rps':>9} {'errors':>7} " + " ".join(
+        f"{'p' + format(p, 'g'):>8}" for p in PERCENTILES
+    )
+    print(header + "   (latency ms)")
+    print("-" * len(header))
+    rows = [("overall", report["overall"])] + list(report["by_kind"].items())
+    for name, stats in rows:
+        latency = stats.get("latency_ms", {})
+        print(
+            f"{name:<10} {stats['requests']:>9} {stats['throughput_rps']:>9.1f} {stats['error_rate']:>7.2%} "
+            + " ".join(f"{latency.get('p' + format(p, 'g'), float('nan')):>8.2f}" for p in PERCENTILES)
+        )
+
+    if baseline is not None:
+        print("\nvs. baseline:")
+        for metric in ("throughput_rps", "error_rate"):
+            old, new = baseline["overall"][metric], report["overall"][metric]
+            print(f"  {metric:<15} {old:>10.3f} -> {new:>10.3f}" + (f"  ({(new - old) / old:+.1%})" if old else ""))
+        for p in PERCENTILES:
+            key = f"p{p:g}"
+            old = baseline["overall"].get("latency_ms", {}).get(key)
+            new = report["overall"].get("latency_ms", {}).get(key)
+            if old and new:
+                print(f"  {key + ' ms':<15} {old:>10.2f} -> {new:>10.2f}  ({(new - old) / old:+.1%})")
+
+
+# ============================================================================
+# Local server
+# ============================================================================
+
+def launch_local_app(port: int, env: Optional[Dict[str, str]] = None, timeout_s: float = 30.0) -> subprocess.Popen:
+    """Start simple_ml_api under uvicorn on 127.0.0.1:`port` and wait for /health."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "simple_ml_api:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=Path(__file__).resolve().parent,
+        env={**os.environ, **(env or {})},
+    )
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited during start-up (code {process.returncode})")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                return process
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"API did not become healthy within {timeout_s:.0f}s")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    defaults = LoadTestConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=defaults.url)
+    parser.add_argument("--launch", action="store_true", help="start the API locally on a free port")
+    parser.add_argument("--mode", choices=("closed", "open"), default=defaults.mode)
+    parser.add_argument("--duration", type=float, default=defaults.duration_s, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=defaults.warmup_s, help="unmeasured seconds first")
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--rate", type=float, default=defaults.rate)
+    parser.add_argument("--connections", type=int, default=defaults.connections)
+    parser.add_argument("--mix", default=defaults.mix, help='e.g. "predict=0.9,batch=0.1"')
+    parser.add_argument("--features", type=int, default=defaults.features)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--timeout", type=float, default=defaults.timeout_s)
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--baseline", type=Path, help="JSON report to compare against")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if args.launch:
+        port = _free_port()
+        server = launch_local_app(port)
+        url = f"http://127.0.0.1:{port}"
+
+    config = LoadTestConfig(
+        url=url, mode=args.mode, duration_s=args.duration, warmup_s=args.warmup,
+        concurrency=args.concurrency, rate=args.rate, connections=args.connections,
+        mix=args.mix, features=args.features, batch_size=args.batch_size, timeout_s=args.timeout,
+    )
+    try:
+        report = asyncio.run(run_load_test(config))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_report(report, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Lightweight Metrics Primitives
+
+In-process counters, gauges and histograms with Prometheus text exposition.
+No external service or client library required.
+
+Updates are lock-free: every thread writes to its own shard (plain Python
+lists keyed by thread id), and shards are only summed when /metrics is
+scraped. The hot path is a dict lookup plus a list increment.
+"""
+
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Default bucket layouts (upper bounds, inclusive)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+LATENCY_BUCKETS_SECONDS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+ROW_COUNT_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+LOAD_BUCKETS_SECONDS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Sharded:
+    """Per-thread slots of `size` numbers, summed on read."""
+
+    def __init__(self, size: int):
+        self._size = size
+        self._shards: Dict[int, List[float]] = {}
+
+    def _shard(self) -> List[float]:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            # Only this thread ever writes this key; dict assignment is atomic
+            shard = self._shards[ident] = [0] * self._size
+        return shard
+
+    def totals(self) -> List[float]:
+        totals = [0] * self._size
+        for shard in list(self._shards.values()):
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+# ----------------------------------------------------------------------------
+# Metric children (one label combination each)
+# ----------------------------------------------------------------------------
+
+class _CounterChild(_Sharded):
+    """Value built from per-thread increments, or read from a callback."""
+
+    def __init__(self):
+        super().__init__(1)
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1) -> None:
+        self._shard()[0] += amount
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Read the value from `fn` at scrape time (for counts kept elsewhere)."""
+        self._function = fn
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self.totals()[0]
+
+
+class _GaugeChild(_CounterChild):
+    """Counter child that may also go down."""
+
+    def dec(self, amount: float = 1) -> None:
+        self._shard()[0] -= amount
+
+
+class _HistogramChild(_Sharded):
+    """Bucket counts, then sum, then count in one shard per thread."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        # len(buckets) + 1 for +Inf, then sum and count
+        super().__init__(len(buckets) + 3)
+        self.buckets = buckets
+        self._n = len(buckets) + 1
+
+    def observe(self, value: float) -> None:
+        shard = self._shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[self._n] += value
+        shard[self._n + 1] += 1
+
+    def observe_many(self, values: Iterable[float]) -> None:
+        shard = self._shard()
+        buckets = self.buckets
+        count = 0
+        total = 0.0
+        for value in values:
+            shard[bisect_left(buckets, value)] += 1
+            total += value
+            count += 1
+        shard[self._n] += total
+        shard[self._n + 1] += count
+
+    @property
+    def count(self) -> int:
+        return int(self.totals()[self._n + 1])
+
+    @property
+    def sum(self) -> float:
+        return self.totals()[self._n]
+
+    def cumulative_counts(self) -> Dict[str, int]:
+        """Cumulative counts keyed by upper bound, ending with '+Inf'."""
+        totals = self.totals()
+        out: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip(self.buckets, totals):
+            running += count
+            out[f"{bound:g}"] = int(running)
+        out["+Inf"] = int(running + totals[self._n - 1])
+        return out
+
+
+# ----------------------------------------------------------------------------
+# Metric families
+# ----------------------------------------------------------------------------
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        # Unlabelled metrics behave like their single child
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Child for one label combination (created on first use)."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def children(self) -> Iterable[Tuple[Tuple[str, ...], object]]:
+        return list(self._children.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in self.children():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        labels = _format_labels(self.labelnames, values)
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._default.set_function(fn)
+
+    @property
+    def value(self) -> float:
+        return self._default.value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (or is read from a callback)."""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default.dec(amount)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._default.set_function(fn)
+
+    @property
+    def value(self) -> float:
+        return self._default.value
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram (Prometheus semantics: cumulative `le` buckets).
+
+    `observe` is O(log buckets) and allocation-free.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = (),
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, description, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+        self._default.observe(value)
+
+    def observe_many(self, values: Iterable[float]) -> None:
+        """Record several observations with one shard lookup."""
+        self._default.observe_many(values)
+
+    @property
+    def count(self) -> int:
+        return self._default.count
+
+    @property
+    def sum(self) -> float:
+        return self._default.sum
+
+    def cumulative_counts(self) -> Dict[str, int]:
+        return self._default.cumulative_counts()
+
+    def snapshot(self) -> Dict[str, object]:
+        """JSON-friendly view of the (unlabelled) histogram."""
+        count, total = self.count, self.sum
+        return {
+            "description": self.description,
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "buckets": self.cumulative_counts(),
+        }
+
+    def _render_child(self, values, child) -> List[str]:
+        lines = []
+        for bound, count in child.cumulative_counts().items():
+            labels = _format_labels(self.labelnames, values, f'le="{bound}"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+# ----------------------------------------------------------------------------
+# Registry
+# ----------------------------------------------------------------------------
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Registry:
+    """Collection of metrics rendered together in text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str) -> None:
+        self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide default registry served on /metrics
+REGISTRY = Registry()
+
+
+# ----------------------------------------------------------------------------
+# Per-request model time (for the model vs. everything-else breakdown)
+# ----------------------------------------------------------------------------
+
+# Set to a one-element list by the HTTP metrics middleware for each request
+REQUEST_MODEL_TIME: ContextVar[Optional[List[float]]] = ContextVar("request_model_time", default=None)
+
+
+def add_model_time(seconds: float) -> None:
+    """Attribute model time to the current request (no-op outside a request)."""
+    slot = REQUEST_MODEL_TIME.get()
+    if slot is not None:
+        slot[0] += seconds
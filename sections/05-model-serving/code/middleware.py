@@ -0,0 +1,93 @@
+"""
+ASGI Middleware
+
+Pure ASGI (no BaseHTTPMiddleware) so the per-request overhead is a couple of
+function calls and no extra task or response buffering.
+"""
+
+import time
+
+from metrics import (
+    LATENCY_BUCKETS_SECONDS,
+    REGISTRY,
+    REQUEST_MODEL_TIME,
+    Counter,
+    Gauge,
+    Histogram,
+)
+from startup import WARMUP_SCOPE_KEY
+
+
+# Registered once per process, shared by every app instance
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route, method and status",
+    ("route", "method", "status"),
+))
+HTTP_ERRORS = REGISTRY.register(Counter(
+    "http_request_errors_total", "HTTP responses with status >= 400",
+    ("route", "status"),
+))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "End-to-end request latency",
+    LATENCY_BUCKETS_SECONDS, ("route",),
+))
+HTTP_NON_MODEL = REGISTRY.register(Histogram(
+    "http_request_non_model_seconds",
+    "Request latency outside model calls (parsing, validation, serialization)",
+    LATENCY_BUCKETS_SECONDS, ("route",),
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests currently being served",
+))
+
+
+def route_label(scope) -> str:
+    """Route template (e.g. '/predict/batch'), never the raw path, to bound cardinality."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records per-route latency, status codes, errors and in-flight requests.
+
+    Latency is split into model time (reported by the inference executor via
+    `add_model_time`) and everything else: parsing, validation, queueing for
+    a micro-batch and response serialization.
+
+    Start-up warm-up requests (scope flag `WARMUP_SCOPE_KEY`) are not recorded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get(WARMUP_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        model_time = [0.0]
+        token = REQUEST_MODEL_TIME.set(model_time)
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            REQUEST_MODEL_TIME.reset(token)
+
+            route = route_label(scope)
+            HTTP_REQUESTS.labels(route, scope["method"], status).inc()
+            HTTP_LATENCY.labels(route).observe(elapsed)
+            HTTP_NON_MODEL.labels(route).observe(max(elapsed - model_time[0], 0.0))
+            if status >= 400:
+                HTTP_ERRORS.labels(route, status).inc()
@@ -0,0 +1,253 @@
+"""
+Multi-Model Registry (lazy loading, memory-bounded LRU)
+
+Serves many models from one process, e.g. one churn model per customer
+segment. Artifacts are joblib files written by `shared/utils.py::save_model`
+in a directory laid out as:
+
+    <root>/<name>/<version>.pkl        (or .joblib)
+
+- Lazy: a model is loaded the first time it is requested.
+- Single-flight: concurrent first requests for the same model share one
+  load instead of each unpickling it.
+- Bounded: resident models are kept in LRU order; once their estimated
+  memory exceeds `max_bytes`, least-recently-used models are evicted.
+  A model that alone exceeds the budget is still served (and is the next
+  one evicted).
+
+Only touched from the event loop thread; loads run in a worker thread.
+"""
+
+import asyncio
+import logging
+import re
+import sys
+import time
+import types
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_SUFFIXES = (".pkl", ".joblib")
+
+# Names and versions become path components: no separators or '..'
+_SAFE_COMPONENT = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+# Shared by every model (classes, code, modules): not part of a model's footprint
+_NOT_MODEL_STATE = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.MethodType, type(None),
+)
+
+
+class ModelNotFound(LookupError):
+    """No artifact for the requested model name/version."""
+
+
+def model_nbytes(obj: Any, _seen: Optional[Dict[int, Any]] = None) -> int:
+    """
+    Rough resident size of a model object graph in bytes.
+
+    Counts NumPy buffers at their full size (memory-mapped arrays included,
+    as they occupy page cache) plus shallow sizes of containers and objects.
+    """
+    # id -> object: keeps temporaries (e.g. __getstate__ dicts) alive so
+    # their ids are not reused by later objects during the walk
+    seen = {} if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+
+    if isinstance(obj, np.ndarray):
+        # Views share their base's buffer: count it once
+        if isinstance(obj.base, np.ndarray):
+            return model_nbytes(obj.base, seen)
+        # getsizeof includes the buffer only when the array owns it
+        return sys.getsizeof(obj) if obj.flags.owndata else sys.getsizeof(obj) + obj.nbytes
+    if isinstance(obj, _NOT_MODEL_STATE):
+        return 0
+    if isinstance(obj, (str, bytes, int, float, bool)):
+        return sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        items = list(obj.keys()) + list(obj.values())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = list(obj)
+    else:
+        state = getattr(obj, "__dict__", None)
+        if state is None and hasattr(obj, "__getstate__"):
+            # Extension types (e.g. sklearn's Cython Tree) expose arrays here
+            try:
+                state = obj.__getstate__()
+            except Exception:
+                state = None
+        items = list(state.values()) if isinstance(state, dict) else []
+    return size + sum(model_nbytes(item, seen) for item in items)
+
+
+class _Entry:
+    __slots__ = ("model", "nbytes", "path", "load_seconds", "loaded_at", "last_used", "hits")
+
+    def __init__(self, model: Any, nbytes: int, path: Path, load_seconds: float):
+        self.model = model
+        self.nbytes = nbytes
+        self.path = path
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.hits = 0
+
+
+class ModelRegistry:
+    """Lazily loaded, memory-bounded LRU of models keyed by (name, version)."""
+
+    def __init__(
+        self,
+        root: str,
+        loader: Callable[[str], Any],
+        max_bytes: int = 1 << 30,
+        on_load: Optional[Callable[[str, float], None]] = None,
+    ):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1")
+        self.root = Path(root)
+        self.loader = loader
+        self.max_bytes = max_bytes
+        # Called with (name, seconds) after each load, e.g. to feed a histogram
+        self.on_load = on_load
+
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._loading: Dict[Tuple[str, str], "asyncio.Task[Any]"] = {}
+        self.resident_bytes = 0
+
+        self.hits = 0
+        self.loads = 0
+        self.load_failures = 0
+        self.evictions = 0
+        self.deduplicated = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def artifact_path(self, name: str, version: str) -> Path:
+        """Resolve `<root>/<name>/<version>.<suffix>`, or raise ModelNotFound."""
+        if not (_SAFE_COMPONENT.match(name) and _SAFE_COMPONENT.match(version)):
+            raise ModelNotFound(f"Invalid model name or version: {name}/{version}")
+        for suffix in ARTIFACT_SUFFIXES:
+            path = self.root / name / f"{version}{suffix}"
+            if path.is_file():
+                return path
+        raise ModelNotFound(f"Model {name}/{version} not found in {self.root}")
+
+    def available(self) -> Dict[str, List[str]]:
+        """Model names and versions present on disk."""
+        models: Dict[str, List[str]] = {}
+        if not self.root.is_dir():
+            return models
+        for model_dir in sorted(p for p in self.root.iterdir() if p.is_dir()):
+            versions = sorted(
+                p.stem for p in model_dir.iterdir() if p.suffix in ARTIFACT_SUFFIXES and p.is_file()
+            )
+            if versions:
+                models[model_dir.name] = versions
+        return models
+
+    async def get(self, name: str, version: str) -> Any:
+        """Resident model for name/version, loading it on first use."""
+        key = (name, version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            entry.last_used = time.time()
+            entry.hits += 1
+            self.hits += 1
+            return entry.model
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            # Someone is already loading it: wait for that load
+            self.deduplicated += 1
+        else:
+            path = self.artifact_path(name, version)
+            # The load is its own task: a cancelled caller (client disconnect)
+            # neither aborts it nor hands CancelledError to the other waiters
+            pending = asyncio.create_task(self._load(key, path), name=f"registry-load-{name}/{version}")
+            # Every waiter may be gone by the time it fails: mark it retrieved
+            pending.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self._loading[key] = pending
+        return await asyncio.shield(pending)
+
+    async def _load(self, key: Tuple[str, str], path: Path) -> Any:
+        name, version = key
+        try:
+            started = time.perf_counter()
+            model = await asyncio.to_thread(self.loader, str(path))
+            nbytes = await asyncio.to_thread(model_nbytes, model)
+            entry = _Entry(model, nbytes, path, time.perf_counter() - started)
+        except BaseException:
+            self.load_failures += 1
+            raise
+        finally:
+            del self._loading[key]
+
+        self.loads += 1
+        self._entries[key] = entry
+        self.resident_bytes += entry.nbytes
+        self._evict(keep=key)
+        if self.on_load is not None:
+            self.on_load(name, entry.load_seconds)
+        logger.info(
+            f"Registry loaded {name}/{version} in {entry.load_seconds:.3f}s "
+            f"({entry.nbytes / 1e6:.1f} MB, {len(self._entries)} resident)"
+        )
+        return entry.model
+
+    def _evict(self, keep: Tuple[str, str]) -> None:
+        while self.resident_bytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self.resident_bytes -= entry.nbytes
+            self.evictions += 1
+            logger.info(f"Registry evicted {key[0]}/{key[1]} ({entry.nbytes / 1e6:.1f} MB)")
+
+    def evict(self, name: str, version: str) -> bool:
+        """Drop a resident model; returns False if it was not loaded."""
+        entry = self._entries.pop((name, version), None)
+        if entry is None:
+            return False
+        self.resident_bytes -= entry.nbytes
+        self.evictions += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "root": str(self.root),
+            "max_bytes": self.max_bytes,
+            "resident_bytes": self.resident_bytes,
+            "resident": [
+                {
+                    "name": name,
+                    "version": version,
+                    "bytes": entry.nbytes,
+                    "load_seconds": entry.load_seconds,
+                    "hits": entry.hits,
+                    "idle_seconds": time.time() - entry.last_used,
+                }
+                # Most recently used first
+                for (name, version), entry in reversed(self._entries.items())
+            ],
+            "loading": [f"{name}/{version}" for name, version in self._loading],
+            "hits": self.hits,
+            "loads": self.loads,
+            "load_failures": self.load_failures,
+            "evictions": self.evictions,
+            "deduplicated_loads": self.deduplicated,
+        }
@@ -0,0 +1,360 @@
+"""
+Pre-fork Production Server
+
+`uvicorn --workers N` starts N independent processes, each importing the
+stack and unpickling its own model. Here one master process does both once,
+then forks the workers:
+
+- shared memory: workers start from the master's pages copy-on-write. The
+  model's NumPy buffers are never written, so they stay shared; the pod
+  pays for one copy. `gc.freeze()` before forking keeps the collector from
+  touching (and so copying) the preloaded objects.
+- worker count: one per CPU this container may use, i.e. the affinity mask
+  capped by the cgroup CPU quota (v2 `cpu.max`, v1 `cpu.cfs_quota_us`),
+  not the host's core count (WORKERS=0). Set WORKERS=N for a fixed count.
+- supervision: crashed workers are replaced; a worker whose private memory
+  (pages it no longer shares: Private_Clean + Private_Dirty in smaps_rollup)
+  exceeds WORKER_MAX_MEMORY_MB is replaced by a fresh fork, and the old
+  one is stopped gracefully (SIGTERM: finish in-flight requests) once the
+  replacement is running.
+
+All workers accept on one listening socket bound by the master.
+Each worker runs its own lifespan (executor, warm-up, readiness), so /metrics
+and the /metrics/* endpoints report on the worker that answered.
+
+Signals to the master: SIGTERM/SIGINT stop all workers gracefully, SIGHUP
+replaces them one by one (e.g. to return memory after a traffic spike).
+
+`python simple_ml_api.py` only uses this server when WORKERS is not 1 and
+os.fork exists; `python prefork.py` always does.
+
+Run (Linux):
+  WORKERS=0 python prefork.py
+  WORKERS=4 WORKER_MAX_MEMORY_MB=1500 MODEL_PATH=models/model.pkl python prefork.py
+"""
+
+import gc
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any, Dict, Optional
+
+import uvicorn
+
+from async_logging import stop_logging
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Exit status of a worker whose app failed to start (e.g. warm-up error):
+# forking more of them would fail the same way, so the master gives up
+WORKER_BOOT_ERROR = 3
+
+# A worker that dies sooner than this after its fork is respawned with backoff
+MIN_UPTIME_S = 5.0
+MAX_RESPAWN_DELAY_S = 30.0
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPU limit of this cgroup in cores, or None when unlimited."""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1: quota -1 means unlimited
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask, capped by the cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not Linux
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        # A 1.5-core quota still runs two workers at 75% each
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def private_memory_mb(pid: int) -> float:
+    """Memory only this process holds (not shared with the master or siblings), in MB."""
+    try:
+        fields = {}
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[1].isdigit():
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+        return (fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024
+    except OSError:
+        # No smaps_rollup (old kernels): RSS overstates it but still bounds growth
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class PreforkServer:
+    """Master process: binds, preloads, forks and supervises uvicorn workers."""
+
+    def __init__(
+        self,
+        api: Any,
+        workers: int = 0,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        max_memory_mb: float = 0.0,
+        memory_check_s: float = 10.0,
+        graceful_timeout_s: float = 30.0,
+    ):
+        # `api`: the simple_ml_api module (app + preload_model)
+        self.api = api
+        self.workers = workers or available_cpus()
+        self.host = host
+        self.port = port
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_s = memory_check_s
+        self.graceful_timeout_s = graceful_timeout_s
+
+        self._socket: Optional[socket.socket] = None
+        # pid -> fork time of serving workers; pid -> kill deadline of retiring ones
+        self._workers: Dict[int, float] = {}
+        self._retiring: Dict[int, float] = {}
+        self._stopping = False
+        self._replace_all = False
+        self._respawn_delay = 0.0
+        self.restarts = 0
+        self.memory_restarts = 0
+
+    # ------------------------------------------------------------------
+    # Master
+    # ------------------------------------------------------------------
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            os._exit(self._run_worker())
+        self._workers[pid] = time.monotonic()
+        logger.info(f"Started worker {pid} ({len(self._workers)}/{self.workers})")
+        return pid
+
+    def _retire(self, pid: int, reason: str) -> None:
+        """Replace a worker: fork its successor first, then stop it gracefully."""
+        self._workers.pop(pid, None)
+        self._spawn()
+        logger.warning(f"Retiring worker {pid}: {reason}")
+        self._signal(pid, signal.SIGTERM)
+        self._retiring[pid] = time.monotonic() + self.graceful_timeout_s
+
+    @staticmethod
+    def _signal(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self) -> bool:
+        """Collect exited workers and replace unexpected exits; False on a boot error."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return True
+            if pid == 0:
+                return True
+            code = os.waitstatus_to_exitcode(status)
+            if self._retiring.pop(pid, None) is not None:
+                logger.info(f"Worker {pid} stopped (exit {code})")
+                continue
+            started = self._workers.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            if code == WORKER_BOOT_ERROR:
+                logger.error(f"Worker {pid} failed to start the app; stopping")
+                return False
+
+            # Crash loop protection: back off while workers keep dying young
+            uptime = time.monotonic() - started
+            if uptime < MIN_UPTIME_S:
+                self._respawn_delay = min(max(2 * self._respawn_delay, 0.5), MAX_RESPAWN_DELAY_S)
+            else:
+                self._respawn_delay = 0.0
+            logger.error(f"Worker {pid} exited with {code} after {uptime:.1f}s; restarting")
+            time.sleep(self._respawn_delay)
+            self.restarts += 1
+            self._spawn()
+
+    def _check_memory(self) -> None:
+        for pid in list(self._workers):
+            try:
+                used = private_memory_mb(pid)
+            except OSError:
+                continue  # exited; reaped on the next pass
+            if used > self.max_memory_mb:
+                self.memory_restarts += 1
+                self._retire(pid, f"private memory {used:.0f} MB > {self.max_memory_mb:g} MB")
+
+    def _on_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _on_hup(self, signum, frame) -> None:
+        self._replace_all = True
+
+    def run(self) -> int:
+        """Serve until SIGTERM/SIGINT; returns the process exit status."""
+        self._socket = self._bind()
+        started = time.perf_counter()
+        self.api.preload_model()
+        # Preloaded objects move to a permanent generation the collector never scans
+        gc.collect()
+        gc.freeze()
+        logger.info(
+            f"Master {os.getpid()} preloaded the model in {time.perf_counter() - started:.2f}s; "
+            f"forking {self.workers} workers on {self.host}:{self.port} "
+            f"({available_cpus()} CPUs available)"
+        )
+
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_hup)
+        for _ in range(self.workers):
+            self._spawn()
+
+        status = 0
+        next_memory_check = time.monotonic() + self.memory_check_s
+        while not self._stopping:
+            if not self._reap():
+                status = 1
+                break
+            now = time.monotonic()
+            if self._replace_all:
+                self._replace_all = False
+                for pid in list(self._workers):
+                    self._retire(pid, "SIGHUP")
+            if self.max_memory_mb > 0 and now >= next_memory_check:
+                self._check_memory()
+                next_memory_check = now + self.memory_check_s
+            for pid, deadline in list(self._retiring.items()):
+                if now > deadline:
+                    logger.warning(f"Worker {pid} did not stop within {self.graceful_timeout_s:g}s; killing")
+                    self._signal(pid, signal.SIGKILL)
+            time.sleep(0.2)
+
+        self._shutdown()
+        return status
+
+    def _shutdown(self) -> None:
+        self._stopping = True
+        pids = list(self._workers) + list(self._retiring)
+        logger.info(f"Stopping {len(pids)} workers")
+        for pid in pids:
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout_s
+        for pid in pids:
+            while True:
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if done:
+                    break
+                if time.monotonic() > deadline:
+                    self._signal(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    break
+                time.sleep(0.1)
+        self._workers.clear()
+        self._retiring.clear()
+        self._socket.close()
+
+    # ------------------------------------------------------------------
+    # Worker (runs in the forked child)
+    # ------------------------------------------------------------------
+
+    def _run_worker(self) -> int:
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+        # uvicorn handles SIGTERM/SIGINT while serving, then re-raises the
+        # signal with this handler: exit cleanly so the logs below get flushed
+        signal.signal(signal.SIGTERM, _exit_worker)
+        signal.signal(signal.SIGINT, _exit_worker)
+        try:
+            _limit_native_threads()
+            config = uvicorn.Config(
+                self.api.app,
+                # Root logging is already configured (async_logging); keep it
+                log_config=None,
+                # Per-request records come from the handlers, sampled per route
+                access_log=False,
+                timeout_graceful_shutdown=self.graceful_timeout_s,
+            )
+            server = uvicorn.Server(config)
+            server.run(sockets=[self._socket])
+            return 0 if server.started else WORKER_BOOT_ERROR
+        except SystemExit:
+            return 0
+        except BaseException as e:
+            logger.error(f"Worker {os.getpid()} crashed: {e!r}")
+            return 1
+        finally:
+            # os._exit skips atexit: flush this worker's queued log records
+            stop_logging()
+
+
+def _exit_worker(signum, frame) -> None:
+    raise SystemExit(0)
+
+
+def _limit_native_threads() -> None:
+    """One BLAS/OpenMP thread per worker unless configured: the workers are the parallelism."""
+    if "OMP_NUM_THREADS" in os.environ:
+        return
+    try:
+        from threadpoolctl import threadpool_limits  # installed with scikit-learn
+    except ImportError:
+        return
+    threadpool_limits(1)
+
+
+def serve(api: Any) -> int:
+    """Run `api.app` under a PreforkServer configured from settings."""
+    return PreforkServer(
+        api,
+        workers=settings.server_workers,
+        host=settings.server_host,
+        port=settings.server_port,
+        max_memory_mb=settings.worker_max_memory_mb,
+        memory_check_s=settings.worker_memory_check_s,
+        graceful_timeout_s=settings.worker_graceful_timeout_s,
+    ).run()
+
+
+if __name__ == "__main__":
+    import simple_ml_api
+
+    sys.exit(serve(simple_ml_api))
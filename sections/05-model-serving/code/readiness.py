@@ -0,0 +1,105 @@
+"""
+Readiness Signals from Cumulative Metrics
+
+Kubernetes should stop routing to a replica whose inference path is
+saturated, even though the process is healthy. The signals come from metrics
+that are already recorded, so readiness adds nothing to the request path:
+
+- p99 latency: bucket deltas of a latency histogram over the last
+  `window_s` seconds, interpolated within the bucket (as Prometheus
+  `histogram_quantile` does);
+- utilization: model busy time over the window divided by
+  window x workers, i.e. the fraction of worker capacity spent in model calls.
+
+Snapshots are taken when the probe asks (at most one per `min_interval_s`),
+so no background task is needed; with a probe every few seconds the window
+holds a handful of snapshots. Only touched from the event loop thread.
+"""
+
+import collections
+import time
+from typing import Callable, Deque, List, Optional, Tuple
+
+from metrics import Histogram
+
+
+class ReadinessMonitor:
+    """Recent p99 latency and worker utilization over a sliding window."""
+
+    def __init__(
+        self,
+        latency: Histogram,
+        busy_seconds: Callable[[], float],
+        workers: int,
+        route_filter: Callable[[str], bool] = lambda route: True,
+        window_s: float = 30.0,
+        min_interval_s: float = 1.0,
+        min_requests: int = 20,
+    ):
+        if window_s <= 0:
+            raise ValueError("window_s must be > 0")
+        self.latency = latency
+        self.busy_seconds = busy_seconds
+        self.workers = workers
+        self.route_filter = route_filter
+        self.window_s = window_s
+        self.min_interval_s = min_interval_s
+        # Fewer requests than this in the window: p99 is just the max, not reported
+        self.min_requests = min_requests
+        # (time, per-bucket counts incl. +Inf, busy seconds), oldest first
+        self._snapshots: Deque[Tuple[float, List[float], float]] = collections.deque()
+        self._snapshots.append(self._snapshot())
+
+    def _bucket_counts(self) -> List[float]:
+        n = len(self.latency.buckets) + 1
+        counts = [0.0] * n
+        for labels, child in self.latency.children():
+            # Route is the first label of per-route histograms
+            if labels and not self.route_filter(labels[0]):
+                continue
+            for i, value in enumerate(child.totals()[:n]):
+                counts[i] += value
+        return counts
+
+    def _snapshot(self) -> Tuple[float, List[float], float]:
+        return time.perf_counter(), self._bucket_counts(), self.busy_seconds()
+
+    def _window(self) -> Tuple[Tuple[float, List[float], float], Tuple[float, List[float], float]]:
+        """(baseline, current) snapshots spanning about `window_s`."""
+        now = time.perf_counter()
+        if now - self._snapshots[-1][0] >= self.min_interval_s:
+            self._snapshots.append(self._snapshot())
+        # Keep the newest snapshot that is at least window_s old as the baseline
+        while len(self._snapshots) > 2 and now - self._snapshots[1][0] >= self.window_s:
+            self._snapshots.popleft()
+        return self._snapshots[0], self._snapshots[-1]
+
+    def _quantile(self, counts: List[float], q: float) -> Optional[float]:
+        total = sum(counts)
+        if total <= 0:
+            return None
+        rank = q * total
+        running = 0.0
+        lower = 0.0
+        for bound, count in zip(self.latency.buckets, counts):
+            if count and running + count >= rank:
+                return lower + (bound - lower) * (rank - running) / count
+            running += count
+            lower = bound
+        # In the +Inf bucket: the largest finite bound is all that is known
+        return self.latency.buckets[-1]
+
+    def stats(self) -> dict:
+        """Window length, request count, p99 latency (ms) and utilization (0-1)."""
+        (t0, counts0, busy0), (t1, counts1, busy1) = self._window()
+        elapsed = t1 - t0
+        deltas = [new - old for new, old in zip(counts1, counts0)]
+        requests = int(sum(deltas))
+        p99 = self._quantile(deltas, 0.99) if requests >= self.min_requests else None
+        utilization = (busy1 - busy0) / (elapsed * self.workers) if elapsed > 0 else 0.0
+        return {
+            "window_seconds": elapsed,
+            "requests": requests,
+            "p99_latency_ms": None if p99 is None else p99 * 1e3,
+            "utilization": min(max(utilization, 0.0), 1.0),
+        }
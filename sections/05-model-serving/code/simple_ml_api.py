@@ -5,19 +5,52 @@ This is a production-ready example of serving ML predictions via API.
 Demonstrates best practices for model serving.
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field, validator
-from typing import List, Dict, Any
-from contextlib import asynccontextmanager
-import joblib
-import numpy as np
-from datetime import datetime
-import logging
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from startup import PROFILE, track_imports, warm_up
+
+# Imported under the profiler: per-package import time is part of the startup report
+with track_imports():
+    from fastapi import FastAPI, Header, HTTPException, Request, Response
+    from pydantic import BaseModel, Field, PrivateAttr, model_validator
+    from typing import List, Dict, Any, Optional
+    from contextlib import asynccontextmanager
+    import asyncio
+    import contextlib
+    import functools
+    import hmac
+    import json
+    import os
+    import time
+    import joblib
+    import numpy as np
+    from datetime import datetime
+    import logging
+
+    from adapters import ScoredBatch, make_adapter
+    from async_logging import configure_logging
+    from batching import MicroBatcher
+    from cache import PredictionCache
+    from candidate import CandidateModel
+    from binary_io import BINARY_MEDIA_TYPES, UnsupportedMediaType, media_type_of, parse_binary, serialize_binary
+    from concurrency import HIGH, LOW, AdaptiveConcurrencyLimiter, RequestShed
+    from config import settings
+    from executor import ExecutorSaturated, InferenceExecutor
+    from fast_json import JSON_MEDIA_TYPE, encode_batch_output
+    from hot_reload import ModelFileWatcher, derive_version, resolve_model_path, skip_warmup, warmup_batch
+    from metrics import CONTENT_TYPE_LATEST, LOAD_BUCKETS_SECONDS, REGISTRY, ROW_COUNT_BUCKETS, Counter, Gauge, Histogram
+    from middleware import HTTP_LATENCY, MetricsMiddleware
+    from model_registry import ModelNotFound, ModelRegistry
+    from readiness import ReadinessMonitor
+    from streaming import (
+        DuplexStreamingResponse, LineTooLong, encode_error, encode_result, iter_lines, parse_line, stack_rows,
+    )
+    from validation import check_rows_python, check_validation_mode, to_feature_array
+
+# Configure logging (JSON records written by a background thread, sampled per route)
+configure_logging(
+    level=settings.log_level,
+    fmt=settings.log_format,
+    sample_rates=settings.log_sample_rates,
+    queue_size=settings.log_queue_size,
 )
 logger = logging.getLogger(__name__)
 
@@ -33,13 +66,20 @@ class PredictionInput(BaseModel):
         min_items=1,
         max_items=100
     )
+    _array: Optional[np.ndarray] = PrivateAttr(default=None)
     
-    @validator('features')
-    def validate_features(cls, v):
-        """Validate feature values."""
-        if any(np.isnan(val) or np.isinf(val) for val in v):
-            raise ValueError("Features cannot contain NaN or Inf values")
-        return v
+    @model_validator(mode="after")
+    def validate_features(self):
+        """Check finiteness (one NumPy call in vectorized mode)."""
+        if settings.validation_mode == "vectorized":
+            self._array = to_feature_array(self.features, settings.inference_dtype)
+        else:
+            check_rows_python([self.features])
+        return self
+    
+    def as_array(self) -> np.ndarray:
+        """Features as a 1-D array (reuses the validated array when available)."""
+        return self._array if self._array is not None else np.array(self.features, dtype=settings.inference_dtype)
     
     class Config:
         schema_extra = {
@@ -66,6 +106,23 @@ class BatchPredictionInput(BaseModel):
         min_items=1,
         max_items=1000  # Limit batch size
     )
+    _array: Optional[np.ndarray] = PrivateAttr(default=None)
+    
+    def as_array(self) -> np.ndarray:
+        """
+        Instances as a 2-D array, checked for finiteness and equal row widths
+        (one NumPy call in vectorized mode).
+        
+        Runs in the handler, not as a model validator: these errors are a
+        400 from the endpoint's `except ValueError`, not a Pydantic 422.
+        """
+        if self._array is None:
+            if settings.validation_mode == "vectorized":
+                self._array = to_feature_array(self.instances, settings.inference_dtype)
+            else:
+                check_rows_python(self.instances)
+                self._array = np.array(self.instances, dtype=settings.inference_dtype)
+        return self._array
 
 
 class BatchPredictionOutput(BaseModel):
@@ -76,6 +133,28 @@ class BatchPredictionOutput(BaseModel):
     timestamp: str
 
 
+class ReloadRequest(BaseModel):
+    """Admin request to hot-swap the served model."""
+    model_path: Optional[str] = Field(None, description="joblib artifact (default: current MODEL_PATH)")
+    version: Optional[str] = Field(None, description="Version to report (default: derived from the artifact)")
+
+
+class CandidateUpdate(BaseModel):
+    """Admin request to change shadow sampling / canary routing of the candidate model."""
+    shadow_sample_rate: Optional[float] = Field(None, ge=0, le=1, description="Fraction of primary requests shadow-scored")
+    canary_weight: Optional[float] = Field(None, ge=0, le=1, description="Fraction of requests served by the candidate")
+
+
+class ReloadResponse(BaseModel):
+    """Result of a hot model reload."""
+    previous_version: str
+    model_version: str
+    model_path: str
+    load_seconds: float
+    warmup_seconds: float
+    timestamp: str
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
     status: str
@@ -84,6 +163,17 @@ class HealthResponse(BaseModel):
     timestamp: str
 
 
+class ReadinessResponse(HealthResponse):
+    """Readiness probe response: health plus inference saturation signals."""
+    ready: bool
+    queue_depth: int
+    in_flight: int
+    p99_latency_ms: Optional[float] = Field(None, description="Over the window; null with too few requests")
+    utilization: float = Field(..., description="Fraction of worker time spent in model calls")
+    window_seconds: float
+    reasons: List[str] = Field(default_factory=list, description="Why the replica is not ready")
+
+
 # ============================================================================
 # Mock Model (Replace with Real Model)
 # ============================================================================
@@ -112,19 +202,314 @@ class MockModel:
     
     def predict_proba(self, X):
         """Get prediction probabilities (for classification)."""
+        return self._proba(self.predict(X))
+    
+    def predict_with_scores(self, X) -> ScoredBatch:
+        """Prediction, class and confidence from a single pass."""
         predictions = self.predict(X)
+        return ScoredBatch(
+            predictions=predictions,
+            classes=(predictions > 0.5).astype(int),  # Binary classification threshold
+            confidences=self._proba(predictions),
+        )
+    
+    @staticmethod
+    def _proba(predictions):
         # Mock probability
-        proba = 1 / (1 + np.exp(-predictions))
-        return proba
+        return 1 / (1 + np.exp(-predictions))
 
 
 # ============================================================================
 # FastAPI App with Lifespan Management
 # ============================================================================
 
-# Global model instance
+# Global model instance (swapped atomically by hot reloads)
 model = None
-MODEL_VERSION = "1.0.0"
+MODEL_VERSION = settings.model_version
+MODEL_PATH = settings.model_path
+
+# Loaded by the pre-fork master before forking: workers start from it and share its pages
+preloaded_model = None
+
+# Runs model calls off the event loop
+executor = None
+
+# Micro-batcher for concurrent single predictions (None when disabled)
+batcher = None
+
+# Prediction cache keyed on feature bytes + model version (None when disabled)
+cache = None
+
+# Adaptive concurrency limit in front of the prediction endpoints (None when disabled)
+limiter = None
+
+# Recent p99 latency and worker utilization for /health/ready
+readiness = None
+
+# Additional models served under /models/{name}/{version} (None when disabled)
+registry = None
+
+# Second model for shadow scoring / canary routing (None when CANDIDATE_MODEL_PATH is unset)
+candidate = None
+
+# Serializes hot reloads; watches MODEL_PATH when MODEL_WATCH is on
+reload_lock = asyncio.Lock()
+watcher = None
+
+# Prometheus metrics served on /metrics (HTTP request metrics live in middleware.py)
+BATCH_ROWS = REGISTRY.register(Histogram(
+    "prediction_batch_rows", "Rows per batch request (per chunk for streams)",
+    ROW_COUNT_BUCKETS, ("route",),
+))
+INFERENCE_IN_FLIGHT = REGISTRY.register(Gauge(
+    "inference_in_flight", "Model calls running or queued in the executor",
+))
+INFERENCE_IN_FLIGHT.set_function(lambda: executor.in_flight if executor is not None else 0)
+INFERENCE_REJECTED = REGISTRY.register(Counter(
+    "inference_rejected_total", "Model calls rejected because the executor queue was full",
+))
+INFERENCE_REJECTED.set_function(lambda: executor.rejected if executor is not None else 0)
+LIMITER_LIMIT = REGISTRY.register(Gauge(
+    "concurrency_limit", "Current adaptive concurrency limit for prediction requests",
+))
+LIMITER_LIMIT.set_function(lambda: limiter.limit if limiter is not None else 0)
+LIMITER_QUEUED = REGISTRY.register(Gauge(
+    "concurrency_queued", "Prediction requests waiting for a concurrency slot", ("priority",),
+))
+LIMITER_SHED = REGISTRY.register(Counter(
+    "requests_shed_total", "Prediction requests rejected by the concurrency limiter",
+    ("priority", "status"),
+))
+for _priority in (HIGH, LOW):
+    LIMITER_QUEUED.labels(_priority).set_function(
+        lambda p=_priority: limiter.queued(p) if limiter is not None else 0
+    )
+    for _status in (429, 503):
+        LIMITER_SHED.labels(_priority, _status).set_function(
+            lambda p=_priority, s=_status: limiter.shed[(p, s)] if limiter is not None else 0
+        )
+MODEL_REGISTRY_LOAD_SECONDS = REGISTRY.register(Histogram(
+    "model_registry_load_seconds", "Cold-load latency of registry models",
+    LOAD_BUCKETS_SECONDS, ("model",),
+))
+MODEL_REGISTRY_RESIDENT = REGISTRY.register(Gauge(
+    "model_registry_resident_models", "Registry models currently loaded",
+))
+MODEL_REGISTRY_RESIDENT.set_function(lambda: len(registry) if registry is not None else 0)
+MODEL_REGISTRY_BYTES = REGISTRY.register(Gauge(
+    "model_registry_resident_bytes", "Estimated memory of loaded registry models",
+))
+MODEL_REGISTRY_BYTES.set_function(lambda: registry.resident_bytes if registry is not None else 0)
+MODEL_REGISTRY_EVENTS = REGISTRY.register(Counter(
+    "model_registry_events_total", "Registry lookups, loads and evictions", ("event",),
+))
+for _event in ("hits", "loads", "load_failures", "evictions", "deduplicated"):
+    MODEL_REGISTRY_EVENTS.labels(_event).set_function(
+        lambda event=_event: getattr(registry, event) if registry is not None else 0
+    )
+STARTUP_SECONDS = REGISTRY.register(Gauge(
+    "startup_phase_seconds", "Time spent in each start-up phase (ready: total until ready)", ("phase",),
+))
+for _phase in ("imports", "model_load", "executor_start", "warmup"):
+    STARTUP_SECONDS.labels(_phase).set_function(lambda phase=_phase: PROFILE.phases.get(phase, 0.0))
+STARTUP_SECONDS.labels("ready").set_function(lambda: PROFILE.ready_s or 0.0)
+CANARY_REQUESTS = REGISTRY.register(Counter(
+    "canary_requests_total", "Prediction requests routed by canary weight, by model served", ("model",),
+))
+CANARY_REQUESTS.labels("primary").set_function(lambda: candidate.primary_requests if candidate is not None else 0)
+CANARY_REQUESTS.labels("candidate").set_function(lambda: candidate.canary_requests if candidate is not None else 0)
+SHADOW_EVENTS = REGISTRY.register(Counter(
+    "shadow_events_total", "Shadow samples taken/dropped/failed and rows compared/agreeing", ("event",),
+))
+for _event in ("sampled", "dropped", "errors", "rows", "agreed_rows"):
+    SHADOW_EVENTS.labels(_event).set_function(
+        lambda event=_event: getattr(candidate, event) if candidate is not None else 0
+    )
+SHADOW_AGREEMENT = REGISTRY.register(Gauge(
+    "shadow_agreement_ratio", "Share of shadow-compared rows where candidate and primary classes agree",
+))
+SHADOW_AGREEMENT.set_function(
+    lambda: candidate.agreed_rows / candidate.rows if candidate is not None and candidate.rows else 0
+)
+CACHE_EVENTS = REGISTRY.register(Counter(
+    "prediction_cache_events_total", "Prediction cache lookups and removals", ("event",),
+))
+for _event in ("hits", "misses", "evictions", "expirations", "invalidations"):
+    CACHE_EVENTS.labels(_event).set_function(
+        lambda event=_event: getattr(cache, event) if cache is not None else 0
+    )
+
+
+def load_model(path: Optional[str] = None):
+    """Load the serving model wrapped in its adapter (also preloads process workers)."""
+    path = settings.model_path if path is None else path
+    if path:
+        # mmap_mode="r": workers share the model's arrays through the page cache
+        return make_adapter(
+            joblib.load(path, mmap_mode="r" if settings.model_mmap else None),
+            dtype=settings.inference_dtype,
+        )
+    # For demo, use mock model
+    return make_adapter(MockModel(), dtype=settings.inference_dtype)
+
+
+def preload_model() -> None:
+    """Load the model once in the pre-fork master (prefork.py); each worker's lifespan reuses it."""
+    global preloaded_model
+    preloaded_model = load_model()
+
+
+def score_rows(model, features: np.ndarray) -> List[tuple]:
+    """Score a 2-D feature matrix, returning (prediction, class, confidence) per row."""
+    return model.predict_with_scores(features).rows()
+
+
+def predict_values(model, features: np.ndarray) -> np.ndarray:
+    """Predictions for a 2-D feature matrix (one forward pass)."""
+    return model.predict_with_scores(features).predictions
+
+
+def warmup_values(model, features: np.ndarray) -> Optional[np.ndarray]:
+    """predict_values for a synthetic warm-up batch (see hot_reload.skip_warmup)."""
+    try:
+        return predict_values(model, features)
+    except Exception as e:
+        skip_warmup(model, e)
+        return None
+
+
+async def async_score_rows(features: np.ndarray) -> List[tuple]:
+    """Score rows in the executor; returns (result, model_version) per row."""
+    rows, version = await executor.run_versioned(score_rows, features)
+    return [(row, version) for row in rows]
+
+
+async def run_candidate(fn, features: np.ndarray):
+    """Run `fn(candidate model, features)` in the executor (canary traffic); returns (result, version)."""
+    return await executor.run_on(candidate.model, fn, features), candidate.version
+
+
+async def predict_cached(features: np.ndarray):
+    """Batch predictions where only cache misses are sent to the model."""
+    version = MODEL_VERSION
+    keys = [cache.key(row, version) for row in features]
+    predictions = np.empty(len(keys))
+    missing = []
+    for i, key in enumerate(keys):
+        hit = cache.get(key)
+        if hit is None:
+            missing.append(i)
+        else:
+            predictions[i] = hit[0]
+    
+    if missing:
+        results, scored_version = await executor.run_versioned(score_rows, features[missing])
+        if scored_version != version and len(missing) < len(keys):
+            # A reload landed after the lookup: the hits belong to the old
+            # model, so score the whole batch with one model instead of mixing
+            predictions, version = await executor.run_versioned(predict_values, features)
+            return predictions, version
+        for i, result in zip(missing, results):
+            # Entries are only valid for the version they were looked up under
+            if scored_version == version:
+                cache.put(keys[i], result)
+            predictions[i] = result[0]
+        version = scored_version
+    return predictions, version
+
+
+async def reload_model(path: str, version: Optional[str] = None) -> ReloadResponse:
+    """
+    Load, warm up and atomically swap in a new model.
+    
+    Loading and warm-up run off the event loop; requests keep being served by
+    the old model until the swap, and in-flight ones finish on it.
+    """
+    global model, MODEL_VERSION, MODEL_PATH
+    async with reload_lock:
+        started = time.perf_counter()
+        new_model = await asyncio.to_thread(load_model, path)
+        new_version = version or derive_version(new_model, path)
+        loaded = time.perf_counter()
+        
+        sample = warmup_batch(new_model, settings.reload_warmup_rows, settings.reload_warmup_features)
+        await executor.swap(
+            new_model,
+            new_version,
+            model_factory=functools.partial(load_model, path),
+            warmup=(warmup_values, (sample,)),
+        )
+        warmed = time.perf_counter()
+        
+        previous_version = MODEL_VERSION
+        model, MODEL_VERSION, MODEL_PATH = new_model, new_version, path
+        if cache is not None:
+            cache.invalidate()
+        
+        logger.info(f"Model reloaded: {previous_version} -> {new_version} from {path}")
+        return ReloadResponse(
+            previous_version=previous_version,
+            model_version=new_version,
+            model_path=path,
+            load_seconds=loaded - started,
+            warmup_seconds=warmed - loaded,
+            timestamp=datetime.now().isoformat()
+        )
+
+
+def is_prediction_route(route: str) -> bool:
+    """Routes whose latency counts towards readiness (not probes or metrics)."""
+    return route.startswith("/predict") or route.startswith("/models/")
+
+
+def warmup_requests(model) -> List[tuple]:
+    """Synthetic (path, body) pairs shaped like the model's input."""
+    sample = warmup_batch(model, settings.reload_warmup_rows, settings.reload_warmup_features)
+    return [
+        ("/predict", json.dumps({"features": sample[0].tolist()}).encode()),
+        ("/predict/batch", json.dumps({"instances": sample.tolist()}).encode()),
+    ]
+
+
+async def registry_model(name: str, version: str):
+    """Model from the registry (loaded on first use), or an HTTP error."""
+    if registry is None:
+        raise HTTPException(status_code=404, detail="Model registry is not enabled (set MODEL_REGISTRY_DIR)")
+    try:
+        return await registry.get(name, version)
+    except ModelNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to load registry model {name}/{version}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to load model {name}/{version}")
+
+
+def batch_priority(rows: int) -> str:
+    """Small batches compete with single predictions; large ones yield to them."""
+    return HIGH if rows <= settings.limiter_small_batch_rows else LOW
+
+
+def admission(priority: str):
+    """Concurrency slot for a prediction (no-op when the limiter is disabled)."""
+    return limiter.slot(priority) if limiter is not None else contextlib.nullcontext()
+
+
+def shed_error(e: RequestShed) -> HTTPException:
+    """429/503 from the concurrency limiter, with Retry-After."""
+    return HTTPException(
+        status_code=e.status_code,
+        detail=e.reason,
+        headers={"Retry-After": str(max(1, round(e.retry_after)))},
+    )
+
+
+def saturated_error(e: ExecutorSaturated) -> HTTPException:
+    """503 telling clients when to come back."""
+    return HTTPException(
+        status_code=503,
+        detail="Server busy, retry later",
+        headers={"Retry-After": str(max(1, round(e.retry_after)))},
+    )
 
 
 @asynccontextmanager
@@ -133,22 +518,140 @@ async def lifespan(app: FastAPI):
     Lifespan context manager for startup and shutdown events.
     Replaces deprecated @app.on_event decorators.
     """
-    global model
+    global model, executor, batcher, cache, watcher, limiter, registry, readiness, candidate
+    # Fail fast: an unknown mode would skip request validation altogether
+    check_validation_mode(settings.validation_mode)
+    
     # Startup: Load model
     try:
-        # In production, load actual model:
-        # model = joblib.load('models/model.pkl')
-        
-        # For demo, use mock model
-        model = MockModel()
+        # In production, set MODEL_PATH=models/model.pkl to load a joblib artifact
+        with PROFILE.phase("model_load"):
+            model = preloaded_model if preloaded_model is not None else load_model()
         logger.info("Model loaded successfully")
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
         raise
     
+    with PROFILE.phase("executor_start"):
+        executor = InferenceExecutor(
+            kind=settings.inference_executor,
+            max_workers=settings.inference_workers,
+            max_queue_depth=settings.inference_queue_depth,
+            retry_after_s=settings.inference_retry_after_s,
+            model_factory=load_model,
+        )
+        executor.start(model, MODEL_VERSION)
+    # Histograms owned by per-lifespan components; unregistered on shutdown
+    component_metrics = [executor.inference_histogram]
+    
+    if settings.limiter_enabled:
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=settings.limiter_initial_limit,
+            min_limit=settings.limiter_min_limit,
+            max_limit=settings.limiter_max_limit,
+            slo_s=settings.limiter_slo_ms / 1000,
+            low_priority_share=settings.limiter_low_priority_share,
+            retry_after_s=settings.inference_retry_after_s,
+        )
+    
+    if settings.model_registry_dir:
+        registry = ModelRegistry(
+            settings.model_registry_dir,
+            loader=load_model,
+            max_bytes=int(settings.model_registry_max_mb * 1024 * 1024),
+            on_load=lambda name, seconds: MODEL_REGISTRY_LOAD_SECONDS.labels(name).observe(seconds),
+        )
+    
+    candidate_model = None
+    if settings.candidate_model_path:
+        with PROFILE.phase("candidate_load"):
+            candidate_model = load_model(settings.candidate_model_path)
+        logger.info(f"Candidate model loaded from {settings.candidate_model_path}")
+    
+    if settings.cache_enabled:
+        cache = PredictionCache(max_entries=settings.cache_max_entries, ttl_s=settings.cache_ttl_s)
+    
+    if settings.microbatch_enabled:
+        batcher = MicroBatcher(
+            async_score_rows,
+            max_batch_size=settings.microbatch_max_size,
+            max_wait_ms=settings.microbatch_max_wait_ms,
+            max_concurrency=settings.inference_workers,
+        )
+        await batcher.start()
+        component_metrics += [batcher.batch_size_histogram, batcher.queue_wait_histogram]
+    
+    for metric in component_metrics:
+        REGISTRY.register(metric)
+    
+    if settings.startup_warmup_rounds > 0:
+        # Pays first-call costs (pool start-up, lazy framework set-up, first
+        # allocations) here instead of on the first real requests
+        with PROFILE.phase("warmup"):
+            requests = warmup_requests(model)
+            if candidate_model is not None:
+                await executor.run_on(candidate_model, warmup_values, warmup_batch(
+                    candidate_model, settings.reload_warmup_rows, settings.reload_warmup_features
+                ))
+            try:
+                await executor.warmup(predict_values, warmup_batch(model, 1, settings.reload_warmup_features))
+            except Exception as e:
+                skip_warmup(model, e)
+            else:
+                # Same synthetic rows through the HTTP stack: only if the model can score them
+                await warm_up(app, requests, settings.startup_warmup_rounds)
+        if cache is not None:
+            cache.invalidate()
+    
+    # Baseline taken after warm-up, so cold warm-up requests never count towards p99
+    readiness = ReadinessMonitor(
+        HTTP_LATENCY,
+        busy_seconds=lambda histogram=executor.inference_histogram: histogram.sum,
+        workers=executor.max_workers,
+        route_filter=is_prediction_route,
+        window_s=settings.readiness_window_s,
+    )
+    if candidate_model is not None:
+        # Also after warm-up: synthetic requests are neither routed nor shadowed
+        candidate = CandidateModel(
+            candidate_model,
+            settings.candidate_model_version or derive_version(candidate_model, settings.candidate_model_path),
+            sample_rate=settings.shadow_sample_rate,
+            canary_weight=settings.canary_weight,
+            max_pending=settings.shadow_max_pending,
+        )
+        for metric in (candidate.latency_histogram, candidate.delta_histogram):
+            REGISTRY.register(metric)
+            component_metrics.append(metric)
+    PROFILE.mark_ready()
+    logger.info(PROFILE.format())
+    
+    if settings.model_watch and MODEL_PATH:
+        watcher = ModelFileWatcher(MODEL_PATH, reload_model, interval_s=settings.model_watch_interval_s)
+        watcher.start()
+    
     yield  # App runs here
     
+    PROFILE.mark_stopped()
+    
     # Shutdown: Cleanup if needed
+    for metric in component_metrics:
+        REGISTRY.unregister(metric.name)
+    if watcher is not None:
+        await watcher.stop()
+        watcher = None
+    if batcher is not None:
+        await batcher.stop()
+        batcher = None
+    if candidate is not None:
+        candidate.stop()
+        candidate = None
+    executor.shutdown()
+    executor = None
+    cache = None
+    limiter = None
+    registry = None
+    readiness = None
     logger.info("Shutting down gracefully")
 
 
@@ -160,6 +663,7 @@ app = FastAPI(
     redoc_url="/redoc",
     lifespan=lifespan
 )
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/", response_model=Dict[str, str])
@@ -175,16 +679,80 @@ async def root():
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint for Kubernetes probes."""
+    if not (model and model.is_loaded):
+        status = "unhealthy"
+    else:
+        status = "healthy" if PROFILE.ready else "warming_up"
     return HealthResponse(
-        status="healthy" if model and model.is_loaded else "unhealthy",
+        status=status,
         model_loaded=model is not None and model.is_loaded,
         model_version=MODEL_VERSION,
         timestamp=datetime.now().isoformat()
     )
 
 
+# Built once: the liveness handler does no work and allocates nothing
+LIVENESS_RESPONSE = Response(content=b'{"status":"alive"}', media_type=JSON_MEDIA_TYPE)
+
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the event loop is answering. Never depends on load."""
+    return LIVENESS_RESPONSE
+
+
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response):
+    """
+    Readiness probe: 503 while warming up or when inference is saturated.
+    
+    Not ready when the queued work (executor + concurrency limiter +
+    micro-batcher), the recent p99 latency of prediction routes or worker
+    utilization exceeds its READINESS_* threshold.
+    """
+    loaded = model is not None and model.is_loaded
+    reasons = []
+    if not loaded:
+        reasons.append("model not loaded")
+    elif not PROFILE.ready:
+        reasons.append("warming up")
+    
+    queue_depth = (
+        (executor.queued if executor is not None else 0)
+        + (limiter.queued() if limiter is not None else 0)
+        + (batcher.queued if batcher is not None else 0)
+    )
+    signals = readiness.stats() if readiness is not None else {
+        "window_seconds": 0.0, "p99_latency_ms": None, "utilization": 0.0,
+    }
+    p99, utilization = signals["p99_latency_ms"], signals["utilization"]
+    if settings.readiness_max_queue and queue_depth > settings.readiness_max_queue:
+        reasons.append(f"queue depth {queue_depth} > {settings.readiness_max_queue}")
+    if settings.readiness_max_p99_ms and p99 is not None and p99 > settings.readiness_max_p99_ms:
+        reasons.append(f"p99 latency {p99:.0f} ms > {settings.readiness_max_p99_ms:g} ms")
+    if settings.readiness_max_utilization and utilization > settings.readiness_max_utilization:
+        reasons.append(f"utilization {utilization:.0%} > {settings.readiness_max_utilization:.0%}")
+    
+    ready = not reasons
+    if not ready:
+        response.status_code = 503
+    return ReadinessResponse(
+        status="ready" if ready else "not_ready",
+        model_loaded=loaded,
+        model_version=MODEL_VERSION,
+        timestamp=datetime.now().isoformat(),
+        ready=ready,
+        queue_depth=queue_depth,
+        in_flight=executor.in_flight if executor is not None else 0,
+        p99_latency_ms=p99,
+        utilization=utilization,
+        window_seconds=signals["window_seconds"],
+        reasons=reasons,
+    )
+
+
 @app.post("/predict", response_model=PredictionOutput)
-async def predict(input_data: PredictionInput):
+async def predict(input_data: PredictionInput, x_canary_key: Optional[str] = Header(None)):
     """
     Single prediction endpoint.
     
@@ -195,42 +763,74 @@ async def predict(input_data: PredictionInput):
         PredictionOutput with prediction and metadata
     """
     try:
-        # Log request (be careful with PII in production!)
-        logger.info(f"Prediction request received with {len(input_data.features)} features")
-        
         # Check if model is loaded
         if model is None:
             raise HTTPException(status_code=503, detail="Model not loaded")
         
-        # Make prediction
-        features = np.array(input_data.features).reshape(1, -1)
-        prediction = model.predict(features)[0]
+        # Make prediction (coalesced with concurrent requests when batching is on)
+        features = input_data.as_array()
+        # Canary requests are served (and cached) under the candidate's version
+        canary = candidate is not None and candidate.use_canary(x_canary_key)
+        version = candidate.version if canary else MODEL_VERSION
+        cache_key = cache.key(features, version) if cache is not None else None
+        result = cache.get(cache_key) if cache_key is not None else None
         
-        # For classification, also get class and confidence
-        prediction_class = int(prediction > 0.5)  # Binary classification threshold
-        confidence = float(model.predict_proba(features)[0])
+        # Class and confidence come from the same forward pass as the prediction
+        if result is None:
+            async with admission(HIGH):
+                if canary:
+                    rows, scored_version = await run_candidate(score_rows, features.reshape(1, -1))
+                    result = rows[0]
+                elif batcher is not None:
+                    result, scored_version = await batcher.submit(features)
+                else:
+                    result, scored_version = (await async_score_rows(features.reshape(1, -1)))[0]
+            # A reload may have happened meanwhile: only cache under the right version
+            if cache_key is not None and scored_version == version:
+                cache.put(cache_key, result)
+            version = scored_version
+        prediction, prediction_class, confidence = result
+        if candidate is not None and not canary:
+            # Sampled requests are re-scored by the candidate after this returns
+            candidate.offer(features.reshape(1, -1), (prediction,), (prediction_class,))
         
         response = PredictionOutput(
             prediction=float(prediction),
             prediction_class=prediction_class,
-            confidence=confidence,
-            model_version=MODEL_VERSION,
+            confidence=None if np.isnan(confidence) else confidence,
+            model_version=version,
             timestamp=datetime.now().isoformat()
         )
         
-        logger.info(f"Prediction successful: {prediction:.4f}")
+        # One sampled record per request (be careful with PII in production!)
+        logger.info(
+            "Prediction served",
+            extra={
+                "route": "/predict",
+                "n_features": len(input_data.features),
+                "prediction": float(prediction),
+                "model_version": version,
+            },
+        )
         return response
         
+    except HTTPException:
+        raise
+    except RequestShed as e:
+        raise shed_error(e)
+    except ExecutorSaturated as e:
+        logger.warning("Prediction rejected: inference queue full", extra={"route": "/predict"})
+        raise saturated_error(e)
     except ValueError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e, extra={"route": "/predict"})
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Prediction error: {e}")
+        logger.error("Prediction error: %s", e, extra={"route": "/predict"})
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @app.post("/predict/batch", response_model=BatchPredictionOutput)
-async def predict_batch(input_data: BatchPredictionInput):
+async def predict_batch(input_data: BatchPredictionInput, x_canary_key: Optional[str] = Header(None)):
     """
     Batch prediction endpoint.
     
@@ -241,35 +841,432 @@ async def predict_batch(input_data: BatchPredictionInput):
         BatchPredictionOutput with predictions for all instances
     """
     try:
-        logger.info(f"Batch prediction request with {len(input_data.instances)} instances")
+        if model is None:
+            raise HTTPException(status_code=503, detail="Model not loaded")
+        
+        # Validated and converted to a NumPy array in one pass
+        features = input_data.as_array()
+        
+        # Make predictions (only cache misses reach the model)
+        canary = candidate is not None and candidate.use_canary(x_canary_key)
+        async with admission(batch_priority(len(features))):
+            if canary:
+                predictions, version = await run_candidate(predict_values, features)
+            elif cache is not None:
+                predictions, version = await predict_cached(features)
+            else:
+                predictions, version = await executor.run_versioned(predict_values, features)
+        BATCH_ROWS.labels("/predict/batch").observe(len(predictions))
+        if candidate is not None and not canary:
+            candidate.offer(features, predictions)
         
+        if settings.fast_json_responses:
+            # Same schema, encoded from the array; returning a Response skips
+            # response_model re-validation
+            response = Response(
+                content=encode_batch_output(predictions, version, datetime.now().isoformat()),
+                media_type=JSON_MEDIA_TYPE,
+            )
+        else:
+            response = BatchPredictionOutput(
+                predictions=[float(p) for p in predictions],
+                count=len(predictions),
+                model_version=version,
+                timestamp=datetime.now().isoformat()
+            )
+        
+        logger.info(
+            "Batch prediction served",
+            extra={"route": "/predict/batch", "instances": len(predictions), "model_version": version},
+        )
+        return response
+        
+    except HTTPException:
+        raise
+    except RequestShed as e:
+        raise shed_error(e)
+    except ExecutorSaturated as e:
+        logger.warning("Batch prediction rejected: inference queue full", extra={"route": "/predict/batch"})
+        raise saturated_error(e)
+    except ValueError as e:
+        logger.error("Validation error: %s", e, extra={"route": "/predict/batch"})
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Batch prediction error: %s", e, extra={"route": "/predict/batch"})
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.post("/predict/batch/binary")
+async def predict_batch_binary(request: Request, x_canary_key: Optional[str] = Header(None)):
+    """
+    Binary batch prediction endpoint (no JSON on either side).
+    
+    Body: application/x-npy (2-D array, parsed zero-copy) or
+    application/vnd.apache.arrow.stream (one column per feature).
+    Response: 1-D float64 predictions in the Accept format, or the request
+    format when Accept is not a binary type. Up to BINARY_BATCH_MAX_ROWS rows.
+    """
+    content_type = media_type_of(request.headers.get("content-type"))
+    accept = media_type_of(request.headers.get("accept"))
+    response_type = accept if accept in BINARY_MEDIA_TYPES else content_type
+    
+    try:
         if model is None:
             raise HTTPException(status_code=503, detail="Model not loaded")
         
-        # Convert to numpy array
-        features = np.array(input_data.instances)
+        features = parse_binary(await request.body(), content_type)
+        if features.ndim != 2:
+            raise ValueError("Expected a 2-D array of shape (rows, features)")
+        if features.shape[0] < 1 or features.shape[1] < 1:
+            raise ValueError("Batch must contain at least one row and one feature")
+        if features.shape[0] > settings.binary_batch_max_rows:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch has {features.shape[0]} rows; limit is {settings.binary_batch_max_rows}",
+            )
+        # No copy for C-ordered input already in the inference dtype: the model sees the request buffer
+        features = to_feature_array(features, settings.inference_dtype)
+        
+        canary = candidate is not None and candidate.use_canary(x_canary_key)
+        async with admission(batch_priority(len(features))):
+            if canary:
+                predictions, version = await run_candidate(predict_values, features)
+            else:
+                predictions, version = await executor.run_versioned(predict_values, features)
+        BATCH_ROWS.labels("/predict/batch/binary").observe(len(predictions))
+        if candidate is not None and not canary:
+            candidate.offer(features, predictions)
+        content = serialize_binary(np.asarray(predictions, dtype=np.float64), response_type)
         
-        # Make predictions
-        predictions = model.predict(features)
+        logger.info(
+            "Binary batch prediction served",
+            extra={
+                "route": "/predict/batch/binary",
+                "instances": len(predictions),
+                "content_type": content_type,
+                "model_version": version,
+            },
+        )
+        return Response(
+            content=content,
+            media_type=response_type,
+            headers={
+                "X-Model-Version": version,
+                "X-Prediction-Count": str(len(predictions)),
+            },
+        )
         
-        response = BatchPredictionOutput(
+    except HTTPException:
+        raise
+    except UnsupportedMediaType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except RequestShed as e:
+        raise shed_error(e)
+    except ExecutorSaturated as e:
+        logger.warning(
+            "Binary batch prediction rejected: inference queue full",
+            extra={"route": "/predict/batch/binary"},
+        )
+        raise saturated_error(e)
+    except ValueError as e:
+        logger.error("Validation error: %s", e, extra={"route": "/predict/batch/binary"})
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Binary batch prediction error: %s", e, extra={"route": "/predict/batch/binary"})
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+async def _score_chunk(rows) -> bytes:
+    """Score one chunk of NDJSON rows, waiting out executor saturation."""
+    while True:
+        try:
+            results, version = await executor.run_versioned(score_rows, stack_rows(rows))
+            break
+        except ExecutorSaturated as e:
+            # Streaming clients cannot retry a single chunk, so back off here
+            await asyncio.sleep(e.retry_after)
+    BATCH_ROWS.labels("/predict/stream").observe(len(rows))
+    return b"".join(encode_result(row, *result, version) for row, result in zip(rows, results))
+
+
+async def _stream_predictions(request: Request):
+    """Read NDJSON lines, score in fixed-size chunks, yield NDJSON results."""
+    chunk_size = settings.stream_chunk_size
+    rows = []
+    scored = 0
+    too_long = None
+    
+    try:
+        async for line_no, line in iter_lines(request.stream(), settings.stream_max_line_bytes):
+            try:
+                row = parse_line(line_no, line, settings.inference_dtype)
+            except ValueError as e:
+                yield encode_error(line_no, str(e))
+                continue
+            
+            # Rows of different widths cannot share a matrix: flush first
+            if rows and row.features.shape[0] != rows[0].features.shape[0]:
+                yield await _score_chunk(rows)
+                scored += len(rows)
+                rows = []
+            
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                yield await _score_chunk(rows)
+                scored += len(rows)
+                rows = []
+    except LineTooLong as e:
+        # The response has already started (no 413 possible): report it in-band
+        too_long = e
+    
+    if rows:
+        yield await _score_chunk(rows)
+        scored += len(rows)
+    if too_long is not None:
+        logger.warning("Streaming prediction stopped: %s", too_long, extra={"route": "/predict/stream"})
+        yield encode_error(too_long.line_no, str(too_long))
+    
+    logger.info("Streaming prediction finished", extra={"route": "/predict/stream", "instances": scored})
+
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request):
+    """
+    Streaming NDJSON prediction endpoint.
+    
+    Body: one feature vector per line, either `[1.0, 2.0]` or
+    `{"id": "...", "features": [1.0, 2.0]}`. Rows are scored in chunks of
+    STREAM_CHUNK_SIZE and results stream back as NDJSON while the request is
+    still being read, so memory stays constant for any number of rows.
+    Invalid lines produce `{"line": n, "error": "..."}` and do not stop the stream;
+    a line longer than STREAM_MAX_LINE_BYTES ends it with such an error line.
+    Each result carries the `model_version` that scored it; the X-Model-Version
+    header is the version current when the stream started.
+    """
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    logger.info("Streaming prediction request started", extra={"route": "/predict/stream"})
+    return DuplexStreamingResponse(
+        _stream_predictions(request),
+        media_type="application/x-ndjson",
+        # Version at stream start; every result line has its own model_version
+        headers={"X-Model-Version": MODEL_VERSION},
+    )
+
+
+@app.get("/models")
+async def list_models():
+    """Registry models on disk, plus the resident ones and their memory use."""
+    if registry is None:
+        return {"enabled": False}
+    return {"enabled": True, "available": registry.available(), **registry.stats()}
+
+
+@app.post("/models/{name}/{version}/predict", response_model=PredictionOutput)
+async def predict_registry(name: str, version: str, input_data: PredictionInput):
+    """Single prediction with a registry model (loaded lazily on first use)."""
+    route = "/models/{name}/{version}/predict"
+    registry_model_ = await registry_model(name, version)
+    try:
+        features = input_data.as_array().reshape(1, -1)
+        async with admission(HIGH):
+            prediction, prediction_class, confidence = (
+                await executor.run_on(registry_model_, score_rows, features)
+            )[0]
+        
+        logger.info(
+            "Registry prediction served",
+            extra={"route": route, "model": name, "model_version": version},
+        )
+        return PredictionOutput(
+            prediction=float(prediction),
+            prediction_class=prediction_class,
+            confidence=None if np.isnan(confidence) else confidence,
+            model_version=version,
+            timestamp=datetime.now().isoformat()
+        )
+    
+    except HTTPException:
+        raise
+    except RequestShed as e:
+        raise shed_error(e)
+    except ExecutorSaturated as e:
+        logger.warning("Registry prediction rejected: inference queue full", extra={"route": route})
+        raise saturated_error(e)
+    except ValueError as e:
+        logger.error("Validation error: %s", e, extra={"route": route})
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Registry prediction error: %s", e, extra={"route": route})
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.post("/models/{name}/{version}/predict/batch", response_model=BatchPredictionOutput)
+async def predict_registry_batch(name: str, version: str, input_data: BatchPredictionInput):
+    """Batch prediction with a registry model (loaded lazily on first use)."""
+    route = "/models/{name}/{version}/predict/batch"
+    registry_model_ = await registry_model(name, version)
+    try:
+        features = input_data.as_array()
+        async with admission(batch_priority(len(features))):
+            predictions = await executor.run_on(registry_model_, predict_values, features)
+        BATCH_ROWS.labels(route).observe(len(predictions))
+        
+        logger.info(
+            "Registry batch prediction served",
+            extra={"route": route, "model": name, "model_version": version, "instances": len(predictions)},
+        )
+        if settings.fast_json_responses:
+            return Response(
+                content=encode_batch_output(predictions, version, datetime.now().isoformat()),
+                media_type=JSON_MEDIA_TYPE,
+            )
+        return BatchPredictionOutput(
             predictions=[float(p) for p in predictions],
             count=len(predictions),
-            model_version=MODEL_VERSION,
+            model_version=version,
             timestamp=datetime.now().isoformat()
         )
-        
-        logger.info(f"Batch prediction successful: {len(predictions)} predictions")
-        return response
-        
+    
+    except HTTPException:
+        raise
+    except RequestShed as e:
+        raise shed_error(e)
+    except ExecutorSaturated as e:
+        logger.warning("Registry batch prediction rejected: inference queue full", extra={"route": route})
+        raise saturated_error(e)
     except ValueError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e, extra={"route": route})
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Batch prediction error: {e}")
+        logger.error("Registry batch prediction error: %s", e, extra={"route": route})
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+def require_admin(token: Optional[str]) -> None:
+    """403 unless ADMIN_TOKEN is configured and the request carries it."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    # Constant-time comparison: response timing must not reveal a token prefix
+    if token is None or not hmac.compare_digest(token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def admin_model_dir() -> str:
+    """Directory admin reloads may load artifacts from ('' = none allowed)."""
+    if settings.model_dir:
+        return settings.model_dir
+    return os.path.dirname(os.path.abspath(settings.model_path)) if settings.model_path else ""
+
+
+@app.post("/admin/reload", response_model=ReloadResponse)
+async def admin_reload(
+    request: Optional[ReloadRequest] = None,
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    Hot-swap the model without dropping traffic.
+    
+    Loads the artifact in the background, warms it up with a synthetic batch,
+    then swaps it in atomically. Requires X-Admin-Token (disabled without
+    ADMIN_TOKEN); a given model_path must be inside MODEL_DIR.
+    """
+    require_admin(x_admin_token)
+    
+    request = request or ReloadRequest()
+    if request.model_path:
+        root = admin_model_dir()
+        if not root:
+            raise HTTPException(status_code=400, detail="model_path is not accepted: set MODEL_DIR")
+        try:
+            path = resolve_model_path(request.model_path, root)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        path = MODEL_PATH
+    if not path:
+        raise HTTPException(status_code=400, detail="No model_path given and MODEL_PATH is not set")
+    
+    try:
+        return await reload_model(path, request.version)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Model artifact not found")
+    except Exception as e:
+        logger.error(f"Model reload failed, keeping {MODEL_VERSION}: {e}")
+        raise HTTPException(status_code=500, detail="Model reload failed")
+
+
+@app.post("/admin/candidate")
+async def admin_candidate(update: CandidateUpdate, x_admin_token: Optional[str] = Header(None)):
+    """
+    Change the candidate's shadow sample rate and/or canary weight at runtime,
+    e.g. to step a rollout 1% -> 10% -> 50%. Protected like /admin/reload.
+    """
+    require_admin(x_admin_token)
+    if candidate is None:
+        raise HTTPException(status_code=404, detail="No candidate model (set CANDIDATE_MODEL_PATH)")
+    
+    candidate.configure(sample_rate=update.shadow_sample_rate, canary_weight=update.canary_weight)
+    logger.info(
+        f"Candidate {candidate.version}: shadow sample rate {candidate.sample_rate:g}, "
+        f"canary weight {candidate.canary_weight:g}"
+    )
+    return candidate.stats()
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of request, model, batching and cache metrics."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/metrics/startup")
+async def startup_metrics():
+    """Import, model load and warm-up timings of this process."""
+    return PROFILE.report()
+
+
+@app.get("/metrics/batching")
+async def batching_metrics():
+    """Micro-batch size and queue-wait histograms for latency/throughput tuning."""
+    if batcher is None:
+        return {"enabled": False}
+    return batcher.stats()
+
+
+@app.get("/metrics/cache")
+async def cache_metrics():
+    """Prediction cache hit/miss/eviction counters."""
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@app.get("/metrics/candidate")
+async def candidate_metrics():
+    """Canary routing counts and shadow agreement, score deltas and latency."""
+    if candidate is None:
+        return {"enabled": False}
+    return {"enabled": True, **candidate.stats()}
+
+
+@app.get("/metrics/executor")
+async def executor_metrics():
+    """Inference pool occupancy and rejected (503) call count."""
+    if executor is None:
+        raise HTTPException(status_code=503, detail="Executor not running")
+    return executor.stats()
+
+
+@app.get("/metrics/limiter")
+async def limiter_metrics():
+    """Adaptive concurrency limit, queue lengths and shed counts by priority."""
+    if limiter is None:
+        return {"enabled": False}
+    return {"enabled": True, **limiter.stats()}
+
+
 @app.get("/model/info")
 async def model_info():
     """Get model information."""
@@ -278,7 +1275,8 @@ async def model_info():
     
     return {
         "version": MODEL_VERSION,
-        "type": "MockModel (replace with actual model type)",
+        "type": model.model_type,
+        "path": MODEL_PATH or None,
         "loaded": model.is_loaded,
         "timestamp": datetime.now().isoformat()
     }
@@ -289,7 +1287,7 @@ async def model_info():
 # ============================================================================
 
 if __name__ == "__main__":
-    import uvicorn
+    import sys
     
     print("="*60)
     print("Starting ML Prediction API")
@@ -300,13 +1298,33 @@ if __name__ == "__main__":
     print("  - http://localhost:8000/health (Health check)")
     print("  - http://localhost:8000/predict (Single prediction)")
     print("  - http://localhost:8000/predict/batch (Batch prediction)")
+    print("  - http://localhost:8000/predict/batch/binary (Batch prediction, .npy/Arrow)")
+    print("  - http://localhost:8000/predict/stream (Streaming NDJSON prediction)")
+    print("  - http://localhost:8000/metrics (Prometheus metrics)")
     print("\nPress Ctrl+C to stop")
     print("="*60)
     
-    uvicorn.run(
-        "simple_ml_api:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,  # Auto-reload on code changes (dev only)
-        log_level="info"
-    )
+    import uvicorn
+    
+    if "--reload" in sys.argv:
+        uvicorn.run(
+            "simple_ml_api:app",
+            host=settings.server_host,
+            port=settings.server_port,
+            reload=True,  # Auto-reload on code changes (dev only)
+            log_level="info"
+        )
+    elif settings.server_workers != 1 and hasattr(os, "fork"):
+        # Production (WORKERS=0 or >1): preloaded model, forked workers (prefork.py)
+        import prefork
+        
+        sys.exit(prefork.serve(sys.modules[__name__]))
+    else:
+        if settings.server_workers != 1:
+            print("WORKERS ignored: the pre-fork server needs os.fork (Linux/macOS)")
+        uvicorn.run(
+            app,
+            host=settings.server_host,
+            port=settings.server_port,
+            log_level="info"
+        )
@@ -0,0 +1,201 @@
+"""
+Startup Profiling and Warm-up
+
+A new pod pays three costs before it serves at full speed:
+
+- imports: numpy, pydantic, fastapi, sklearn... (often the largest part);
+- model load: unpickling the artifact in `lifespan`;
+- first requests: lazy Pydantic/FastAPI set-up, first NumPy allocations,
+  thread/process pool start, first model call.
+
+`PROFILE` records all three. `track_imports()` times every top-level import
+made while it is active (inclusive: a package's own imports are charged to
+it). `PROFILE.phase(...)` times lifespan steps. The warm-up step sends
+synthetic requests through the full ASGI app (middleware, validation,
+limiter, batcher, executor, serialization) before the app reports ready,
+so the first real requests after a scale-out are not the slow ones.
+Warm-up requests carry the `WARMUP_SCOPE_KEY` scope flag, which
+MetricsMiddleware skips: they would otherwise be counted in the HTTP metrics
+of every worker, on every start.
+
+This module only imports the standard library, so it can be imported first
+and time everything else.
+
+Run `python startup.py` to print the report for the current settings.
+"""
+
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+# ASGI scope key marking synthetic warm-up requests (not recorded in HTTP metrics)
+WARMUP_SCOPE_KEY = "warmup"
+
+
+class StartupProfile:
+    """Import, phase and warm-up timings of one process start."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports: Dict[str, float] = {}
+        self.phases: Dict[str, float] = {}
+        self.warmup_ms: List[float] = []
+        self.ready_s = None
+        self.ready = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def mark_ready(self) -> None:
+        self.ready_s = time.perf_counter() - self.started
+        self.ready = True
+
+    def mark_stopped(self) -> None:
+        self.ready = False
+
+    def report(self, top: int = 15) -> Dict[str, Any]:
+        imports = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "ready": self.ready,
+            "ready_seconds": self.ready_s,
+            "phases_seconds": dict(self.phases),
+            "imports_seconds": dict(imports[:top]),
+            "warmup_requests": len(self.warmup_ms),
+            "warmup_first_ms": self.warmup_ms[0] if self.warmup_ms else None,
+            "warmup_last_ms": self.warmup_ms[-1] if self.warmup_ms else None,
+        }
+
+    def format(self, top: int = 10) -> str:
+        """Human-readable report, one line per phase and slowest imports."""
+        lines = [f"Startup profile (ready after {self.ready_s or 0.0:.3f}s):"]
+        lines += [f"  {name:<24}{seconds * 1e3:>10.1f} ms" for name, seconds in self.phases.items()]
+        if self.warmup_ms:
+            lines.append(
+                f"  {'warm-up first/last':<24}{self.warmup_ms[0]:>10.1f} / {self.warmup_ms[-1]:.1f} ms"
+                f" ({len(self.warmup_ms)} requests)"
+            )
+        lines.append("  slowest imports:")
+        for name, seconds in sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:top]:
+            lines.append(f"    {name:<22}{seconds * 1e3:>10.1f} ms")
+        return "\n".join(lines)
+
+
+PROFILE = StartupProfile()
+
+
+@contextmanager
+def track_imports(profile: StartupProfile = PROFILE) -> Iterator[None]:
+    """
+    Charge the wall time of new top-level imports in this thread to their package.
+
+    Wraps `builtins.__import__` only while active; imports of modules that
+    are already loaded (and relative imports) are passed straight through.
+    """
+    original = builtins.__import__
+    owner = threading.get_ident()
+    depth = 0
+
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        nonlocal depth
+        package = name.partition(".")[0]
+        if depth or level or package in sys.modules or threading.get_ident() != owner:
+            return original(name, globals, locals, fromlist, level)
+        depth += 1
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            depth -= 1
+            profile.imports[package] = profile.imports.get(package, 0.0) + time.perf_counter() - started
+
+    builtins.__import__ = timed_import
+    try:
+        with profile.phase("imports"):
+            yield
+    finally:
+        builtins.__import__ = original
+
+
+# ============================================================================
+# In-process ASGI requests (used for warm-up and by benchmarks/)
+# ============================================================================
+
+async def asgi_post(app, path: str, body: bytes, warmup: bool = False) -> Tuple[int, bytes]:
+    """Send one POST through the ASGI app and collect the response."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+        WARMUP_SCOPE_KEY: warmup,
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+    chunks = []
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def warm_up(app, requests: List[Tuple[str, bytes]], rounds: int, profile: StartupProfile = PROFILE) -> None:
+    """
+    Send `rounds` passes of (path, body) requests through `app`.
+
+    Raises RuntimeError on any non-200 response: a model that cannot score
+    its own warm-up payload should fail start-up, not serve traffic.
+    """
+    profile.warmup_ms = []
+    for _ in range(rounds):
+        for path, body in requests:
+            started = time.perf_counter()
+            status, response = await asgi_post(app, path, body, warmup=True)
+            profile.warmup_ms.append((time.perf_counter() - started) * 1e3)
+            if status != 200:
+                raise RuntimeError(f"Warm-up request to {path} failed with {status}: {response[:200]!r}")
+
+
+if __name__ == "__main__":
+    import asyncio
+    import logging
+
+    import simple_ml_api
+    # This file runs as __main__: the app records into the imported module's PROFILE
+    import startup
+
+    async def _start_and_stop():
+        logging.getLogger().setLevel(logging.WARNING)
+        async with simple_ml_api.app.router.lifespan_context(simple_ml_api.app):
+            pass
+
+    asyncio.run(_start_and_stop())
+    print(startup.PROFILE.format())
@@ -0,0 +1,127 @@
+"""
+Streaming NDJSON Scoring Helpers
+
+Input: one JSON value per line, either a bare feature vector
+`[25.0, 50000.0, 3.5, 1.0]` or an object `{"id": "c-1", "features": [...]}`
+(the one-object-per-line shape used by sections/02-python-for-ai/code/jsonl_to_csv.py).
+
+Lines are read incrementally from the request body and scored in fixed-size
+chunks, so memory stays constant regardless of how many rows are sent. A
+partial line is buffered until its newline arrives, up to `max_line_bytes`:
+a longer line ends the stream (LineTooLong) instead of growing the buffer.
+"""
+
+import json
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+import numpy as np
+from fastapi.responses import StreamingResponse
+
+from validation import to_feature_array
+
+
+class LineTooLong(ValueError):
+    """An input line exceeded the configured byte limit."""
+
+    def __init__(self, line_no: int, limit: int):
+        super().__init__(f"Line {line_no} exceeds {limit} bytes; stream stopped")
+        self.line_no = line_no
+        self.limit = limit
+
+
+class NdjsonRow:
+    """One parsed input line."""
+
+    __slots__ = ("line_no", "row_id", "features")
+
+    def __init__(self, line_no: int, row_id: Any, features: np.ndarray):
+        self.line_no = line_no
+        self.row_id = row_id
+        self.features = features
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int = 0) -> AsyncIterator[Tuple[int, bytes]]:
+    """Split a byte stream into (line_no, line) pairs, skipping blank lines.
+
+    Raises LineTooLong once a line exceeds `max_line_bytes` (0 = no limit).
+    """
+    line_no = 0
+    remainder = b""
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            line_no += 1
+            if max_line_bytes and len(line) > max_line_bytes:
+                raise LineTooLong(line_no, max_line_bytes)
+            if line.strip():
+                yield line_no, line
+        if max_line_bytes and len(remainder) > max_line_bytes:
+            raise LineTooLong(line_no + 1, max_line_bytes)
+    if remainder.strip():
+        yield line_no + 1, remainder
+
+
+def parse_line(line_no: int, line: bytes, dtype="float64") -> NdjsonRow:
+    """Parse one NDJSON line; raises ValueError with a line-specific message."""
+    try:
+        obj = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON on line {line_no}: {e}") from e
+
+    row_id: Optional[Any] = None
+    if isinstance(obj, dict):
+        row_id = obj.get("id")
+        obj = obj.get("features")
+
+    if not isinstance(obj, list) or not obj:
+        raise ValueError(f"Expected a non-empty feature list on line {line_no}")
+
+    try:
+        features = to_feature_array(obj, dtype)
+    except ValueError as e:
+        raise ValueError(f"Line {line_no}: {e}") from e
+    if features.ndim != 1:
+        raise ValueError(f"Expected a flat feature list on line {line_no}")
+
+    return NdjsonRow(line_no, row_id, features)
+
+
+def encode_result(
+    row: NdjsonRow, prediction: float, prediction_class: int, confidence: float, model_version: str
+) -> bytes:
+    out = {"line": row.line_no}
+    if row.row_id is not None:
+        out["id"] = row.row_id
+    out["prediction"] = prediction
+    out["prediction_class"] = prediction_class
+    out["confidence"] = None if np.isnan(confidence) else confidence
+    # Per record: a hot reload can land in the middle of a long stream
+    out["model_version"] = model_version
+    return (json.dumps(out) + "\n").encode()
+
+
+def encode_error(line_no: int, message: str) -> bytes:
+    return (json.dumps({"line": line_no, "error": message}) + "\n").encode()
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator may keep reading the request.
+
+    The stock StreamingResponse consumes `receive()` in a background task to
+    watch for disconnects, which swallows request body chunks we have not read
+    yet. Here the iterator owns `receive()`; a client that goes away surfaces
+    as ClientDisconnect (while reading) or a send error (while writing).
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def stack_rows(rows: List[NdjsonRow]) -> np.ndarray:
+    return np.stack([row.features for row in rows])
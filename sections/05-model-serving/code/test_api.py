@@ -5,9 +5,15 @@ Demonstrates how to use the API from Python.
 """
 
 import requests
+import asyncio
 import json
+import io
 from typing import List
 
+import numpy as np
+
+from load_test import LoadTestConfig, print_report, run_load_test
+
 # API base URL
 BASE_URL = "http://localhost:8000"
 
@@ -86,6 +92,59 @@ def test_batch_prediction():
     print(f"✅ Batch prediction passed ({result['count']} predictions)")
 
 
+def test_binary_batch_prediction():
+    """Test binary (.npy) batch prediction endpoint."""
+    print("\n" + "="*60)
+    print("Testing Binary Batch Prediction (.npy)")
+    print("="*60)
+    
+    instances = np.random.default_rng(0).normal(size=(5000, 4))
+    buffer = io.BytesIO()
+    np.save(buffer, instances)
+    
+    response = requests.post(
+        f"{BASE_URL}/predict/batch/binary",
+        data=buffer.getvalue(),
+        headers={"Content-Type": "application/x-npy"}
+    )
+    
+    print(f"Status Code: {response.status_code}")
+    print(f"Content-Type: {response.headers.get('content-type')}")
+    
+    assert response.status_code == 200
+    predictions = np.load(io.BytesIO(response.content))
+    assert predictions.shape == (len(instances),)
+    print(f"✅ Binary batch prediction passed ({len(predictions)} predictions)")
+
+
+def test_stream_prediction():
+    """Test streaming NDJSON prediction endpoint."""
+    print("\n" + "="*60)
+    print("Testing Streaming Prediction (NDJSON)")
+    print("="*60)
+    
+    def lines(n):
+        for i in range(n):
+            yield (json.dumps({"id": i, "features": [25.0, 50000.0, 3.5, float(i % 2)]}) + "\n").encode()
+    
+    num_rows = 2500
+    response = requests.post(
+        f"{BASE_URL}/predict/stream",
+        data=lines(num_rows),
+        headers={"Content-Type": "application/x-ndjson"},
+        stream=True
+    )
+    
+    print(f"Status Code: {response.status_code}")
+    assert response.status_code == 200
+    
+    results = [json.loads(line) for line in response.iter_lines() if line]
+    assert len(results) == num_rows
+    assert all("prediction" in r for r in results)
+    assert all(r["model_version"] == response.headers["X-Model-Version"] for r in results)
+    print(f"✅ Streaming prediction passed ({len(results)} predictions)")
+
+
 def test_invalid_input():
     """Test error handling with invalid input."""
     print("\n" + "="*60)
@@ -106,9 +165,50 @@ def test_invalid_input():
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     
     assert response.status_code == 422  # Validation error
+    
+    # Ragged batch: rejected by the endpoint (400), not by Pydantic (422)
+    response = requests.post(
+        f"{BASE_URL}/predict/batch",
+        json={"instances": [[1.0, 2.0, 3.0, 4.0], [1.0, 2.0]]}
+    )
+    print(f"Ragged batch: {response.status_code} {response.json()}")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "All instances must have the same number of features"}
     print("✅ Invalid input correctly rejected")
 
 
+def _metric_sum(text: str, name: str, route: str) -> float:
+    """Value of `<name>_sum{route="<route>"}` in a Prometheus exposition."""
+    prefix = f'{name}_sum{{route="{route}"}} '
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    raise AssertionError(f"{name}_sum missing for {route}")
+
+
+def test_predict_model_time_breakdown():
+    """Micro-batched /predict calls attribute their batch's model time."""
+    print("\n" + "="*60)
+    print("Testing /predict Latency Breakdown (model vs. non-model)")
+    print("="*60)
+    
+    # One keep-alive connection: with several workers, /metrics must come
+    # from the worker that served the predictions
+    with requests.Session() as session:
+        batching = session.get(f"{BASE_URL}/metrics/batching").json()
+        print(f"Micro-batching enabled: {batching['enabled']}")
+        for _ in range(20):
+            response = session.post(f"{BASE_URL}/predict", json={"features": [25.0, 50000.0, 3.5, 1.0]})
+            assert response.status_code == 200
+        text = session.get(f"{BASE_URL}/metrics").text
+    
+    total = _metric_sum(text, "http_request_duration_seconds", "/predict")
+    non_model = _metric_sum(text, "http_request_non_model_seconds", "/predict")
+    print(f"Total: {total:.6f}s, non-model: {non_model:.6f}s")
+    assert non_model < total, "Model time was not attributed to /predict requests"
+    print("✅ Latency breakdown passed")
+
+
 def test_model_info():
     """Test model info endpoint."""
     print("\n" + "="*60)
@@ -123,35 +223,23 @@ def test_model_info():
     print("✅ Model info retrieved")
 
 
-def benchmark_api(num_requests=100):
-    """Simple benchmark of API performance."""
+def benchmark_api(duration_s=5.0, concurrency=16, mix="predict=0.9,batch=0.1"):
+    """Closed-loop load test over pooled keep-alive connections (see load_test.py)."""
     print("\n" + "="*60)
-    print(f"Benchmarking API ({num_requests} requests)")
+    print(f"Benchmarking API ({concurrency} concurrent clients, {duration_s:.0f}s)")
     print("="*60)
     
-    import time
-    
-    payload = {
-        "features": [25.0, 50000.0, 3.5, 1.0]
-    }
-    
-    start_time = time.time()
-    
-    for i in range(num_requests):
-        response = requests.post(f"{BASE_URL}/predict", json=payload)
-        assert response.status_code == 200
-        
-        if (i + 1) % 10 == 0:
-            print(f"  Completed {i + 1}/{num_requests} requests...")
-    
-    elapsed_time = time.time() - start_time
-    avg_latency = (elapsed_time / num_requests) * 1000  # ms
-    throughput = num_requests / elapsed_time
+    config = LoadTestConfig(
+        url=BASE_URL,
+        mode="closed",
+        duration_s=duration_s,
+        concurrency=concurrency,
+        mix=mix,
+    )
+    report = asyncio.run(run_load_test(config))
+    print_report(report)
     
-    print(f"\nResults:")
-    print(f"  Total time: {elapsed_time:.2f} seconds")
-    print(f"  Average latency: {avg_latency:.2f} ms")
-    print(f"  Throughput: {throughput:.2f} requests/second")
+    assert report["overall"]["error_rate"] == 0, f"Errors during load test: {report['overall']['statuses']}"
     print("✅ Benchmark completed")
 
 
@@ -168,11 +256,14 @@ def main():
         test_health()
         test_single_prediction()
         test_batch_prediction()
+        test_binary_batch_prediction()
+        test_stream_prediction()
         test_invalid_input()
+        test_predict_model_time_breakdown()
         test_model_info()
         
         # Performance test
-        benchmark_api(num_requests=50)
+        benchmark_api()
         
         print("\n" + "="*60)
         print("✅ ALL TESTS PASSED")
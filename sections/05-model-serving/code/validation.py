@@ -0,0 +1,63 @@
+"""
+Feature Payload Validation
+
+Two interchangeable validation strategies with identical error messages:
+
+- "python":     per-element checks in a Python loop (the original behaviour).
+- "vectorized": one NumPy conversion into a contiguous array, then a single
+                `np.isfinite` call. The array is kept and handed straight to
+                the model, so the payload is materialized exactly once.
+
+Arrays are built directly in the inference dtype (INFERENCE_DTYPE), so the
+float32 mode never materializes a float64 copy. Values beyond float32 range
+become Inf there and are rejected like any other non-finite value.
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+VALIDATION_MODES = ("vectorized", "python")
+
+NON_FINITE_ERROR = "Features cannot contain NaN or Inf values"
+RAGGED_ERROR = "All instances must have the same number of features"
+
+
+def check_validation_mode(mode: str) -> None:
+    """Fail fast on an unknown VALIDATION_MODE (it would otherwise skip both checks)."""
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unsupported validation mode '{mode}', expected one of {', '.join(VALIDATION_MODES)}")
+
+
+def check_rows_python(rows: Sequence[Sequence[float]]) -> None:
+    """Reference implementation: validate every value in Python."""
+    width = len(rows[0]) if rows else 0
+    for row in rows:
+        if len(row) != width:
+            raise ValueError(RAGGED_ERROR)
+        if any(np.isnan(val) or np.isinf(val) for val in row):
+            raise ValueError(NON_FINITE_ERROR)
+
+
+def to_feature_array(values, dtype=np.float64) -> np.ndarray:
+    """
+    Convert a feature vector or list of vectors to a contiguous array.
+
+    Raises ValueError for ragged rows or non-finite values.
+    """
+    try:
+        if np.dtype(dtype).itemsize >= 8:
+            array = np.asarray(values, dtype=dtype)
+        else:
+            # float32 overflows to Inf, which is rejected below: no warning needed
+            with np.errstate(over="ignore"):
+                array = np.asarray(values, dtype=dtype)
+    except ValueError:
+        # NumPy refuses inhomogeneous nested lists
+        raise ValueError(RAGGED_ERROR) from None
+
+    if array.ndim > 2:
+        raise ValueError(RAGGED_ERROR)
+    if not np.isfinite(array).all():
+        raise ValueError(NON_FINITE_ERROR)
+    return np.ascontiguousarray(array)
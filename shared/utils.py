@@ -37,20 +37,114 @@ def load_json(filepath):
         return json.load(f)
 
 
-def save_model(model, filepath):
-    """Save ML model using joblib."""
+def save_model(model, filepath, compress=0):
+    """
+    Save ML model using joblib.
+    
+    Keep compress=0 (uncompressed) if the model should be loaded with
+    load_model(..., mmap_mode='r'): compressed arrays cannot be memory-mapped.
+    """
     ensure_dir(os.path.dirname(filepath))
-    joblib.dump(model, filepath)
+    joblib.dump(model, filepath, compress=compress)
     print(f"✅ Model saved to {filepath}")
 
 
-def load_model(filepath):
-    """Load ML model using joblib."""
-    model = joblib.load(filepath)
-    print(f"✅ Model loaded from {filepath}")
+def load_model(filepath, mmap_mode=None):
+    """
+    Load ML model using joblib.
+    
+    Args:
+        filepath: Path to a joblib artifact
+        mmap_mode: None to copy arrays into this process, or 'r' to
+            memory-map the model's NumPy arrays read-only. Mapped pages come
+            from the OS page cache, so every worker process that maps the same
+            file shares one physical copy (needs an uncompressed artifact).
+    """
+    model = joblib.load(filepath, mmap_mode=mmap_mode)
+    mode = f" (mmap_mode={mmap_mode})" if mmap_mode else ""
+    print(f"✅ Model loaded from {filepath}{mode}")
     return model
 
 
+# ============================================================================
+# MEMORY UTILITIES
+# ============================================================================
+
+def process_memory(pid=None):
+    """
+    Memory breakdown of one process in MB (Linux only, via /proc smaps_rollup).
+    
+    Returns:
+        dict with rss (resident), pss (proportional share: shared pages split
+        between the processes using them), shared and private memory.
+    """
+    pid = pid or os.getpid()
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024  # kB -> MB
+    
+    return {
+        'pid': pid,
+        'rss': fields.get('Rss', 0.0),
+        'pss': fields.get('Pss', 0.0),
+        'shared': fields.get('Shared_Clean', 0.0) + fields.get('Shared_Dirty', 0.0),
+        'private': fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0),
+    }
+
+
+def child_pids(parent_pid):
+    """PIDs of the direct children of a process (e.g. uvicorn/gunicorn workers)."""
+    children = []
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        # Field 4 is the parent PID; the command name (field 2) may contain spaces
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        if ppid == parent_pid:
+            children.append(int(entry.name))
+    return sorted(children)
+
+
+def print_memory_report(pids=None, parent_pid=None):
+    """
+    Print per-worker RSS vs. shared memory.
+    
+    RSS counts shared pages in every process, so summing RSS overstates the
+    real footprint; the PSS total is what the pod actually uses. With a
+    memory-mapped model, the model's arrays show up as shared, not private.
+    
+    Args:
+        pids: Process IDs to report (default: current process)
+        parent_pid: Report all children of this PID instead (server workers)
+    """
+    if parent_pid is not None:
+        pids = child_pids(parent_pid)
+    pids = pids or [os.getpid()]
+    
+    reports = [process_memory(pid) for pid in pids]
+    
+    print(f"\n{'='*60}")
+    print("Memory Report (MB)")
+    print(f"{'='*60}")
+    print(f"{'PID':>8} {'RSS':>10} {'PSS':>10} {'Shared':>10} {'Private':>10}")
+    for r in reports:
+        print(f"{r['pid']:>8} {r['rss']:>10.1f} {r['pss']:>10.1f} {r['shared']:>10.1f} {r['private']:>10.1f}")
+    
+    total_rss = sum(r['rss'] for r in reports)
+    total_pss = sum(r['pss'] for r in reports)
+    print(f"{'TOTAL':>8} {total_rss:>10.1f} {total_pss:>10.1f}")
+    print(f"\nSum of RSS: {total_rss:.1f} MB | Actual footprint (sum of PSS): {total_pss:.1f} MB")
+    
+    return reports
+
+
 # ============================================================================
 # DATA UTILITIES
 # ============================================================================